@@ -1,24 +1,44 @@
+import argparse
+import asyncio
+import json
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from dotenv import load_dotenv
+from shared.env import load_env
+from shared.jsonstream import IncrementalJSONObject, SchemaViolation, streamed_json_stage
 from shared.llm import get_llm
+from shared.batchrun import run_batch
+from shared.fusion import Stage, ab_benchmark, final_section, fuse_stages, print_ab
+from shared.pipeline import aiter_lines, pipelined
 
-load_dotenv()
+load_env()
 
-def run_prompt_chaining_example():
-    """
-    Demonstrates basic prompt chaining using LangChain Expression Language (LCEL).
-    Extracts technical specifications from text and transforms them into JSON.
+INPUT_TEXT = "The new laptop model features a 3.5 GHz octa-core processor, 16GB of RAM, and a 1TB NVMe SSD."
+
+BENCHMARK_TEXTS = [
+    INPUT_TEXT,
+    "Powered by a 2.4 GHz quad-core chip with 8GB of memory, the tablet ships with 256GB of flash storage.",
+    "This workstation pairs a 24-core 4.1 GHz CPU with 128GB DDR5 RAM and two 4TB SSDs in RAID 1.",
+]
+
+SPEC_SCHEMA = {"cpu": str, "memory": str, "storage": str}
+
+def build_chain(llm, validate=False):
     """
-    # Initialize the Language Model
-    # Ensure GOOGLE_API_KEY is set in your .env file
-    llm = get_llm(temperature=0)
+    Builds the extraction -> transformation chain using LangChain Expression
+    Language (LCEL): specifications are extracted from free text, then turned
+    into a JSON object.
 
+    With validate=True the transform stage is parsed incrementally against
+    SPEC_SCHEMA: generation stops as soon as the object closes, is aborted
+    (and retried once) on the first unexpected key or value type, and the
+    chain returns a dict instead of a string.
+    """
     # --- Prompt 1: Extract Information ---
     prompt_extract = ChatPromptTemplate.from_template(
         "Extract the technical specifications from the following text:\n\n{text_input}"
@@ -33,23 +53,165 @@ def run_prompt_chaining_example():
     # The StrOutputParser() converts the LLM's message output to a simple string.
     extraction_chain = prompt_extract | llm | StrOutputParser()
 
+    if validate:
+        prompt_transform = ChatPromptTemplate.from_template(
+            "Transform the following specifications into a JSON object with 'cpu', 'memory', and 'storage' "
+            "as keys and strings as values. Output only the JSON object:\n\n{specifications}"
+        )
+        return {"specifications": extraction_chain} | prompt_transform | streamed_json_stage(llm, SPEC_SCHEMA)
+
     # The full chain passes the output of the extraction chain into the 'specifications'
     # variable for the transformation prompt.
-    full_chain = (
+    return (
         {"specifications": extraction_chain}
         | prompt_transform
         | llm
         | StrOutputParser()
     )
 
-    # --- Run the Chain ---
-    input_text = "The new laptop model features a 3.5 GHz octa-core processor, 16GB of RAM, and a 1TB NVMe SSD."
 
+def build_fused_chain(llm):
+    """
+    The same two stages fused into one call: the model writes the extracted
+    specifications and the JSON object under their own headers, and the
+    chain returns both sections.
+    """
+    return fuse_stages(llm, [
+        Stage("SPECIFICATIONS", "Extract the technical specifications from the following text:\n\n{text_input}"),
+        Stage("JSON", "Transform the SPECIFICATIONS into a JSON object with 'cpu', 'memory', and 'storage' as keys."),
+    ])
+
+
+def run_prompt_chaining_example(validate=False, fused=False):
+    """
+    Demonstrates basic prompt chaining using LangChain Expression Language (LCEL).
+    Extracts technical specifications from text and transforms them into JSON.
+    """
+    # Initialize the Language Model
+    # Ensure GOOGLE_API_KEY is set in your .env file
+    llm = get_llm(temperature=0)
+    full_chain = build_fused_chain(llm) | final_section if fused else build_chain(llm, validate=validate)
+
+    # --- Run the Chain ---
     print("\n--- Running Extraction and Transformation Chain ---")
-    final_result = full_chain.invoke({"text_input": input_text})
+    started = time.perf_counter()
+    final_result = full_chain.invoke({"text_input": INPUT_TEXT})
+
+    print("\n--- Final JSON Output ---")
+    print(json.dumps(final_result, indent=2) if validate else final_result)
+    print(f"\n(completed in {time.perf_counter() - started:.2f}s)")
+
+
+async def run_pipelined_chaining_example():
+    """
+    Same extraction -> transformation chain, but pipelined: the extraction
+    stage streams one specification per line, and each complete line is
+    transformed into its JSON field(s) while extraction is still running.
+    The transform is streamed too, so each field is printed as soon as its
+    value has been generated.
+    """
+    llm = get_llm(temperature=0)
+
+    prompt_extract = ChatPromptTemplate.from_template(
+        "Extract the technical specifications from the following text. "
+        "Output one specification per line and nothing else:\n\n{text_input}"
+    )
+    prompt_field = ChatPromptTemplate.from_template(
+        "Transform the following specification into a JSON object using only the keys "
+        "'cpu', 'memory' or 'storage'. Output {{}} if none of them applies:\n\n{specification}"
+    )
+    extraction_chain = prompt_extract | llm | StrOutputParser()
+    field_chain = prompt_field | llm | StrOutputParser()
+
+    print("\n--- Running Pipelined Extraction and Transformation ---")
+    started = time.perf_counter()
+    result = {}
+
+    async def transform(specification: str) -> None:
+        fields = IncrementalJSONObject(SPEC_SCHEMA, required=[])
+        stream = field_chain.astream({"specification": specification})
+        try:
+            async for chunk in stream:
+                done = fields.feed(chunk)
+                for key, value in fields.result.items():
+                    if key not in result:
+                        result[key] = value
+                        print(f"  {key}: {json.dumps(value)}  (+{time.perf_counter() - started:.2f}s)")
+                if done:
+                    break
+        except SchemaViolation:
+            pass  # fields resolved before the violation are kept
+        finally:
+            await stream.aclose()
+
+    lines = aiter_lines(extraction_chain.astream({"text_input": INPUT_TEXT}))
+    async for _ in pipelined(lines, transform):
+        pass
 
     print("\n--- Final JSON Output ---")
-    print(final_result)
+    print(json.dumps(result, indent=2))
+    print(f"\n(completed in {time.perf_counter() - started:.2f}s)")
+
+
+async def run_fusion_benchmark(runs):
+    """
+    A/B comparison of the staged and fused chains on BENCHMARK_TEXTS:
+    latency, calls and tokens per run, and a 1-10 quality score from a judge model.
+    """
+    llm = get_llm(temperature=0)
+    rows = await ab_benchmark(
+        {"staged": build_chain(llm), "fused": build_fused_chain(llm)},
+        [{"text_input": text} for text in BENCHMARK_TEXTS],
+        task="Turn a product description into a JSON object with 'cpu', 'memory' and 'storage' keys.",
+        judge=llm,
+        runs=runs,
+    )
+    print("\n--- Staged vs fused extraction -> transformation ---")
+    print_ab(rows)
+
+
+def run_batch_chaining(args):
+    """
+    Runs the chain over every record of a JSONL/CSV file with bounded async
+    concurrency. Results are appended to the output file as they complete;
+    rerunning the same command resumes an interrupted job.
+    """
+    full_chain = build_chain(get_llm(temperature=0), validate=args.validate)
+    try:
+        stats = asyncio.run(run_batch(
+            full_chain,
+            args.batch,
+            args.output,
+            make_inputs=lambda record: {"text_input": record[args.text_field]},
+            concurrency=args.concurrency,
+            id_field=args.id_field,
+        ))
+    except KeyboardInterrupt:
+        print("\n--- Interrupted: rerun the same command to resume ---")
+        return
+    print(f"\n--- Batch finished: {stats['done']} done, {stats['errors']} errors, "
+          f"{stats['skipped']} already done, {stats['items_per_second']:.1f} items/s, "
+          f"{stats['tokens_per_second']:.0f} tokens/s ---")
+
 
 if __name__ == "__main__":
-    run_prompt_chaining_example()
+    parser = argparse.ArgumentParser(description="Prompt chaining: extract specifications, then transform to JSON")
+    parser.add_argument("--pipelined", action="store_true", help="start the transform stage on each streamed line")
+    parser.add_argument("--validate", action="store_true", help="parse and validate the JSON while it streams")
+    parser.add_argument("--fused", action="store_true", help="run both stages in a single model call")
+    parser.add_argument("--benchmark", type=int, metavar="RUNS", help="compare staged and fused chains")
+    parser.add_argument("--batch", metavar="INPUT", help="JSONL or CSV file of product descriptions")
+    parser.add_argument("--output", default="prompt_chaining_results.jsonl", help="results file (also the resume checkpoint)")
+    parser.add_argument("--text-field", default="text", help="field holding the description")
+    parser.add_argument("--id-field", default="id", help="field identifying a record (default: line number)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        asyncio.run(run_fusion_benchmark(args.benchmark))
+    elif args.batch:
+        run_batch_chaining(args)
+    elif args.pipelined:
+        asyncio.run(run_pipelined_chaining_example())
+    else:
+        run_prompt_chaining_example(validate=args.validate, fused=args.fused)
@@ -3,21 +3,31 @@ Coordinator Routing Pattern using LangGraph StateGraph.
 
 Demonstrates a coordinator agent that classifies user intent and routes
 to specialized handler nodes via conditional edges.
+
+With --speculative the most likely specialist starts while the intent is
+still being classified; see shared/speculate.py for the waste budget. Its
+output is held back until the route confirms it, so --stream never shows
+tokens from a discarded branch.
 """
 
+import argparse
+import asyncio
 import sys
+from collections import deque
 from pathlib import Path
-from typing import TypedDict, Literal
+from typing import Deque, Dict, Literal, Optional, Tuple, TypedDict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.intent import FastPathRouter
+from shared.nodes import llm_chain
+from shared.speculate import BufferedStream, Speculator
+from shared.streaming import arun_graph, emit_token, run_graph
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 # --- State Definition ---
@@ -25,53 +35,140 @@ class RouterState(TypedDict):
     request: str
     route: str
     response: str
+    # --speculative only: the routed specialist node, if it was started
+    # while classifying (its run waits in _SPECULATED)
+    speculated: Optional[str]
 
 
 # --- Node Implementations ---
+CLASSIFY_INTENT_CHAIN = llm_chain([
+    ("system",
+     "Analyze the user's request and determine which specialist should handle it.\n"
+     "- If related to booking flights or hotels, output 'booker'.\n"
+     "- For general information questions, output 'info'.\n"
+     "ONLY output one word: 'booker' or 'info'."),
+    ("user", "{request}")
+], temperature=0)
+
+# Local classifier trained on past LLM decisions (INTENT_MODEL); requests it
+# is not confident about still go to CLASSIFY_INTENT_CHAIN.
+INTENT_ROUTER = FastPathRouter.from_env(
+    labels=["booker", "info"],
+    fallback=lambda request: CLASSIFY_INTENT_CHAIN.invoke({"request": request}),
+)
+
+
 def classify_intent(state: RouterState) -> dict:
     """Coordinator node: classifies user intent into a route."""
     print("--- NODE: classify_intent ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Analyze the user's request and determine which specialist should handle it.\n"
-         "- If related to booking flights or hotels, output 'booker'.\n"
-         "- For general information questions, output 'info'.\n"
-         "ONLY output one word: 'booker' or 'info'."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    route = chain.invoke({"request": state["request"]}).strip().lower()
-    print(f"  Classified as: {route}")
+    route, source = INTENT_ROUTER.route(state["request"])
+    print(f"  Classified as: {route} ({source})")
     return {"route": route}
 
 
+BOOKING_NODE_CHAIN = llm_chain([
+    ("system", "You are a travel booking assistant. Help the user with their booking request."),
+    ("user", "{request}")
+], temperature=0)
+
+
 def booking_node(state: RouterState) -> dict:
     """Specialist node: handles booking-related requests."""
     print("--- NODE: booking_node ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a travel booking assistant. Help the user with their booking request."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    response = chain.invoke({"request": state["request"]})
+    response = BOOKING_NODE_CHAIN.invoke({"request": state["request"]})
     return {"response": response}
 
 
+INFO_NODE_CHAIN = llm_chain([
+    ("system", "You are a knowledgeable assistant. Answer the user's question concisely."),
+    ("user", "{request}")
+], temperature=0)
+
+
 def info_node(state: RouterState) -> dict:
     """Specialist node: handles general information requests."""
     print("--- NODE: info_node ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a knowledgeable assistant. Answer the user's question concisely."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    response = chain.invoke({"request": state["request"]})
+    response = INFO_NODE_CHAIN.invoke({"request": state["request"]})
     return {"response": response}
 
 
+# --- Speculative Dispatch ---
+def _predict_node(request: str) -> dict:
+    """Specialist probabilities from the local intent classifier."""
+    proba = INTENT_ROUTER.classifier.predict_proba(request)
+    return {"booking_node": proba.get("booker", 0.0), "info_node": 1.0 - proba.get("booker", 0.0)}
+
+
+# Without a local classifier (INTENT_MODEL) the observed route frequencies
+# are used as the prior.
+SPECULATOR = Speculator.from_env(
+    ["booking_node", "info_node"],
+    predictor=_predict_node if INTENT_ROUTER.classifier is not None else None,
+)
+
+
+SPECIALIST_CHAINS = {"booking_node": BOOKING_NODE_CHAIN, "info_node": INFO_NODE_CHAIN}
+
+# Speculated runs (buffered output, task) waiting for their specialist node,
+# by request. They stay out of the graph state, which only holds plain
+# values; identical requests in flight at once share a queue, since their
+# runs are interchangeable.
+_SPECULATED: Dict[str, Deque[Tuple[BufferedStream, "asyncio.Task"]]] = {}
+
+
+def _take_speculated(request: str) -> Tuple[BufferedStream, "asyncio.Task"]:
+    runs = _SPECULATED[request]
+    run = runs.popleft()
+    if not runs:
+        del _SPECULATED[request]
+    return run
+
+
+async def aclassify_intent(state: RouterState) -> dict:
+    """Coordinator node (--speculative): the likely specialist starts while
+    the intent is classified and is handed to the routed node on a hit."""
+    print("--- NODE: classify_intent ---")
+    request = state["request"]
+    buffers = {}
+
+    def start(node: str):
+        # Tagged nostream: the tokens are only shown if the branch wins,
+        # replayed by the specialist node.
+        stream = SPECIALIST_CHAINS[node].astream({"request": request}, config={"tags": [TAG_NOSTREAM]})
+        buffers[node] = BufferedStream(stream)
+        return buffers[node].consume()
+
+    speculation = SPECULATOR.start(request, {node: lambda node=node: start(node) for node in SPECIALIST_CHAINS})
+    try:
+        route, source = await asyncio.to_thread(INTENT_ROUTER.route, request)
+    except BaseException:
+        await speculation.cancel()
+        raise
+    print(f"  Classified as: {route} ({source})")
+    node = route_by_intent({"route": route})
+    task = await speculation.resolve(node)
+    if task is None:
+        return {"route": route, "speculated": None}
+    _SPECULATED.setdefault(request, deque()).append((buffers[node], task))
+    return {"route": route, "speculated": node}
+
+
+def make_async_specialist(node: str):
+    """Async specialist node that picks up its speculated run, if any."""
+    chain = SPECIALIST_CHAINS[node]
+
+    async def specialist(state: RouterState) -> dict:
+        print(f"--- NODE: {node} ---")
+        if state.get("speculated") != node:
+            return {"response": await chain.ainvoke({"request": state["request"]})}
+        buffer, task = _take_speculated(state["request"])
+        async for token in buffer.replay():
+            emit_token(token)
+        return {"response": "".join(await task), "speculated": None}
+
+    return specialist
+
+
 # --- Edge Logic ---
 def route_by_intent(state: RouterState) -> Literal["booking_node", "info_node"]:
     """Routes to the appropriate specialist based on classified intent."""
@@ -81,13 +178,19 @@ def route_by_intent(state: RouterState) -> Literal["booking_node", "info_node"]:
 
 
 # --- Graph Construction ---
-def build_coordinator_graph():
+def build_coordinator_graph(speculative=False):
     """Builds and compiles the coordinator routing graph."""
     builder = StateGraph(RouterState)
 
-    builder.add_node("classify_intent", classify_intent)
-    builder.add_node("booking_node", booking_node)
-    builder.add_node("info_node", info_node)
+    if speculative:
+        # Same shape, async nodes: see aclassify_intent.
+        builder.add_node("classify_intent", aclassify_intent)
+        builder.add_node("booking_node", make_async_specialist("booking_node"))
+        builder.add_node("info_node", make_async_specialist("info_node"))
+    else:
+        builder.add_node("classify_intent", classify_intent)
+        builder.add_node("booking_node", booking_node)
+        builder.add_node("info_node", info_node)
 
     builder.add_edge(START, "classify_intent")
     builder.add_conditional_edges(
@@ -102,21 +205,49 @@ def build_coordinator_graph():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Coordinator routing with LangGraph")
+    parser.add_argument("--stream", action="store_true", help="print tokens as they are generated")
+    parser.add_argument("--speculative", action="store_true", help="start the likely specialist while classifying")
+    args = parser.parse_args()
+    stream = args.stream
+
     print("--- LangGraph Coordinator Routing Example ---")
-    graph = build_coordinator_graph()
+    graph = build_coordinator_graph(speculative=args.speculative)
 
     requests = [
         "Book me a flight to London next Friday.",
         "What is the capital of Italy?",
         "I need a hotel in Tokyo for 3 nights.",
+        "book a flight to london friday",
     ]
 
-    for req in requests:
-        print(f"\nUser: {req}")
-        result = graph.invoke({"request": req})
+    def report(req, result):
         print(f"Route: {result['route']}")
         print(f"Assistant: {result['response'][:200]}...")
 
+    async def arun_requests():
+        # One event loop for every request: speculated tasks and the
+        # models' async clients are bound to the loop they started on.
+        for req in requests:
+            print(f"\nUser: {req}")
+            report(req, await arun_graph(graph, {"request": req}, stream=stream))
+
+    if args.speculative:
+        asyncio.run(arun_requests())
+    else:
+        for req in requests:
+            print(f"\nUser: {req}")
+            report(req, run_graph(graph, {"request": req}, stream=stream))
+
+    stats = INTENT_ROUTER.stats()
+    print(f"\nIntent router: {stats['local_rate']:.0%} of {stats['requests']} requests answered locally "
+          f"({stats['local_us']:.0f} us each), {stats['cache_rate']:.0%} from the route cache")
+    if args.speculative:
+        stats = SPECULATOR.stats()
+        hit_rate = f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "-"
+        print(f"Speculation: {stats['speculation_rate']:.0%} of requests, {hit_rate} hits, "
+              f"{stats['wasted_per_request']:.2f} wasted calls/request, {stats['saved_seconds']:.2f}s saved")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,105 @@
+"""
+Hierarchical Routing Pattern using LangGraph StateGraph.
+
+With many specialists, a single classifier prompt listing every route
+grows with each one added. Here the routes live in a registry organized
+by domain: the router first picks a domain, then a specialist within it,
+and each call only sees the candidates of the current level.
+"""
+
+import sys
+from pathlib import Path
+from typing import TypedDict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.env import load_env
+from shared.hierarchy import HierarchicalRouter, RouteRegistry
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
+from langgraph.graph import StateGraph, START, END
+
+load_env()
+
+
+# --- State Definition ---
+class RouterState(TypedDict):
+    request: str
+    route: str
+    response: str
+
+
+# --- Route Registry ---
+REGISTRY = RouteRegistry()
+REGISTRY.add_domain("travel", "Trips: flights, hotels and rental cars")
+REGISTRY.add_route("travel/flights", "Book, change or cancel flights")
+REGISTRY.add_route("travel/hotels", "Hotel reservations and stays")
+REGISTRY.add_route("travel/cars", "Rental cars and airport transfers")
+REGISTRY.add_domain("billing", "Payments, refunds and invoices")
+REGISTRY.add_route("billing/payments", "Failed or pending payments, payment methods")
+REGISTRY.add_route("billing/refunds", "Refund requests and their status")
+REGISTRY.add_route("billing/invoices", "Invoices, receipts and tax documents")
+REGISTRY.add_domain("support", "Accounts and technical problems")
+REGISTRY.add_route("support/account", "Login, password and account settings")
+REGISTRY.add_route("support/bugs", "Errors and things that do not work in the app")
+REGISTRY.add_route("general", "General information questions and anything else")
+
+ROUTER = HierarchicalRouter(REGISTRY, default="general")
+
+
+# --- Node Implementations ---
+SPECIALIST_CHAIN = llm_chain([
+    ("system", "You are the specialist for: {specialty}. Help the user with their request concisely."),
+    ("user", "{request}")
+], temperature=0)
+
+
+def make_specialist(path: str):
+    """Builds the graph node for one registered route."""
+    specialty = REGISTRY.get(path).description
+
+    def specialist(state: RouterState) -> dict:
+        print(f"--- NODE: {REGISTRY.node_for(path)} ---")
+        response = SPECIALIST_CHAIN.invoke({"specialty": specialty, "request": state["request"]})
+        return {"response": response}
+
+    return specialist
+
+
+# --- Graph Construction ---
+def build_hierarchical_graph():
+    """Builds and compiles a graph with one node per registered route."""
+    builder = StateGraph(RouterState)
+
+    builder.add_node("route", ROUTER.node)
+    for route in REGISTRY.routes():
+        builder.add_node(route.node, make_specialist(route.path))
+        builder.add_edge(route.node, END)
+
+    builder.add_edge(START, "route")
+    ROUTER.add_conditional_edges(builder, "route")
+
+    return builder.compile()
+
+
+def main():
+    stream = stream_requested()
+    print("--- LangGraph Hierarchical Routing Example ---")
+    graph = build_hierarchical_graph()
+
+    requests = [
+        "Book me a flight to London next Friday.",
+        "I was charged twice, can I get my money back?",
+        "The app crashes when I open my profile.",
+        "What is the capital of Italy?",
+    ]
+
+    for req in requests:
+        print(f"\nUser: {req}")
+        result = run_graph(graph, {"request": req}, stream=stream)
+        print(f"Route: {result['route']}")
+        print(f"Assistant: {result['response'][:200]}...")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
+import argparse
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.batchroute import route_batch
+from shared.env import load_env
+from shared.intent import FastPathRouter
 from shared.llm import get_llm
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableBranch, RunnableLambda
 
-load_dotenv()
+load_env()
 
 def booking_handler(request: str) -> str:
     """Simulates the Booking Agent handling a request."""
@@ -26,6 +29,21 @@ def unclear_handler(request: str) -> str:
     print("\n--- HANDLING UNCLEAR REQUEST ---")
     return f"Coordinator could not delegate request: '{request}'. Please clarify."
 
+def delegate(decision: str, request: str) -> str:
+    """Sends a request to the handler for a routing decision."""
+    decision = decision.strip().lower()
+    if decision == 'booker':
+        return booking_handler(request)
+    elif decision == 'info':
+        return info_handler(request)
+    else:
+        return unclear_handler(request)
+
+ROUTER_INSTRUCTIONS = """Analyze the user's request and determine which specialist handler should process it.
+         - If the request is related to booking flights or hotels, output 'booker'.
+         - For all other general information questions, output 'info'.
+         - If the request is unclear or doesn't fit either category, output 'unclear'."""
+
 def setup_langgraph_router():
     """
     Sets up a routing chain using LangChain Expression Language (LCEL).
@@ -39,43 +57,50 @@ def setup_langgraph_router():
 
     # Coordinator Router Prompt
     coordinator_router_prompt = ChatPromptTemplate.from_messages([
-        ("system", """Analyze the user's request and determine which specialist handler should process it.
-         - If the request is related to booking flights or hotels, output 'booker'.
-         - For all other general information questions, output 'info'.
-         - If the request is unclear or doesn't fit either category, output 'unclear'.
+        ("system", ROUTER_INSTRUCTIONS + """
          ONLY output one word: 'booker', 'info', or 'unclear'."""),
         ("user", "{request}")
     ])
 
     router_chain = coordinator_router_prompt | llm | StrOutputParser()
 
+    # Answer from the local classifier (INTENT_MODEL) when it is confident,
+    # and from router_chain otherwise.
+    router = FastPathRouter.from_env(
+        labels=["booker", "info", "unclear"],
+        fallback=router_chain.invoke,
+    )
+
     # Define the delegation branches
     def route_to_handler(inputs):
-        decision = inputs['decision'].strip().lower()
-        request_text = inputs['request']
-        
-        if decision == 'booker':
-            return booking_handler(request_text)
-        elif decision == 'info':
-            return info_handler(request_text)
-        else:
-            return unclear_handler(request_text)
+        return delegate(inputs['decision'], inputs['request'])
 
     # Combine into a single chain
     full_chain = (
-        {"decision": router_chain, "request": RunnablePassthrough()}
+        {"decision": RunnableLambda(lambda request: router.route(request)[0]), "request": RunnablePassthrough()}
         | RunnableLambda(route_to_handler)
     )
     
     return full_chain
 
+def run_batched(requests):
+    """Classifies all pending requests in one model call, then dispatches them."""
+    llm = get_llm(temperature=0)
+    routes = route_batch(
+        llm, requests, labels=["booker", "info", "unclear"],
+        instructions=ROUTER_INSTRUCTIONS, default="unclear",
+    )
+    for req, route in zip(requests, routes):
+        print(f"\nUser: {req}")
+        print(f"Route: {route}")
+        print(f"Assistant: {delegate(route, req)}")
+
 def main():
+    parser = argparse.ArgumentParser(description="LCEL coordinator routing")
+    parser.add_argument("--batch", action="store_true", help="classify all requests in a single model call")
+    args = parser.parse_args()
+
     print("--- LangGraph/LCEL Routing Example ---")
-    
-    chain = setup_langgraph_router()
-    if not chain:
-        print("Chain setup failed.")
-        return
 
     # Tests
     requests = [
@@ -84,6 +109,15 @@ def main():
         "Tell me about quantum physics."
     ]
 
+    if args.batch:
+        run_batched(requests)
+        return
+
+    chain = setup_langgraph_router()
+    if not chain:
+        print("Chain setup failed.")
+        return
+
     for req in requests:
         print(f"\nUser: {req}")
         result = chain.invoke(req)
@@ -1,129 +1,423 @@
 """
 Parallel Research Pattern using LangGraph StateGraph.
 
-Demonstrates fan-out/fan-in: multiple researcher nodes execute in parallel,
-then a synthesis node aggregates all findings.
+Demonstrates fan-out/fan-in: one researcher branch per research
+perspective executes in parallel, then a synthesis node aggregates all
+findings.
+
+The perspectives are data, not code: each is dispatched to the same
+research_perspective node through LangGraph's Send API, so a topic can be
+researched from hundreds of angles (--perspectives perspectives.json).
+Branches from every graph run share one concurrency cap
+(RESEARCH_CONCURRENCY, default 8) so a large fan-out queues instead of
+overrunning provider limits, and a branch that takes longer than
+RESEARCH_BRANCH_TIMEOUT seconds (default 60) is dropped from the synthesis.
+
+With --async the graph is built from async nodes (chain.ainvoke) and run on
+the event loop instead of LangGraph's thread pool; --max-concurrency caps
+the branches running at once within a single run.
+
+With --incremental there is no barrier before synthesis: findings are
+folded into a running synthesis as each branch returns. --quorum K emits
+the synthesis of the first K findings as soon as it is ready and keeps
+folding the stragglers on top; with --deadline SECONDS the synthesis is
+instead finalized once K findings are in and the deadline has passed,
+dropping the stragglers.
 """
 
-import operator
+import argparse
+import asyncio
+import contextvars
+import json
+import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import TypedDict, Annotated, List
+from typing import TypedDict, Annotated, List, Optional
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.aggregate import Rope, concat
+from shared.env import load_env
+from shared.fanin import fold_as_completed
+from shared.nodes import llm_chain
+from shared.ratelimit import ProviderLimiter
+from shared.streaming import arun_graph, run_graph
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+
+load_env()
+
+
+# --- Research Perspectives ---
+class Perspective(TypedDict):
+    name: str   # label used in the findings
+    role: str   # who the researcher is
+    focus: str  # what implications to analyze
+
+
+PERSPECTIVES: List[Perspective] = [
+    {"name": "Renewable Energy", "role": "renewable energy researcher", "focus": "renewable energy"},
+    {"name": "Electric Vehicles", "role": "electric vehicle industry analyst", "focus": "EV"},
+    {"name": "Carbon Capture", "role": "carbon capture technology specialist", "focus": "carbon capture"},
+]
+
+BRANCH_TIMEOUT = float(os.environ.get("RESEARCH_BRANCH_TIMEOUT", 60))
+
+# Shared by every branch of every run, sync and async alike; created on
+# first use (RESEARCH_CONCURRENCY is read then).
+_branch_limiter: Optional[ProviderLimiter] = None
+_branch_pool: Optional[ThreadPoolExecutor] = None
+_branch_lock = threading.Lock()
+
+
+def branch_limiter() -> ProviderLimiter:
+    """Concurrency cap shared by all research branches."""
+    global _branch_limiter
+    with _branch_lock:
+        if _branch_limiter is None:
+            concurrency = int(os.environ.get("RESEARCH_CONCURRENCY", 8))
+            _branch_limiter = ProviderLimiter("research_branches", max_concurrency=concurrency)
+        return _branch_limiter
+
+
+def branch_pool() -> ThreadPoolExecutor:
+    """Threads running sync branch calls. A timed-out call gives its slot
+    back at once but keeps its thread until it returns, so the pool has
+    headroom beyond the cap for such stragglers."""
+    global _branch_pool
+    limit = branch_limiter().max_concurrency
+    with _branch_lock:
+        if _branch_pool is None:
+            _branch_pool = ThreadPoolExecutor(max_workers=4 * limit, thread_name_prefix="research_branch")
+        return _branch_pool
+
+
+class _Slot:
+    """A limiter ticket released exactly once, by whichever of the branch
+    (on timeout) or its worker thread (when the call returns) is first."""
 
-load_dotenv()
+    def __init__(self, limiter: ProviderLimiter, ticket):
+        self.limiter = limiter
+        self.ticket = ticket
+        self._lock = threading.Lock()
+        self._released = False
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.limiter.release(self.ticket)
 
 
 # --- State Definition ---
 class ResearchState(TypedDict):
     topic: str
-    findings: Annotated[List[str], operator.add]
+    perspectives: List[Perspective]
+    findings: Annotated[Rope, concat]
+    timed_out: Annotated[Rope, concat]
+    failed: Annotated[Rope, concat]  # incremental mode: "name: error" of branches that raised
     synthesis: str
+    # Incremental mode only (see incremental_synthesize)
+    quorum: int
+    deadline: float
+    dropped: List[str]
+    quorum_synthesis: str  # the synthesis as of the first `quorum` findings
+
+
+class ResearchTask(TypedDict):
+    topic: str
+    perspective: Perspective
 
 
 # --- Node Implementations ---
-def research_renewable_energy(state: ResearchState) -> dict:
-    """Researcher 1: investigates renewable energy aspects of the topic."""
-    print("--- NODE: research_renewable_energy ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a renewable energy researcher. Provide a brief (2-3 sentence) "
-                   "analysis of the renewable energy implications of the given topic."),
-        ("user", "{topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"topic": state["topic"]})
-    return {"findings": [f"[Renewable Energy] {result}"]}
-
-
-def research_electric_vehicles(state: ResearchState) -> dict:
-    """Researcher 2: investigates electric vehicle aspects of the topic."""
-    print("--- NODE: research_electric_vehicles ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an electric vehicle industry analyst. Provide a brief (2-3 sentence) "
-                   "analysis of the EV implications of the given topic."),
-        ("user", "{topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"topic": state["topic"]})
-    return {"findings": [f"[Electric Vehicles] {result}"]}
-
-
-def research_carbon_capture(state: ResearchState) -> dict:
-    """Researcher 3: investigates carbon capture aspects of the topic."""
-    print("--- NODE: research_carbon_capture ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a carbon capture technology specialist. Provide a brief (2-3 sentence) "
-                   "analysis of the carbon capture implications of the given topic."),
-        ("user", "{topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"topic": state["topic"]})
-    return {"findings": [f"[Carbon Capture] {result}"]}
+def fan_out(state: ResearchState) -> List[Send]:
+    """Dispatches one research_perspective branch per perspective."""
+    perspectives = state.get("perspectives") or PERSPECTIVES
+    return [Send("research_perspective", {"topic": state["topic"], "perspective": p}) for p in perspectives]
+
+
+RESEARCH_PERSPECTIVE_CHAIN = llm_chain([
+    ("system", "You are a {role}. Provide a brief (2-3 sentence) "
+               "analysis of the {focus} implications of the given topic."),
+    ("user", "{topic}")
+], temperature=0)
+
+
+def _research_inputs(task: ResearchTask) -> dict:
+    perspective = task["perspective"]
+    return {"role": perspective["role"], "focus": perspective["focus"], "topic": task["topic"]}
+
+
+def _invoke(inputs: dict, slots: List[_Slot], started: threading.Event) -> str:
+    # The slot is taken here rather than by the branch, so a branch waiting
+    # for a free thread does not hold a slot meanwhile.
+    try:
+        limiter = branch_limiter()
+        slots.append(_Slot(limiter, limiter.acquire()))
+    finally:
+        started.set()
+    try:
+        return RESEARCH_PERSPECTIVE_CHAIN.invoke(inputs)
+    finally:
+        slots[0].release()
+
+
+def research_perspective(task: ResearchTask) -> dict:
+    """Researcher branch: analyzes the topic from one perspective."""
+    name = task["perspective"]["name"]
+    print(f"--- NODE: research_perspective ({name}) ---")
+    # The timeout covers the call, not the wait for a thread or a slot. A
+    # blocking call cannot be interrupted, so it runs on a worker thread and
+    # is abandoned on timeout, giving its slot back to the other branches.
+    slots: List[_Slot] = []
+    started = threading.Event()
+    ctx = contextvars.copy_context()
+    future = branch_pool().submit(ctx.run, _invoke, _research_inputs(task), slots, started)
+    started.wait()
+    try:
+        result = future.result(timeout=BRANCH_TIMEOUT)
+    except FutureTimeoutError:
+        slots[0].release()
+        print(f"  {name}: timed out after {BRANCH_TIMEOUT:g}s")
+        return {"timed_out": [name]}
+    return {"findings": [f"[{name}] {result}"]}
+
+
+async def _afinding(task: ResearchTask) -> str:
+    """One perspective's finding; raises asyncio.TimeoutError past BRANCH_TIMEOUT."""
+    limiter = branch_limiter()
+    ticket = await limiter.aacquire()
+    try:
+        return await asyncio.wait_for(
+            RESEARCH_PERSPECTIVE_CHAIN.ainvoke(_research_inputs(task)), BRANCH_TIMEOUT
+        )
+    finally:
+        limiter.release(ticket)
+
+
+async def aresearch_perspective(task: ResearchTask) -> dict:
+    """Async variant of research_perspective; a timed-out call is cancelled."""
+    name = task["perspective"]["name"]
+    print(f"--- NODE: research_perspective ({name}) ---")
+    try:
+        result = await _afinding(task)
+    except asyncio.TimeoutError:
+        print(f"  {name}: timed out after {BRANCH_TIMEOUT:g}s")
+        return {"timed_out": [name]}
+    return {"findings": [f"[{name}] {result}"]}
+
+
+SYNTHESIZE_CHAIN = llm_chain([
+    ("system",
+     "You are a senior research analyst. Synthesize the following research findings "
+     "into a cohesive 1-paragraph executive summary.\n\nFindings:\n{findings}"),
+    ("user", "Create the synthesis for the topic: {topic}")
+], temperature=0)
+
+
+NO_FINDINGS = "No synthesis: every research branch failed or timed out."
 
 
 def synthesize(state: ResearchState) -> dict:
     """Synthesis node: aggregates findings from all researchers into a report."""
     print("--- NODE: synthesize ---")
-    llm = get_llm(temperature=0)
+    if not state["findings"]:
+        return {"synthesis": NO_FINDINGS}
+    findings_text = "\n\n".join(state["findings"])
+    result = SYNTHESIZE_CHAIN.invoke({"topic": state["topic"], "findings": findings_text})
+    return {"synthesis": result}
+
+
+async def asynthesize(state: ResearchState) -> dict:
+    """Async variant of synthesize."""
+    print("--- NODE: synthesize ---")
+    if not state["findings"]:
+        return {"synthesis": NO_FINDINGS}
     findings_text = "\n\n".join(state["findings"])
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a senior research analyst. Synthesize the following research findings "
-         "into a cohesive 1-paragraph executive summary.\n\nFindings:\n{findings}"),
-        ("user", "Create the synthesis for the topic: {topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"topic": state["topic"], "findings": findings_text})
+    result = await SYNTHESIZE_CHAIN.ainvoke({"topic": state["topic"], "findings": findings_text})
     return {"synthesis": result}
 
 
+FOLD_CHAIN = llm_chain([
+    ("system",
+     "You are a senior research analyst maintaining a running executive summary. "
+     "Revise the current summary so it also reflects the new findings, keeping it "
+     "a cohesive 1-paragraph executive summary.\n\n"
+     "Current summary:\n{synthesis}\n\nNew findings:\n{findings}"),
+    ("user", "Update the synthesis for the topic: {topic}")
+], temperature=0)
+
+
+async def incremental_synthesize(state: ResearchState) -> dict:
+    """Fan-out and fan-in in one node: each finding is folded into a running
+    synthesis as soon as its branch returns, instead of after a barrier.
+
+    With a quorum (state["quorum"], k of n) the synthesis of the first k
+    findings is emitted as soon as it is ready (a "quorum_synthesis" custom
+    stream event, and the state key of the same name) while later findings
+    keep being folded on top. With state["deadline"] as well, the synthesis
+    is finalized once k findings are in and the deadline has passed;
+    stragglers still running then are cancelled and listed in "dropped".
+    """
+    print("--- NODE: incremental_synthesize ---")
+    topic = state["topic"]
+    perspectives = state.get("perspectives") or PERSPECTIVES
+    names = [p["name"] for p in perspectives]
+    # Keyed by position: perspective names need not be unique.
+    branches = {
+        index: _afinding({"topic": topic, "perspective": p}) for index, p in enumerate(perspectives)
+    }
+
+    findings: List[str] = []
+
+    async def fold(synthesis, arrived):
+        new = [f"[{names[index]}] {finding}" for index, finding in arrived]
+        findings.extend(new)
+        print(f"  folding {len(new)} finding(s), {len(findings)}/{len(branches)} in")
+        findings_text = "\n\n".join(new)
+        if not synthesis:
+            return await SYNTHESIZE_CHAIN.ainvoke({"topic": topic, "findings": findings_text})
+        return await FOLD_CHAIN.ainvoke({"topic": topic, "synthesis": synthesis, "findings": findings_text})
+
+    quorum_synthesis: List[str] = []
+    write = get_stream_writer()
+
+    def on_quorum(synthesis):
+        quorum_synthesis.append(synthesis)
+        print(f"  quorum reached; synthesis of the first {len(findings)} finding(s):\n  {synthesis}")
+        write({"quorum_synthesis": synthesis})
+
+    quorum = state.get("quorum")
+    outcome = await fold_as_completed(
+        branches, fold, initial="", quorum=quorum, deadline=state.get("deadline"),
+        on_quorum=on_quorum if quorum is not None else None,
+    )
+    if outcome.dropped:
+        print(f"  quorum after {outcome.quorum_seconds:.2f}s; dropped {len(outcome.dropped)} straggler(s)")
+    timed_out = [i for i in outcome.failed if isinstance(outcome.errors[i], asyncio.TimeoutError)]
+    failed = [i for i in outcome.failed if i not in timed_out]
+    update = {
+        "findings": findings,
+        "timed_out": [names[i] for i in timed_out],
+        "failed": [f"{names[i]}: {outcome.errors[i]!r}" for i in failed],
+        "dropped": [names[i] for i in outcome.dropped],
+        "synthesis": outcome.value or NO_FINDINGS,
+    }
+    if quorum_synthesis:
+        update["quorum_synthesis"] = quorum_synthesis[0]
+    return update
+
+
 # --- Graph Construction ---
-def build_parallel_research_graph():
-    """Builds a graph with 3 parallel researcher branches merging into synthesis."""
+def build_parallel_research_graph(use_async=False):
+    """Builds a graph that fans out one researcher branch per perspective,
+    merging into synthesis.
+
+    With use_async=True the nodes are the async variants; the graph must
+    then be run with ainvoke()/astream() (see arun_research).
+    """
     builder = StateGraph(ResearchState)
 
-    builder.add_node("research_renewable_energy", research_renewable_energy)
-    builder.add_node("research_electric_vehicles", research_electric_vehicles)
-    builder.add_node("research_carbon_capture", research_carbon_capture)
-    builder.add_node("synthesize", synthesize)
+    if use_async:
+        builder.add_node("research_perspective", aresearch_perspective)
+        builder.add_node("synthesize", asynthesize)
+    else:
+        builder.add_node("research_perspective", research_perspective)
+        builder.add_node("synthesize", synthesize)
 
-    # Fan-out: START → all three researchers in parallel
-    builder.add_edge(START, "research_renewable_energy")
-    builder.add_edge(START, "research_electric_vehicles")
-    builder.add_edge(START, "research_carbon_capture")
+    # Fan-out: START → one branch per perspective, in parallel
+    builder.add_conditional_edges(START, fan_out, ["research_perspective"])
 
-    # Fan-in: all researchers → synthesize
-    builder.add_edge("research_renewable_energy", "synthesize")
-    builder.add_edge("research_electric_vehicles", "synthesize")
-    builder.add_edge("research_carbon_capture", "synthesize")
+    # Fan-in: every branch → synthesize
+    builder.add_edge("research_perspective", "synthesize")
 
     builder.add_edge("synthesize", END)
 
     return builder.compile()
 
 
+def build_incremental_research_graph():
+    """Builds the streaming fan-in variant: a single async node that runs
+    every perspective and folds findings into the synthesis as they arrive.
+    Run it with ainvoke()/astream() (see arun_research)."""
+    builder = StateGraph(ResearchState)
+    builder.add_node("incremental_synthesize", incremental_synthesize)
+    builder.add_edge(START, "incremental_synthesize")
+    builder.add_edge("incremental_synthesize", END)
+    return builder.compile()
+
+
+def research_inputs(topic, perspectives=None, quorum=None, deadline=None):
+    """Initial state for a research run; quorum and deadline only apply to
+    the incremental graph."""
+    inputs = {"topic": topic, "perspectives": perspectives or PERSPECTIVES, "findings": [], "timed_out": [], "failed": []}
+    if quorum is not None:
+        inputs["quorum"] = quorum
+    if deadline is not None:
+        inputs["deadline"] = deadline
+    return inputs
+
+
+async def arun_research(topic, perspectives=None, graph=None, max_concurrency=None, stream=False,
+                        incremental=False, quorum=None, deadline=None):
+    """Async entry point: runs the research graph with ainvoke (or astream
+    with stream=True); max_concurrency caps the branches running at once.
+
+    incremental=True uses build_incremental_research_graph(): the synthesis
+    of the first ``quorum`` findings is emitted early, and with ``deadline``
+    the run finalizes after ``quorum`` findings and ``deadline`` seconds.
+    """
+    if graph is None:
+        graph = build_incremental_research_graph() if incremental else build_parallel_research_graph(use_async=True)
+    config = {"max_concurrency": max_concurrency} if max_concurrency else None
+    inputs = research_inputs(topic, perspectives, quorum, deadline)
+    return await arun_graph(graph, inputs, config, stream=stream)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Parallel research with LangGraph")
+    parser.add_argument("--stream", action="store_true", help="print tokens as they are generated")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use async nodes and ainvoke")
+    parser.add_argument("--max-concurrency", type=int, help="maximum branches running at once")
+    parser.add_argument("--perspectives", metavar="FILE",
+                        help="JSON list of {name, role, focus} perspectives (default: 3 built-in)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="fold findings into the synthesis as they arrive (async)")
+    parser.add_argument("--quorum", type=int, metavar="K",
+                        help="with --incremental: emit the synthesis as soon as K findings are in, "
+                             "then keep folding in the rest (default: all)")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="with --quorum: finalize once K findings are in and this long has passed "
+                             "since the start, dropping the stragglers")
+    args = parser.parse_args()
+
     print("--- LangGraph Parallel Research Example ---")
-    graph = build_parallel_research_graph()
+    topic = "The impact of government subsidies on clean technology adoption"
+    perspectives = json.loads(Path(args.perspectives).read_text()) if args.perspectives else PERSPECTIVES
 
-    result = graph.invoke({
-        "topic": "The impact of government subsidies on clean technology adoption",
-        "findings": [],
-    })
+    if args.use_async or args.incremental:
+        result = asyncio.run(arun_research(
+            topic, perspectives, max_concurrency=args.max_concurrency, stream=args.stream,
+            incremental=args.incremental, quorum=args.quorum, deadline=args.deadline,
+        ))
+    else:
+        graph = build_parallel_research_graph()
+        config = {"max_concurrency": args.max_concurrency} if args.max_concurrency else None
+        result = run_graph(graph, research_inputs(topic, perspectives), config, stream=args.stream)
 
     print("\n=== INDIVIDUAL FINDINGS ===")
     for finding in result["findings"]:
         print(f"\n{finding}")
+    if result["timed_out"]:
+        print(f"\n(timed out: {', '.join(result['timed_out'])})")
+    if result.get("failed"):
+        print(f"\n(failed: {'; '.join(result['failed'])})")
+    if result.get("dropped"):
+        print(f"\n(dropped after the deadline: {', '.join(result['dropped'])})")
 
     print("\n=== SYNTHESIS ===")
     print(result["synthesis"])
@@ -1,16 +1,18 @@
+import argparse
 import asyncio
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
+from shared.fusion import Stage, ab_benchmark, final_section, fuse_stages, print_ab
 from shared.llm import get_llm
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
-load_dotenv()
+load_env()
 
 def setup_reflection_chain():
     """
@@ -72,14 +74,36 @@ def setup_reflection_chain():
     
     return full_reflection_chain
 
-async def run_reflection_example(product_details: str):
+def setup_fused_reflection_chain():
+    """
+    Generation, critique and refinement in a single call. The chain returns
+    the DRAFT, CRITIQUE and REFINED sections.
+    """
+    try:
+        llm = get_llm(temperature=0.7)
+    except Exception as e:
+        print(f"Error initializing LLM: {e}")
+        return None
+
+    return fuse_stages(llm, [
+        Stage("DRAFT", "Write a short, simple product description for a new smart coffee mug "
+                       "based on these details: {product_details}"),
+        Stage("CRITIQUE", "Critique the DRAFT based on clarity, conciseness, and appeal. "
+                          "Provide specific suggestions for improvement."),
+        Stage("REFINED", "Based on the original product details and the CRITIQUE, rewrite the "
+                         "product description to be more effective. Output only the description."),
+    ])
+
+async def run_reflection_example(product_details: str, fused: bool = False):
     """
     Runs the LangChain reflection example.
     """
-    chain = setup_reflection_chain()
+    chain = setup_fused_reflection_chain() if fused else setup_reflection_chain()
     if not chain:
         print("Reflection chain setup failed.")
         return
+    if fused:
+        chain = chain | final_section
 
     print(f"\n--- Running Reflection Example for Product: '{product_details}' ---")
     try:
@@ -91,6 +115,36 @@ async def run_reflection_example(product_details: str):
     except Exception as e:
         print(f"\nAn error occurred during chain execution: {e}")
 
+async def run_reflection_benchmark(runs: int):
+    """
+    A/B comparison of the three-call and fused reflection chains: latency,
+    calls, tokens and a judge's 1-10 score of the refined description.
+    """
+    chains = {"staged": setup_reflection_chain(), "fused": setup_fused_reflection_chain()}
+    if not all(chains.values()):
+        print("Reflection chain setup failed.")
+        return
+    rows = await ab_benchmark(
+        chains,
+        [
+            {"product_details": "A mug that keeps coffee hot and can be controlled by a smartphone app."},
+            {"product_details": "A self-cleaning travel mug with a leak-proof lid and a battery that lasts a week."},
+        ],
+        task="Write a clear, concise and appealing product description for a smart coffee mug.",
+        judge=get_llm(temperature=0),
+        runs=runs,
+    )
+    print("\n--- Staged vs Fused Reflection ---")
+    print_ab(rows)
+
 if __name__ == "__main__":
-    test_product_details = "A mug that keeps coffee hot and can be controlled by a smartphone app."
-    asyncio.run(run_reflection_example(test_product_details))
+    parser = argparse.ArgumentParser(description="Reflection: generate, critique and refine a product description")
+    parser.add_argument("--fused", action="store_true", help="run all three stages in a single model call")
+    parser.add_argument("--benchmark", type=int, metavar="RUNS", help="compare staged and fused chains")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        asyncio.run(run_reflection_benchmark(args.benchmark))
+    else:
+        test_product_details = "A mug that keeps coffee hot and can be controlled by a smartphone app."
+        asyncio.run(run_reflection_example(test_product_details, fused=args.fused))
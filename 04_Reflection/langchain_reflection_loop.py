@@ -4,11 +4,11 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
 from langchain_core.messages import SystemMessage, HumanMessage
 
-load_dotenv()
+load_env()
 
 def run_reflection_loop(task: str, max_iterations: int = 3):
     """
@@ -11,13 +11,12 @@ from typing import TypedDict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 # --- State Definition ---
@@ -28,37 +27,37 @@ class ReflectionState(TypedDict):
 
 
 # --- Node Implementations ---
+DRAFT_WRITER_CHAIN = llm_chain([
+    ("system",
+     "You are a technical writer. Write a concise (3-4 paragraph) article "
+     "on the given topic. Focus on accuracy and clarity."),
+    ("user", "Write about: {topic}")
+], temperature=0.7)
+
+
 def draft_writer(state: ReflectionState) -> dict:
     """Generates an initial draft on the given topic."""
     print("--- NODE: draft_writer ---")
-    llm = get_llm(temperature=0.7)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a technical writer. Write a concise (3-4 paragraph) article "
-         "on the given topic. Focus on accuracy and clarity."),
-        ("user", "Write about: {topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    draft = chain.invoke({"topic": state["topic"]})
+    draft = DRAFT_WRITER_CHAIN.invoke({"topic": state["topic"]})
     return {"draft_text": draft}
 
 
+FACT_CHECKER_CHAIN = llm_chain([
+    ("system",
+     "You are a fact-checker and editor. Review the following draft for:\n"
+     "1. Factual accuracy\n"
+     "2. Logical consistency\n"
+     "3. Missing important points\n"
+     "4. Suggestions for improvement\n\n"
+     "Provide a structured review with specific feedback."),
+    ("user", "Draft to review:\n\n{draft_text}")
+], temperature=0)
+
+
 def fact_checker(state: ReflectionState) -> dict:
     """Reviews the draft for factual accuracy and suggests improvements."""
     print("--- NODE: fact_checker ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a fact-checker and editor. Review the following draft for:\n"
-         "1. Factual accuracy\n"
-         "2. Logical consistency\n"
-         "3. Missing important points\n"
-         "4. Suggestions for improvement\n\n"
-         "Provide a structured review with specific feedback."),
-        ("user", "Draft to review:\n\n{draft_text}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    review = chain.invoke({"draft_text": state["draft_text"]})
+    review = FACT_CHECKER_CHAIN.invoke({"draft_text": state["draft_text"]})
     return {"review_output": review}
 
 
@@ -78,12 +77,13 @@ def build_reflection_pipeline():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Reflection Pipeline Example ---")
     graph = build_reflection_pipeline()
 
-    result = graph.invoke({
+    result = run_graph(graph, {
         "topic": "The role of quantum computing in breaking modern encryption"
-    })
+    }, stream=stream)
 
     print("\n=== DRAFT ===")
     print(result["draft_text"])
@@ -10,12 +10,12 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
 from langchain_core.tools import tool
 from langgraph.prebuilt import create_react_agent
 
-load_dotenv()
+load_env()
 
 
 # Simulated search tool (replace with GoogleSearchAPIWrapper for production)
@@ -5,12 +5,12 @@ from typing import List
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
 from langchain_core.tools import tool as langchain_tool
 from langchain.agents import create_agent
 
-load_dotenv()
+load_env()
 
 @langchain_tool
 def search_information(query: str) -> str:
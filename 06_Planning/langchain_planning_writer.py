@@ -5,18 +5,21 @@ Demonstrates a two-stage pipeline: first the agent creates an article plan,
 then uses that plan as context to write the full article.
 """
 
+import argparse
+import asyncio
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
+from shared.fusion import Stage, ab_benchmark, fuse_stages, print_ab
 from shared.llm import get_llm
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
-load_dotenv()
+load_env()
 
 
 def setup_planning_chain():
@@ -55,13 +58,57 @@ def setup_planning_chain():
     return plan_chain, full_chain
 
 
+def setup_fused_planning_chain():
+    """Plan and article in a single call; returns {"PLAN": ..., "ARTICLE": ...}."""
+    llm = get_llm(temperature=0.7)
+    return fuse_stages(llm, [
+        Stage("PLAN",
+              "Create a structured outline for an article on: {topic}\n"
+              "Include a title, 3-4 key sections, the main points for each section "
+              "and the target audience."),
+        Stage("ARTICLE",
+              "Write a concise article following the PLAN. Keep it focused and practical."),
+    ], system="You are an expert article planner and a skilled technical writer.")
+
+
+async def run_benchmark(topics, runs):
+    """A/B comparison of the two-call and fused plan -> write pipelines."""
+    _, full_chain = setup_planning_chain()
+    rows = await ab_benchmark(
+        {"staged": full_chain, "fused": setup_fused_planning_chain()},
+        [{"topic": topic} for topic in topics],
+        task="Write a concise, well-structured and practical article on the given topic.",
+        judge=get_llm(temperature=0),
+        runs=runs,
+    )
+    print("\n=== STAGED vs FUSED ===")
+    print_ab(rows)
+
+
 def main():
-    print("--- LangChain Planning Writer Example ---")
+    parser = argparse.ArgumentParser(description="Planning writer: plan an article, then write it")
+    parser.add_argument("--fused", action="store_true", help="plan and write in a single model call")
+    parser.add_argument("--benchmark", type=int, metavar="RUNS", help="compare staged and fused pipelines")
+    args = parser.parse_args()
 
-    plan_chain, full_chain = setup_planning_chain()
+    print("--- LangChain Planning Writer Example ---")
 
     topic = "How AI agents are transforming software development workflows"
 
+    if args.benchmark:
+        asyncio.run(run_benchmark([topic, "Practical observability for small engineering teams"], args.benchmark))
+        return
+
+    if args.fused:
+        sections = setup_fused_planning_chain().invoke({"topic": topic})
+        print("\n=== PLAN ===")
+        print(sections["PLAN"])
+        print("\n=== ARTICLE ===")
+        print(sections["ARTICLE"])
+        return
+
+    plan_chain, full_chain = setup_planning_chain()
+
     # Show the plan first
     print("\n=== PLAN ===")
     plan = plan_chain.invoke({"topic": topic})
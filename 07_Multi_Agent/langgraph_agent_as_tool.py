@@ -11,15 +11,15 @@ from typing import TypedDict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import create_react_agent
 
-load_dotenv()
+load_env()
 
 
 # --- Sub-agent: Image Description Generator (simulated) ---
@@ -28,18 +28,18 @@ class ImageGenState(TypedDict):
     description: str
 
 
+GENERATE_IMAGE_DESCRIPTION_CHAIN = llm_chain([
+    ("system",
+     "You are an image generation AI. Given a prompt, describe in vivid detail "
+     "what the generated image would look like. Include colors, composition, "
+     "lighting, and style."),
+    ("user", "{prompt}")
+], temperature=0.7)
+
+
 def generate_image_description(state: ImageGenState) -> dict:
     """Generates a detailed image description from a prompt."""
-    llm = get_llm(temperature=0.7)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are an image generation AI. Given a prompt, describe in vivid detail "
-         "what the generated image would look like. Include colors, composition, "
-         "lighting, and style."),
-        ("user", "{prompt}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    description = chain.invoke({"prompt": state["prompt"]})
+    description = GENERATE_IMAGE_DESCRIPTION_CHAIN.invoke({"prompt": state["prompt"]})
     return {"description": description}
 
 
@@ -66,6 +66,7 @@ def generate_image(prompt: str) -> str:
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Agent-as-Tool Example ---")
 
     llm = get_llm(temperature=0)
@@ -78,7 +79,7 @@ def main():
 
     for query in queries:
         print(f"\nUser: {query}")
-        result = parent_agent.invoke({"messages": [{"role": "user", "content": query}]})
+        result = run_graph(parent_agent, {"messages": [{"role": "user", "content": query}]}, stream=stream)
         final_message = result["messages"][-1]
         print(f"Artist: {final_message.content[:400]}")
 
@@ -12,13 +12,12 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class CoordinatorState(TypedDict):
@@ -27,37 +26,45 @@ class CoordinatorState(TypedDict):
     response: str
 
 
+COORDINATOR_CHAIN = llm_chain([
+    ("system",
+     "Classify the user's message:\n"
+     "- If it's a greeting (hello, hi, hey, good morning, etc.), output 'greeter'.\n"
+     "- If it's a task or question, output 'task_executor'.\n"
+     "ONLY output one word: 'greeter' or 'task_executor'."),
+    ("user", "{request}")
+], temperature=0)
+
+
 def coordinator(state: CoordinatorState) -> dict:
     """Classifies the request and decides routing."""
     print("--- NODE: coordinator ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Classify the user's message:\n"
-         "- If it's a greeting (hello, hi, hey, good morning, etc.), output 'greeter'.\n"
-         "- If it's a task or question, output 'task_executor'.\n"
-         "ONLY output one word: 'greeter' or 'task_executor'."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    route = chain.invoke({"request": state["request"]}).strip().lower()
+    route = COORDINATOR_CHAIN.invoke({"request": state["request"]}).strip().lower()
     print(f"  Route: {route}")
     return {"route": route}
 
 
+GREETER_CHAIN = llm_chain([
+    ("system", "You are a friendly assistant. Respond warmly to the greeting."),
+    ("user", "{request}")
+], temperature=0.7)
+
+
 def greeter(state: CoordinatorState) -> dict:
     """Handles greeting messages with a friendly response."""
     print("--- NODE: greeter ---")
-    llm = get_llm(temperature=0.7)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a friendly assistant. Respond warmly to the greeting."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    response = chain.invoke({"request": state["request"]})
+    response = GREETER_CHAIN.invoke({"request": state["request"]})
     return {"response": response}
 
 
+TASK_EXECUTOR_CHAIN = llm_chain([
+    ("system",
+     "You are a task execution agent. The task has been classified as {complexity}. "
+     "Provide a clear, actionable response."),
+    ("user", "{request}")
+], temperature=0)
+
+
 def task_executor(state: CoordinatorState) -> dict:
     """Handles task requests with custom logic + LLM processing."""
     print("--- NODE: task_executor ---")
@@ -67,15 +74,7 @@ def task_executor(state: CoordinatorState) -> dict:
     complexity = "complex" if word_count > 10 else "simple"
     print(f"  Task complexity: {complexity} ({word_count} words)")
 
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a task execution agent. The task has been classified as {complexity}. "
-         "Provide a clear, actionable response."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    response = chain.invoke({"request": request, "complexity": complexity})
+    response = TASK_EXECUTOR_CHAIN.invoke({"request": request, "complexity": complexity})
     return {"response": response}
 
 
@@ -103,6 +102,7 @@ def build_coordinator_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Coordinator Example ---")
     graph = build_coordinator_graph()
 
@@ -114,7 +114,7 @@ def main():
 
     for req in requests:
         print(f"\nUser: {req}")
-        result = graph.invoke({"request": req})
+        result = run_graph(graph, {"request": req}, stream=stream)
         print(f"Response: {result['response'][:300]}")
 
 
@@ -11,13 +11,12 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 MAX_ITERATIONS = 3
 
@@ -29,32 +28,39 @@ class LoopState(TypedDict):
     status: str
 
 
+WRITE_CHAIN = llm_chain([
+    ("system", "You are a writer. Write a brief paragraph on the given topic."),
+    ("user", "{task}")
+], temperature=0.7)
+
+IMPROVE_CHAIN = llm_chain([
+    ("system",
+     "You are a writer. Improve the following draft. Make it more concise, "
+     "clear, and impactful. Only output the improved version.\n\n"
+     "Current draft:\n{current_draft}"),
+    ("user", "Improve this text about: {task}")
+], temperature=0.7)
+
+
 def processing_step(state: LoopState) -> dict:
     """Processes or refines the task output."""
     iteration = state.get("iteration", 0) + 1
     print(f"--- NODE: processing_step (iteration {iteration}) ---")
 
-    llm = get_llm(temperature=0.7)
-
-    if state.get("current_draft"):
-        prompt = ChatPromptTemplate.from_messages([
-            ("system",
-             "You are a writer. Improve the following draft. Make it more concise, "
-             "clear, and impactful. Only output the improved version.\n\n"
-             "Current draft:\n{current_draft}"),
-            ("user", "Improve this text about: {task}")
-        ])
-    else:
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a writer. Write a brief paragraph on the given topic."),
-            ("user", "{task}")
-        ])
-
-    chain = prompt | llm | StrOutputParser()
+    chain = IMPROVE_CHAIN if state.get("current_draft") else WRITE_CHAIN
     draft = chain.invoke({"task": state["task"], "current_draft": state.get("current_draft", "")})
     return {"current_draft": draft, "iteration": iteration}
 
 
+CONDITION_CHECKER_CHAIN = llm_chain([
+    ("system",
+     "Evaluate if the following text is high quality (clear, concise, informative). "
+     "Output ONLY 'yes' if it meets all criteria, or 'no' if it needs improvement.\n\n"
+     "Text:\n{current_draft}"),
+    ("user", "Is this text good enough?")
+], temperature=0)
+
+
 def condition_checker(state: LoopState) -> dict:
     """Evaluates draft quality and decides whether it's complete."""
     print(f"--- NODE: condition_checker (iteration {state['iteration']}) ---")
@@ -63,16 +69,7 @@ def condition_checker(state: LoopState) -> dict:
         print("  Max iterations reached. Marking complete.")
         return {"status": "completed"}
 
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Evaluate if the following text is high quality (clear, concise, informative). "
-         "Output ONLY 'yes' if it meets all criteria, or 'no' if it needs improvement.\n\n"
-         "Text:\n{current_draft}"),
-        ("user", "Is this text good enough?")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"current_draft": state["current_draft"]}).strip().lower()
+    result = CONDITION_CHECKER_CHAIN.invoke({"current_draft": state["current_draft"]}).strip().lower()
 
     if "yes" in result:
         print("  Quality check passed. Marking complete.")
@@ -101,15 +98,16 @@ def build_loop_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Loop Agent Example ---")
     graph = build_loop_graph()
 
-    result = graph.invoke({
+    result = run_graph(graph, {
         "task": "Explain how neural networks learn through backpropagation",
         "current_draft": "",
         "iteration": 0,
         "status": "in_progress",
-    })
+    }, stream=stream)
 
     print(f"\n=== FINAL (after {result['iteration']} iterations) ===")
     print(result["current_draft"])
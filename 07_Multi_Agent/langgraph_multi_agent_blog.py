@@ -11,13 +11,12 @@ from typing import TypedDict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class BlogState(TypedDict):
@@ -26,39 +25,39 @@ class BlogState(TypedDict):
     blog_post: str
 
 
+RESEARCHER_CHAIN = llm_chain([
+    ("system",
+     "You are a thorough researcher. Investigate the given topic and provide:\n"
+     "1. Key facts and statistics\n"
+     "2. Current trends\n"
+     "3. Expert opinions or notable viewpoints\n"
+     "4. Potential impact and future outlook\n"
+     "Be specific and factual."),
+    ("user", "Research: {topic}")
+], temperature=0)
+
+
 def researcher(state: BlogState) -> dict:
     """Research agent: gathers information and key points about the topic."""
     print("--- NODE: researcher ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a thorough researcher. Investigate the given topic and provide:\n"
-         "1. Key facts and statistics\n"
-         "2. Current trends\n"
-         "3. Expert opinions or notable viewpoints\n"
-         "4. Potential impact and future outlook\n"
-         "Be specific and factual."),
-        ("user", "Research: {topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    research = chain.invoke({"topic": state["topic"]})
+    research = RESEARCHER_CHAIN.invoke({"topic": state["topic"]})
     return {"research": research}
 
 
+WRITER_CHAIN = llm_chain([
+    ("system",
+     "You are a skilled blog writer. Write an engaging blog post based on the "
+     "following research. Include a catchy title, introduction, body sections, "
+     "and conclusion. Make it informative but accessible.\n\n"
+     "Research findings:\n{research}"),
+    ("user", "Write a blog post about: {topic}")
+], temperature=0.7)
+
+
 def writer(state: BlogState) -> dict:
     """Writer agent: creates a blog post based on the research findings."""
     print("--- NODE: writer ---")
-    llm = get_llm(temperature=0.7)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a skilled blog writer. Write an engaging blog post based on the "
-         "following research. Include a catchy title, introduction, body sections, "
-         "and conclusion. Make it informative but accessible.\n\n"
-         "Research findings:\n{research}"),
-        ("user", "Write a blog post about: {topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    blog = chain.invoke({"topic": state["topic"], "research": state["research"]})
+    blog = WRITER_CHAIN.invoke({"topic": state["topic"], "research": state["research"]})
     return {"blog_post": blog}
 
 
@@ -73,10 +72,11 @@ def build_blog_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Multi-Agent Blog Example ---")
     graph = build_blog_graph()
 
-    result = graph.invoke({"topic": "The rise of AI coding assistants and their impact on developers"})
+    result = run_graph(graph, {"topic": "The rise of AI coding assistants and their impact on developers"}, stream=stream)
 
     print("\n=== RESEARCH ===")
     print(result["research"][:500])
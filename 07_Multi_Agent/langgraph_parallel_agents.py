@@ -3,61 +3,79 @@ Parallel Agents Pattern using LangGraph.
 
 Demonstrates two agents (weather + news) running in parallel branches,
 with their outputs merged into shared state.
+
+With --async the agents are async nodes run on the event loop
+(ainvoke/astream); --max-concurrency caps the branches running at once.
 """
 
-import operator
+import argparse
+import asyncio
 import sys
 from pathlib import Path
-from typing import TypedDict, Annotated, List
+from typing import TypedDict, Annotated
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.aggregate import Rope, concat
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import arun_graph, run_graph
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class ParallelState(TypedDict):
     city: str
-    results: Annotated[List[str], operator.add]
+    results: Annotated[Rope, concat]
+
+
+WEATHER_AGENT_CHAIN = llm_chain([
+    ("system", "You are a weather service. Provide a brief current weather report "
+               "for the given city (make a realistic forecast)."),
+    ("user", "Weather for: {city}")
+], temperature=0)
 
 
 def weather_agent(state: ParallelState) -> dict:
     """Fetches simulated weather information for the city."""
     print("--- NODE: weather_agent ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a weather service. Provide a brief current weather report "
-                   "for the given city (make a realistic forecast)."),
-        ("user", "Weather for: {city}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    weather = chain.invoke({"city": state["city"]})
+    weather = WEATHER_AGENT_CHAIN.invoke({"city": state["city"]})
+    return {"results": [f"[WEATHER] {weather}"]}
+
+
+async def aweather_agent(state: ParallelState) -> dict:
+    """Async variant of weather_agent."""
+    print("--- NODE: weather_agent ---")
+    weather = await WEATHER_AGENT_CHAIN.ainvoke({"city": state["city"]})
     return {"results": [f"[WEATHER] {weather}"]}
 
 
+NEWS_AGENT_CHAIN = llm_chain([
+    ("system", "You are a news service. Provide 3 brief recent headline-style news "
+               "items relevant to the given city."),
+    ("user", "News for: {city}")
+], temperature=0)
+
+
 def news_agent(state: ParallelState) -> dict:
     """Fetches simulated news headlines for the city."""
     print("--- NODE: news_agent ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a news service. Provide 3 brief recent headline-style news "
-                   "items relevant to the given city."),
-        ("user", "News for: {city}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    news = chain.invoke({"city": state["city"]})
+    news = NEWS_AGENT_CHAIN.invoke({"city": state["city"]})
+    return {"results": [f"[NEWS] {news}"]}
+
+
+async def anews_agent(state: ParallelState) -> dict:
+    """Async variant of news_agent."""
+    print("--- NODE: news_agent ---")
+    news = await NEWS_AGENT_CHAIN.ainvoke({"city": state["city"]})
     return {"results": [f"[NEWS] {news}"]}
 
 
-def build_parallel_graph():
+def build_parallel_graph(use_async=False):
     builder = StateGraph(ParallelState)
-    builder.add_node("weather_agent", weather_agent)
-    builder.add_node("news_agent", news_agent)
+    builder.add_node("weather_agent", aweather_agent if use_async else weather_agent)
+    builder.add_node("news_agent", anews_agent if use_async else news_agent)
 
     # Fan-out: both agents start from START
     builder.add_edge(START, "weather_agent")
@@ -70,10 +88,28 @@ def build_parallel_graph():
     return builder.compile()
 
 
+async def arun_agents(city, graph=None, max_concurrency=None, stream=False):
+    """Async entry point: runs both agents with ainvoke (or astream with
+    stream=True); max_concurrency caps the branches running at once."""
+    graph = graph or build_parallel_graph(use_async=True)
+    config = {"max_concurrency": max_concurrency} if max_concurrency else None
+    return await arun_graph(graph, {"city": city, "results": []}, config, stream=stream)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Parallel agents with LangGraph")
+    parser.add_argument("--stream", action="store_true", help="print tokens as they are generated")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use async nodes and ainvoke")
+    parser.add_argument("--max-concurrency", type=int, help="maximum branches running at once")
+    args = parser.parse_args()
+
     print("--- LangGraph Parallel Agents Example ---")
-    graph = build_parallel_graph()
-    result = graph.invoke({"city": "Tokyo", "results": []})
+    if args.use_async:
+        result = asyncio.run(arun_agents("Tokyo", max_concurrency=args.max_concurrency, stream=args.stream))
+    else:
+        graph = build_parallel_graph()
+        config = {"max_concurrency": args.max_concurrency} if args.max_concurrency else None
+        result = run_graph(graph, {"city": "Tokyo", "results": []}, config, stream=args.stream)
 
     for item in result["results"]:
         print(f"\n{item[:300]}")
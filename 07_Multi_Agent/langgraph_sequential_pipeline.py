@@ -11,13 +11,12 @@ from typing import TypedDict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class PipelineState(TypedDict):
@@ -26,35 +25,35 @@ class PipelineState(TypedDict):
     analysis: str
 
 
+FETCH_DATA_CHAIN = llm_chain([
+    ("system", "You are a data gathering agent. Provide a factual summary of key "
+               "data points about the given topic. Be specific with numbers and facts."),
+    ("user", "Gather data about: {topic}")
+], temperature=0)
+
+
 def fetch_data(state: PipelineState) -> dict:
     """Step 1: Fetches raw information about the topic."""
     print("--- NODE: fetch_data ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a data gathering agent. Provide a factual summary of key "
-                   "data points about the given topic. Be specific with numbers and facts."),
-        ("user", "Gather data about: {topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    data = chain.invoke({"topic": state["topic"]})
+    data = FETCH_DATA_CHAIN.invoke({"topic": state["topic"]})
     return {"raw_data": data}
 
 
+PROCESS_DATA_CHAIN = llm_chain([
+    ("system",
+     "You are a data analyst. Analyze the following raw data and provide:\n"
+     "1. Key trends identified\n"
+     "2. Notable patterns\n"
+     "3. Brief conclusions\n\n"
+     "Raw data:\n{raw_data}"),
+    ("user", "Analyze the data about: {topic}")
+], temperature=0)
+
+
 def process_data(state: PipelineState) -> dict:
     """Step 2: Analyzes the raw data from step 1."""
     print("--- NODE: process_data ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a data analyst. Analyze the following raw data and provide:\n"
-         "1. Key trends identified\n"
-         "2. Notable patterns\n"
-         "3. Brief conclusions\n\n"
-         "Raw data:\n{raw_data}"),
-        ("user", "Analyze the data about: {topic}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    analysis = chain.invoke({"topic": state["topic"], "raw_data": state["raw_data"]})
+    analysis = PROCESS_DATA_CHAIN.invoke({"topic": state["topic"], "raw_data": state["raw_data"]})
     return {"analysis": analysis}
 
 
@@ -69,9 +68,10 @@ def build_sequential_pipeline():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Sequential Pipeline Example ---")
     graph = build_sequential_pipeline()
-    result = graph.invoke({"topic": "Global electric vehicle adoption in 2025"})
+    result = run_graph(graph, {"topic": "Global electric vehicle adoption in 2025"}, stream=stream)
 
     print("\n=== RAW DATA ===")
     print(result["raw_data"][:500])
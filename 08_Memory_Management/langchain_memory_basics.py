@@ -3,7 +3,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
 
 try:
@@ -19,7 +19,7 @@ except ImportError:
     print("Error: Required LangChain components not found.")
     ChatMessageHistory = ConversationBufferMemory = LLMChain = None
 
-load_dotenv()
+load_env()
 
 def demo_langchain_memory():
     if not all([ChatMessageHistory, ConversationBufferMemory, LLMChain]):
@@ -12,13 +12,14 @@ from typing import TypedDict, Annotated
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
+from shared.streaming import run_graph, stream_requested
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
-load_dotenv()
+load_env()
 
 
 class ConversationState(TypedDict):
@@ -46,6 +47,7 @@ def build_persistent_chat():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Memory Persistence Example ---")
     graph = build_persistent_chat()
 
@@ -54,26 +56,32 @@ def main():
 
     # Turn 1
     print("\n=== Turn 1 ===")
-    result = graph.invoke(
+    result = run_graph(
+        graph,
         {"messages": [HumanMessage(content="Hi! My name is Charlie and I'm a CTO.")]},
-        config
+        config,
+        stream=stream,
     )
     print(f"AI: {result['messages'][-1].content[:300]}")
 
     # Turn 2 — the model remembers Turn 1 via checkpointed state
     print("\n=== Turn 2 ===")
-    result = graph.invoke(
+    result = run_graph(
+        graph,
         {"messages": [HumanMessage(content="What's my name and role?")]},
-        config
+        config,
+        stream=stream,
     )
     print(f"AI: {result['messages'][-1].content[:300]}")
 
     # Turn 3 — different thread = fresh session
     print("\n=== Turn 3 (different session) ===")
     config2 = {"configurable": {"thread_id": "session-002"}}
-    result = graph.invoke(
+    result = run_graph(
+        graph,
         {"messages": [HumanMessage(content="Do you know my name?")]},
-        config2
+        config2,
+        stream=stream,
     )
     print(f"AI: {result['messages'][-1].content[:300]}")
 
@@ -12,13 +12,12 @@ from typing import TypedDict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class AppState(TypedDict):
@@ -43,21 +42,21 @@ def login_tracker(state: AppState) -> dict:
     }
 
 
+GREETER_CHAIN = llm_chain([
+    ("system",
+     "Generate a brief, personalized greeting for a user. Context:\n"
+     "- Name: {user_name}\n"
+     "- Visit number: {login_count}\n"
+     "- Last login: {last_login}\n"
+     "Be warm but concise."),
+    ("user", "Greet me!")
+], temperature=0.7)
+
+
 def greeter(state: AppState) -> dict:
     """Generates a personalized greeting based on login state."""
     print("--- NODE: greeter ---")
-    llm = get_llm(temperature=0.7)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Generate a brief, personalized greeting for a user. Context:\n"
-         "- Name: {user_name}\n"
-         "- Visit number: {login_count}\n"
-         "- Last login: {last_login}\n"
-         "Be warm but concise."),
-        ("user", "Greet me!")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    greeting = chain.invoke({
+    greeting = GREETER_CHAIN.invoke({
         "user_name": state["user_name"],
         "login_count": state["login_count"],
         "last_login": state["last_login"],
@@ -94,17 +93,18 @@ def build_state_management_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph State Management Example ---")
     graph = build_state_management_graph()
 
-    result = graph.invoke({
+    result = run_graph(graph, {
         "user_name": "Charlie",
         "login_count": 41,
         "last_login": "2025-01-15T10:30:00Z",
         "task_status": "offline",
         "greeting": "",
         "summary": "",
-    })
+    }, stream=stream)
 
     print(f"\n=== GREETING ===")
     print(result["greeting"])
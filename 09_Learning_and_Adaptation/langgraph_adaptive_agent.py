@@ -11,13 +11,12 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 MAX_ADAPTATIONS = 3
 
@@ -31,13 +30,19 @@ class AdaptiveState(TypedDict):
     strategy: str
 
 
+# The system message depends on the current strategy and feedback, so it is
+# passed in as a variable rather than baked into the template.
+PERFORMER_CHAIN = llm_chain([
+    ("system", "{system_msg}"),
+    ("user", "{task}")
+], temperature=0.7)
+
+
 def performer(state: AdaptiveState) -> dict:
     """Generates output based on the current strategy and any feedback."""
     iteration = state.get("iteration", 0) + 1
     print(f"--- NODE: performer (iteration {iteration}) ---")
 
-    llm = get_llm(temperature=0.7)
-
     strategy = state.get("strategy", "default")
     feedback = state.get("feedback", "")
 
@@ -48,31 +53,26 @@ def performer(state: AdaptiveState) -> dict:
     if feedback:
         system_msg += f"\n\nPrevious feedback to incorporate:\n{feedback}"
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_msg),
-        ("user", "{task}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    output = chain.invoke({"task": state["task"]})
+    output = PERFORMER_CHAIN.invoke({"system_msg": system_msg, "task": state["task"]})
     return {"output": output, "iteration": iteration}
 
 
+EVALUATOR_CHAIN = llm_chain([
+    ("system",
+     "Evaluate the following output on a scale of 1-10 for quality, accuracy, "
+     "and completeness. Output EXACTLY in this format:\n"
+     "SCORE: <number>\n"
+     "FEEDBACK: <specific improvement suggestions>\n"
+     "STRATEGY: <recommended approach for next attempt>"),
+    ("user", "Task: {task}\n\nOutput to evaluate:\n{output}")
+], temperature=0)
+
+
 def evaluator(state: AdaptiveState) -> dict:
     """Evaluates the output quality and provides improvement feedback."""
     print(f"--- NODE: evaluator (iteration {state['iteration']}) ---")
 
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Evaluate the following output on a scale of 1-10 for quality, accuracy, "
-         "and completeness. Output EXACTLY in this format:\n"
-         "SCORE: <number>\n"
-         "FEEDBACK: <specific improvement suggestions>\n"
-         "STRATEGY: <recommended approach for next attempt>"),
-        ("user", "Task: {task}\n\nOutput to evaluate:\n{output}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    evaluation = chain.invoke({"task": state["task"], "output": state["output"]})
+    evaluation = EVALUATOR_CHAIN.invoke({"task": state["task"], "output": state["output"]})
 
     # Parse score from evaluation
     score = 5.0
@@ -118,17 +118,18 @@ def build_adaptive_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Adaptive Agent Example ---")
     graph = build_adaptive_graph()
 
-    result = graph.invoke({
+    result = run_graph(graph, {
         "task": "Write a haiku about machine learning that is technically accurate and poetic.",
         "output": "",
         "score": 0.0,
         "feedback": "",
         "iteration": 0,
         "strategy": "default",
-    })
+    }, stream=stream)
 
     print(f"\n=== FINAL OUTPUT (score: {result['score']}/10, iterations: {result['iteration']}) ===")
     print(result["output"])
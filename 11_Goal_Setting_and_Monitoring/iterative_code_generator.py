@@ -6,10 +6,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv, find_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
 
-_ = load_dotenv(find_dotenv())
+load_env()
 
 def generate_prompt(use_case: str, goals: list[str], previous_code: str = "", feedback: str = "") -> str:
     """
@@ -11,13 +11,12 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class FallbackState(TypedDict):
@@ -45,18 +44,18 @@ def primary_handler(state: FallbackState) -> dict:
     return {"primary_failed": True, "location_result": ""}
 
 
+FALLBACK_HANDLER_CHAIN = llm_chain([
+    ("system",
+     "The precise location service is unavailable for this query. "
+     "Provide general information about the location from your knowledge."),
+    ("user", "{query}")
+], temperature=0)
+
+
 def fallback_handler(state: FallbackState) -> dict:
     """Provides a general response when the primary handler fails."""
     print("--- NODE: fallback_handler ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "The precise location service is unavailable for this query. "
-         "Provide general information about the location from your knowledge."),
-        ("user", "{query}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"query": state["query"]})
+    result = FALLBACK_HANDLER_CHAIN.invoke({"query": state["query"]})
     return {"location_result": result}
 
 
@@ -93,6 +92,7 @@ def build_fallback_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Fallback Agent Example ---")
     graph = build_fallback_graph()
 
@@ -104,7 +104,7 @@ def main():
 
     for query in queries:
         print(f"\nQuery: {query}")
-        result = graph.invoke({"query": query, "primary_failed": False})
+        result = run_graph(graph, {"query": query, "primary_failed": False}, stream=stream)
         print(result["response"][:300])
 
 
@@ -11,14 +11,13 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
-load_dotenv()
+load_env()
 
 
 class SupportState(TypedDict):
@@ -31,25 +30,25 @@ class SupportState(TypedDict):
     resolution: str
 
 
+PERSONALIZE_AND_DIAGNOSE_CHAIN = llm_chain([
+    ("system",
+     "You are a support agent. The customer context is:\n"
+     "- Name: {customer_name}\n"
+     "- Tier: {customer_tier}\n\n"
+     "Diagnose the issue and determine if it needs human escalation.\n"
+     "If the issue is complex, sensitive, or the customer is frustrated, "
+     "recommend escalation.\n\n"
+     "Output format:\n"
+     "DIAGNOSIS: <your diagnosis>\n"
+     "ESCALATE: <yes or no>"),
+    ("user", "Customer issue: {issue}")
+], temperature=0)
+
+
 def personalize_and_diagnose(state: SupportState) -> dict:
     """Troubleshoots the issue using customer context from state."""
     print("--- NODE: personalize_and_diagnose ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a support agent. The customer context is:\n"
-         "- Name: {customer_name}\n"
-         "- Tier: {customer_tier}\n\n"
-         "Diagnose the issue and determine if it needs human escalation.\n"
-         "If the issue is complex, sensitive, or the customer is frustrated, "
-         "recommend escalation.\n\n"
-         "Output format:\n"
-         "DIAGNOSIS: <your diagnosis>\n"
-         "ESCALATE: <yes or no>"),
-        ("user", "Customer issue: {issue}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({
+    result = PERSONALIZE_AND_DIAGNOSE_CHAIN.invoke({
         "customer_name": state["customer_name"],
         "customer_tier": state["customer_tier"],
         "issue": state["issue"],
@@ -73,19 +72,19 @@ def request_human_approval(state: SupportState) -> dict:
     return {"human_approved": True}
 
 
+RESOLVE_DIRECTLY_CHAIN = llm_chain([
+    ("system",
+     "You are a support agent. Provide a friendly resolution to the customer. "
+     "Address them by name: {customer_name}. Their tier: {customer_tier}.\n"
+     "Diagnosis: {diagnosis}"),
+    ("user", "Resolve: {issue}")
+], temperature=0)
+
+
 def resolve_directly(state: SupportState) -> dict:
     """Resolves the issue directly without human intervention."""
     print("--- NODE: resolve_directly ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a support agent. Provide a friendly resolution to the customer. "
-         "Address them by name: {customer_name}. Their tier: {customer_tier}.\n"
-         "Diagnosis: {diagnosis}"),
-        ("user", "Resolve: {issue}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    resolution = chain.invoke({
+    resolution = RESOLVE_DIRECTLY_CHAIN.invoke({
         "customer_name": state["customer_name"],
         "customer_tier": state["customer_tier"],
         "diagnosis": state["diagnosis"],
@@ -134,30 +133,31 @@ def build_support_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Human-in-the-Loop Example ---")
     graph = build_support_graph()
 
     # Case 1: Simple issue — resolved directly
     print("\n=== Case 1: Simple Issue ===")
-    result = graph.invoke({
+    result = run_graph(graph, {
         "customer_name": "Alice",
         "customer_tier": "Standard",
         "issue": "I forgot my password and need to reset it.",
         "needs_escalation": False,
         "human_approved": False,
-    }, {"configurable": {"thread_id": "case-1"}})
+    }, {"configurable": {"thread_id": "case-1"}}, stream=stream)
     print(f"Resolution: {result['resolution'][:300]}")
 
     # Case 2: Complex issue — needs escalation
     print("\n=== Case 2: Complex Issue (Escalation) ===")
-    result = graph.invoke({
+    result = run_graph(graph, {
         "customer_name": "Bob",
         "customer_tier": "Enterprise",
         "issue": "I've been charged incorrectly for 3 months and I'm extremely frustrated. "
                  "Your billing system has a serious bug and I want a full refund.",
         "needs_escalation": False,
         "human_approved": False,
-    }, {"configurable": {"thread_id": "case-2"}})
+    }, {"configurable": {"thread_id": "case-2"}}, stream=stream)
     print(f"Resolution: {result['resolution'][:300]}")
 
 
@@ -6,8 +6,9 @@ from typing import List, TypedDict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
+from shared.streaming import run_graph, stream_requested
 
 try:
     from langchain_community.document_loaders import TextLoader
@@ -24,7 +25,7 @@ except ImportError:
     print("Error: Required LangChain/LangGraph/Weaviate components not found.")
     TextLoader = Document = ChatPromptTemplate = StrOutputParser = GoogleGenerativeAIEmbeddings = CharacterTextSplitter = StateGraph = END = weaviate = EmbeddedOptions = None
 
-load_dotenv()
+load_env()
 
 # --- 1. Data Preparation ---
 def prepare_vectorstore():
@@ -71,27 +72,28 @@ def retrieve_documents(state: RAGGraphState, retriever) -> RAGGraphState:
     docs = retriever.invoke(state["question"])
     return {"documents": docs, "question": state["question"], "generation": ""}
 
-def generate_response(state: RAGGraphState, llm) -> RAGGraphState:
-    print("--- GENERATING ---")
-    template = """You are an assistant for question-answering tasks.
+RAG_TEMPLATE = """You are an assistant for question-answering tasks.
     Use the following pieces of retrieved context to answer the question.
     Question: {question}
     Context: {context}
     Answer:
     """
-    prompt = ChatPromptTemplate.from_template(template)
+
+def generate_response(state: RAGGraphState, rag_chain) -> RAGGraphState:
+    print("--- GENERATING ---")
     context = "\n\n".join([doc.page_content for doc in state["documents"]])
-    
-    rag_chain = prompt | llm | StrOutputParser()
     generation = rag_chain.invoke({"context": context, "question": state["question"]})
     return {"question": state["question"], "documents": state["documents"], "generation": generation}
 
 def build_rag_graph(retriever, llm):
     workflow = StateGraph(RAGGraphState)
-    
-    # Use lambda to pass the retriever/llm to nodes
+
+    # The generation chain is composed once here and reused by every run
+    rag_chain = ChatPromptTemplate.from_template(RAG_TEMPLATE) | llm | StrOutputParser()
+
+    # Use lambda to pass the retriever/chain to nodes
     workflow.add_node("retrieve", lambda state: retrieve_documents(state, retriever))
-    workflow.add_node("generate", lambda state: generate_response(state, llm))
+    workflow.add_node("generate", lambda state: generate_response(state, rag_chain))
     
     workflow.set_entry_point("retrieve")
     workflow.add_edge("retrieve", "generate")
@@ -100,6 +102,7 @@ def build_rag_graph(retriever, llm):
     return workflow.compile()
 
 def setup_and_run_rag():
+    stream = stream_requested()
     if not all([TextLoader, StateGraph]):
         return
 
@@ -113,7 +116,7 @@ def setup_and_run_rag():
 
     query = "What did the president say about Justice Breyer"
     print(f"\nQuery: {query}")
-    result = app.invoke({"question": query})
+    result = run_graph(app, {"question": query}, stream=stream)
     print(f"\nFinal Response:\n{result['generation']}")
 
 if __name__ == "__main__":
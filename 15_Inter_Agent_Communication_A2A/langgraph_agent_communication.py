@@ -12,13 +12,12 @@ from typing import TypedDict, List
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 # --- Sub-graph 1: Calendar Agent ---
@@ -27,15 +26,15 @@ class CalendarState(TypedDict):
     calendar_response: str
 
 
+CALENDAR_HANDLER_CHAIN = llm_chain([
+    ("system", "You are a calendar management assistant. Handle scheduling requests. "
+               "Respond with what actions you would take (create/modify/check events)."),
+    ("user", "{request}")
+], temperature=0)
+
+
 def calendar_handler(state: CalendarState) -> dict:
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a calendar management assistant. Handle scheduling requests. "
-                   "Respond with what actions you would take (create/modify/check events)."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    return {"calendar_response": chain.invoke({"request": state["request"]})}
+    return {"calendar_response": CALENDAR_HANDLER_CHAIN.invoke({"request": state["request"]})}
 
 
 def build_calendar_subgraph():
@@ -52,15 +51,15 @@ class TaskState(TypedDict):
     task_response: str
 
 
+TASK_HANDLER_CHAIN = llm_chain([
+    ("system", "You are a task management assistant. Handle task creation, "
+               "prioritization, and status tracking requests."),
+    ("user", "{request}")
+], temperature=0)
+
+
 def task_handler(state: TaskState) -> dict:
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a task management assistant. Handle task creation, "
-                   "prioritization, and status tracking requests."),
-        ("user", "{request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    return {"task_response": chain.invoke({"request": state["request"]})}
+    return {"task_response": TASK_HANDLER_CHAIN.invoke({"request": state["request"]})}
 
 
 def build_task_subgraph():
@@ -97,20 +96,20 @@ def dispatch_to_tasks(state: CoordinatorState) -> dict:
     return {"task_result": result["task_response"]}
 
 
+SYNTHESIZE_RESPONSES_CHAIN = llm_chain([
+    ("system",
+     "You are a coordinator. Synthesize the following agent responses into a "
+     "unified, actionable answer for the user.\n\n"
+     "Calendar Agent said:\n{calendar_result}\n\n"
+     "Task Manager said:\n{task_result}"),
+    ("user", "Original request: {user_request}")
+], temperature=0)
+
+
 def synthesize_responses(state: CoordinatorState) -> dict:
     """Combines responses from both sub-agents into a final answer."""
     print("--- NODE: synthesize_responses ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a coordinator. Synthesize the following agent responses into a "
-         "unified, actionable answer for the user.\n\n"
-         "Calendar Agent said:\n{calendar_result}\n\n"
-         "Task Manager said:\n{task_result}"),
-        ("user", "Original request: {user_request}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    final = chain.invoke({
+    final = SYNTHESIZE_RESPONSES_CHAIN.invoke({
         "calendar_result": state["calendar_result"],
         "task_result": state["task_result"],
         "user_request": state["user_request"],
@@ -139,16 +138,17 @@ def build_coordinator_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Inter-Agent Communication Example ---")
     graph = build_coordinator_graph()
 
-    result = graph.invoke({
+    result = run_graph(graph, {
         "user_request": "I have a project deadline next Friday. Schedule a 2-hour focus block "
                         "each day this week and create tasks for the deliverables.",
         "calendar_result": "",
         "task_result": "",
         "final_response": "",
-    })
+    }, stream=stream)
 
     print("\n=== CALENDAR AGENT ===")
     print(result["calendar_result"][:300])
@@ -11,13 +11,12 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class ResourceState(TypedDict):
@@ -37,31 +36,31 @@ def analyze_complexity(state: ResourceState) -> dict:
     return {"complexity": complexity, "word_count": word_count}
 
 
+FAST_MODEL_HANDLER_CHAIN = llm_chain([
+    ("system", "You are a concise assistant. Answer briefly and directly."),
+    ("user", "{query}")
+], temperature=0, max_output_tokens=256)
+
+
 def fast_model_handler(state: ResourceState) -> dict:
     """Handles simple queries with a fast, cost-efficient model configuration."""
     print("--- NODE: fast_model_handler (low temperature, concise) ---")
-    llm = get_llm(temperature=0, max_output_tokens=256)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a concise assistant. Answer briefly and directly."),
-        ("user", "{query}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    response = chain.invoke({"query": state["query"]})
+    response = FAST_MODEL_HANDLER_CHAIN.invoke({"query": state["query"]})
     return {"response": response, "model_used": "gemini-2.5-flash (fast/concise)"}
 
 
+POWERFUL_MODEL_HANDLER_CHAIN = llm_chain([
+    ("system",
+     "You are a thorough assistant. Provide a detailed, well-structured response "
+     "with analysis and reasoning."),
+    ("user", "{query}")
+], temperature=0.3, max_output_tokens=1024)
+
+
 def powerful_model_handler(state: ResourceState) -> dict:
     """Handles complex queries with more processing power."""
     print("--- NODE: powerful_model_handler (higher temperature, detailed) ---")
-    llm = get_llm(temperature=0.3, max_output_tokens=1024)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a thorough assistant. Provide a detailed, well-structured response "
-         "with analysis and reasoning."),
-        ("user", "{query}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    response = chain.invoke({"query": state["query"]})
+    response = POWERFUL_MODEL_HANDLER_CHAIN.invoke({"query": state["query"]})
     return {"response": response, "model_used": "gemini-2.5-flash (powerful/detailed)"}
 
 
@@ -90,6 +89,7 @@ def build_resource_routing_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Resource-Aware Routing Example ---")
     graph = build_resource_routing_graph()
 
@@ -102,7 +102,7 @@ def main():
 
     for query in queries:
         print(f"\nQuery: {query[:80]}...")
-        result = graph.invoke({"query": query})
+        result = run_graph(graph, {"query": query}, stream=stream)
         print(f"Model used: {result['model_used']}")
         print(f"Response: {result['response'][:300]}")
 
@@ -6,10 +6,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from shared.llm import get_llm
 
-load_dotenv()
+load_env()
 
 def classify_prompt(llm, prompt: str) -> str:
     """
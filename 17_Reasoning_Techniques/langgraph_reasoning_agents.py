@@ -12,13 +12,12 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 
 class ReasoningState(TypedDict):
@@ -29,51 +28,51 @@ class ReasoningState(TypedDict):
     final_answer: str
 
 
+CLASSIFY_QUESTION_CHAIN = llm_chain([
+    ("system",
+     "Classify the question type:\n"
+     "- 'search' if it requires factual knowledge or information retrieval\n"
+     "- 'code' if it requires calculation, data processing, or code generation\n"
+     "Output ONLY one word: 'search' or 'code'."),
+    ("user", "{question}")
+], temperature=0)
+
+
 def classify_question(state: ReasoningState) -> dict:
     """Determines whether the question needs search or computation."""
     print("--- NODE: classify_question ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Classify the question type:\n"
-         "- 'search' if it requires factual knowledge or information retrieval\n"
-         "- 'code' if it requires calculation, data processing, or code generation\n"
-         "Output ONLY one word: 'search' or 'code'."),
-        ("user", "{question}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    agent_type = chain.invoke({"question": state["question"]}).strip().lower()
+    agent_type = CLASSIFY_QUESTION_CHAIN.invoke({"question": state["question"]}).strip().lower()
     print(f"  Classified as: {agent_type}")
     return {"agent_type": agent_type}
 
 
+SEARCH_AGENT_CHAIN = llm_chain([
+    ("system",
+     "You are an information retrieval specialist. Provide a factual, "
+     "well-sourced answer to the question. Include specific details."),
+    ("user", "{question}")
+], temperature=0)
+
+
 def search_agent(state: ReasoningState) -> dict:
     """Information retrieval specialist."""
     print("--- NODE: search_agent ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are an information retrieval specialist. Provide a factual, "
-         "well-sourced answer to the question. Include specific details."),
-        ("user", "{question}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"question": state["question"]})
+    result = SEARCH_AGENT_CHAIN.invoke({"question": state["question"]})
     return {"search_result": result}
 
 
+CODE_AGENT_CHAIN = llm_chain([
+    ("system",
+     "You are a computation specialist. Solve the problem step by step. "
+     "Show your reasoning and provide the final answer clearly."),
+    ("user", "{question}")
+], temperature=0)
+
+
 def code_agent(state: ReasoningState) -> dict:
     """Computation and code specialist."""
     print("--- NODE: code_agent ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "You are a computation specialist. Solve the problem step by step. "
-         "Show your reasoning and provide the final answer clearly."),
-        ("user", "{question}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({"question": state["question"]})
+    result = CODE_AGENT_CHAIN.invoke({"question": state["question"]})
     return {"code_result": result}
 
 
@@ -112,6 +111,7 @@ def build_reasoning_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Reasoning Agents Example ---")
     graph = build_reasoning_graph()
 
@@ -122,7 +122,7 @@ def main():
 
     for question in questions:
         print(f"\nQ: {question}")
-        result = graph.invoke({"question": question})
+        result = run_graph(graph, {"question": question}, stream=stream)
         print(f"Agent: {result['agent_type']}")
         print(f"A: {result['final_answer'][:400]}")
 
@@ -11,13 +11,12 @@ from typing import TypedDict, Literal
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
-from shared.llm import get_llm
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from shared.env import load_env
+from shared.nodes import llm_chain
+from shared.streaming import run_graph, stream_requested
 from langgraph.graph import StateGraph, START, END
 
-load_dotenv()
+load_env()
 
 # Simulated session context
 CURRENT_USER_ID = "user_123"
@@ -54,20 +53,20 @@ def validate_parameters(state: ValidationState) -> dict:
     return {"is_valid": True, "validation_error": ""}
 
 
+EXECUTE_TOOL_CHAIN = llm_chain([
+    ("system",
+     "Simulate executing this action and return a realistic response:\n"
+     "Action: {action}\n"
+     "User: {target_user_id}\n"
+     "Params: {params}"),
+    ("user", "Execute the action.")
+], temperature=0)
+
+
 def execute_tool(state: ValidationState) -> dict:
     """Executes the validated tool action."""
     print("--- NODE: execute_tool ---")
-    llm = get_llm(temperature=0)
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Simulate executing this action and return a realistic response:\n"
-         "Action: {action}\n"
-         "User: {target_user_id}\n"
-         "Params: {params}"),
-        ("user", "Execute the action.")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    result = chain.invoke({
+    result = EXECUTE_TOOL_CHAIN.invoke({
         "action": state["action"],
         "target_user_id": state["target_user_id"],
         "params": state["params"],
@@ -106,34 +105,35 @@ def build_validation_graph():
 
 
 def main():
+    stream = stream_requested()
     print("--- LangGraph Tool Validation Example ---")
     graph = build_validation_graph()
 
     # Test 1: Valid request
     print("\n=== Test 1: Valid request ===")
-    result = graph.invoke({
+    result = run_graph(graph, {
         "action": "read_profile",
         "target_user_id": "user_123",
         "params": "include_preferences=true",
-    })
+    }, stream=stream)
     print(f"Result: {result['result'][:300]}")
 
     # Test 2: Unauthorized user access
     print("\n=== Test 2: Unauthorized access ===")
-    result = graph.invoke({
+    result = run_graph(graph, {
         "action": "read_profile",
         "target_user_id": "user_456",
         "params": "",
-    })
+    }, stream=stream)
     print(f"Result: {result['result']}")
 
     # Test 3: Forbidden action
     print("\n=== Test 3: Forbidden action ===")
-    result = graph.invoke({
+    result = run_graph(graph, {
         "action": "delete_account",
         "target_user_id": "user_123",
         "params": "",
-    })
+    }, stream=stream)
     print(f"Result: {result['result']}")
 
 
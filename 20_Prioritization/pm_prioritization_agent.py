@@ -4,7 +4,7 @@ from typing import Optional, Dict
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dotenv import load_dotenv
+from shared.env import load_env
 from pydantic import BaseModel, Field
 from shared.llm import get_llm
 
@@ -17,7 +17,7 @@ except ImportError:
     print("Error: Required LangChain components not found.")
     ChatPromptTemplate = Tool = AgentExecutor = create_react_agent = ConversationBufferMemory = None
 
-load_dotenv()
+load_env()
 
 # --- 1. Task Management System ---
 class Task(BaseModel):
@@ -1,3 +1,4 @@
-from shared.llm import get_llm
+from shared.env import load_env
+from shared.llm import close_all, get_llm
 
-__all__ = ["get_llm"]
+__all__ = ["get_llm", "close_all", "load_env"]
@@ -0,0 +1,200 @@
+"""
+Adaptive (AIMD) concurrency control for LLM providers.
+
+Instead of a fixed in-flight cap, the controller probes the provider's
+current capacity: the limit grows by one after a full window of healthy
+calls (additive increase) and is halved on a 429/5xx or a latency spike
+(multiplicative decrease). It drives the concurrency cap of the shared
+ProviderLimiter, so every node in the process follows the same limit.
+
+    LLM_ADAPTIVE_CONCURRENCY=1         # or GEMINI_ADAPTIVE_CONCURRENCY=1
+    LLM_ADAPTIVE_INITIAL=4
+    LLM_ADAPTIVE_MIN=1
+    LLM_MAX_CONCURRENCY=64             # upper bound (default 64)
+    LLM_ADAPTIVE_LATENCY_TARGET=5.0    # seconds; learned from traffic if unset
+
+Simulate it against the synthetic provider with an injected capacity:
+
+    python -m shared.adaptive --capacity 12 --workers 40 --seconds 10
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+WINDOW = 64
+MIN_SAMPLES = 10
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """True for errors that signal provider overload (429 or 5xx)."""
+    code = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if not isinstance(code, int):
+        response = getattr(error, "response", None)
+        code = getattr(response, "status_code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    text = str(error)
+    return any(marker in text for marker in ("429", "RESOURCE_EXHAUSTED", "503", "UNAVAILABLE"))
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AdaptiveConcurrencyController:
+    """Additive-increase / multiplicative-decrease in-flight limit.
+
+    ``limiter`` is any object with ``set_max_concurrency(int)``; results are
+    reported through ``on_result(latency, error)``.
+    """
+
+    def __init__(
+        self,
+        limiter: Any,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        latency_target: Optional[float] = None,
+        latency_tolerance: float = 2.0,
+        max_error_rate: float = 0.05,
+    ):
+        self.limiter = limiter
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+
+        self._lock = threading.Lock()
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=WINDOW)
+        self._baseline: Optional[float] = latency_target
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._increases = 0
+        self._decreases = 0
+        self._overloads = 0
+        self._spikes = 0
+        limiter.set_max_concurrency(int(self.limit))
+
+    def _latency_p(self, q: float) -> Optional[float]:
+        latencies = [latency for latency, failed in self._samples if not failed]
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return _percentile(latencies, q)
+
+    def _decrease(self, now: float) -> bool:
+        # Calls already in flight were admitted under the old limit; react
+        # at most once per round trip so one burst of 429s halves only once.
+        cooldown = self._latency_p(0.5) or 0.1
+        if now - self._last_decrease < cooldown:
+            return False
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._last_decrease = now
+        self._successes = 0
+        self._decreases += 1
+        return True
+
+    def on_result(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """Feeds one completed call into the controller."""
+        overloaded = error is not None and is_overload_error(error)
+        with self._lock:
+            before = int(self.limit)
+            now = time.monotonic()
+            if error is not None and not overloaded:
+                return  # client errors say nothing about provider capacity
+            self._samples.append((latency, overloaded))
+            if overloaded:
+                self._overloads += 1
+                self._decrease(now)
+            else:
+                p95 = self._latency_p(0.95)
+                if p95 is not None and self._baseline is None:
+                    self._baseline = p95
+                if p95 is not None and p95 > self.latency_tolerance * self._baseline:
+                    if self._decrease(now):
+                        self._spikes += 1
+                        # Start a fresh window so the spike is not re-counted.
+                        self._samples.clear()
+                else:
+                    if p95 is not None and self.latency_target is None:
+                        self._baseline = 0.95 * self._baseline + 0.05 * p95
+                    self._successes += 1
+                    errors = sum(1 for _, failed in self._samples if failed)
+                    healthy = errors <= self.max_error_rate * len(self._samples)
+                    if healthy and self._successes >= int(self.limit):
+                        self.limit = min(self.max_limit, self.limit + 1)
+                        self._successes = 0
+                        self._increases += 1
+            after = int(self.limit)
+        if after != before:
+            self.limiter.set_max_concurrency(after)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            errors = sum(1 for _, failed in self._samples if failed)
+            return {
+                "limit": int(self.limit),
+                "increases": self._increases,
+                "decreases": self._decreases,
+                "overload_errors": self._overloads,
+                "latency_spikes": self._spikes,
+                "latency_p95": self._latency_p(0.95),
+                "latency_baseline": self._baseline,
+                "error_rate": errors / len(self._samples) if self._samples else 0.0,
+            }
+
+
+async def _simulate(capacity: int, workers: int, seconds: float, latency: float) -> None:
+    from shared.offline import SyntheticChatModel, SyntheticProviderError
+    from shared.ratelimit import ProviderLimiter, RateLimitedChatModel
+
+    limiter = ProviderLimiter("synthetic")
+    controller = AdaptiveConcurrencyController(limiter, initial=2, max_limit=workers)
+    limiter.controller = controller
+    llm = RateLimitedChatModel(
+        inner=SyntheticChatModel(capacity=capacity, latency_mean=latency, tokens_per_second=0),
+        limiter=limiter,
+    )
+    counts = {"ok": 0, "429": 0}
+    deadline = time.monotonic() + seconds
+
+    async def worker(i: int) -> None:
+        while time.monotonic() < deadline:
+            try:
+                await llm.ainvoke(f"request from worker {i}")
+                counts["ok"] += 1
+            except SyntheticProviderError:
+                counts["429"] += 1
+                await asyncio.sleep(latency)
+
+    async def report() -> None:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(seconds / 10)
+            print(f"  limit={int(controller.limit):>3}  ok={counts['ok']:>6}  429s={counts['429']:>5}")
+
+    print(f"Simulating {workers} workers against capacity {capacity} for {seconds:.0f}s")
+    await asyncio.gather(report(), *(worker(i) for i in range(workers)))
+    print(f"Throughput: {counts['ok'] / seconds:.1f} calls/s, 429s: {counts['429']}")
+    print(controller.stats())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AIMD controller against the synthetic provider")
+    parser.add_argument("--capacity", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(_simulate(args.capacity, args.workers, args.seconds, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Transparent micro-batching of concurrent LLM invocations.
+
+Independent prompts fired together (the branches of a RunnableParallel,
+parallel graph nodes) are collected for a short window and dispatched as
+one batch, then each result is handed back to its caller.
+
+    LLM_MICROBATCH_WINDOW_MS=10   # how long the first caller waits for company
+    LLM_MICROBATCH_MAX_SIZE=16    # a full batch is dispatched immediately
+
+Only calls with the same generation kwargs and stop words share a batch,
+and a batch costs a single round trip to the provider's batch endpoint
+(``_generate_batch``, as the offline providers have). Batching a provider
+without one would only add the window to every call, so the wrapper
+passes such calls straight through. Gemini and Ollama have no real-time
+batch endpoint, which is why get_llm() does not apply it; wrap a model
+yourself with ``MicroBatchingChatModel.from_env(llm)``. Streaming calls
+are never batched.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from pydantic import PrivateAttr
+
+from shared.wrappers import DelegatingChatModel, has_batch_endpoint
+
+
+class _Batch:
+    __slots__ = ("items", "full", "stop", "kwargs")
+
+    def __init__(self, full, stop: Optional[List[str]], kwargs: Dict[str, Any]):
+        self.items: List[Tuple[List[BaseMessage], Any]] = []
+        self.full = full
+        self.stop = stop
+        self.kwargs = kwargs
+
+
+class MicroBatchingChatModel(DelegatingChatModel):
+    """Groups calls that arrive within ``window`` seconds into one batch."""
+
+    window: float = 0.01
+    max_batch_size: int = 16
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _open: Dict[Any, _Batch] = PrivateAttr(default_factory=dict)
+    _tasks: set = PrivateAttr(default_factory=set)
+    _batches: int = PrivateAttr(default=0)
+    _calls: int = PrivateAttr(default=0)
+
+    @classmethod
+    def from_env(cls, inner: Any) -> "MicroBatchingChatModel":
+        return cls(
+            inner=inner,
+            window=float(os.environ.get("LLM_MICROBATCH_WINDOW_MS", 10)) / 1000,
+            max_batch_size=int(os.environ.get("LLM_MICROBATCH_MAX_SIZE", 16)),
+        )
+
+    def batching_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "batches": self._batches,
+                "avg_batch_size": self._calls / self._batches if self._batches else 0.0,
+            }
+
+    def _join(self, key: Any, messages: List[BaseMessage], waiter: Any, make_full, stop, kwargs) -> Optional[_Batch]:
+        """Adds a call to the open batch for ``key``; returns it if we lead it."""
+        with self._lock:
+            self._calls += 1
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = _Batch(make_full(), stop, kwargs)
+                self._open[key] = batch
+            batch.items.append((messages, waiter))
+            if len(batch.items) >= self.max_batch_size:
+                del self._open[key]
+                batch.full.set()
+            return batch if leader else None
+
+    def _close(self, key: Any, batch: _Batch) -> None:
+        with self._lock:
+            if self._open.get(key) is batch:
+                del self._open[key]
+            self._batches += 1
+
+    # --- Sync path ---
+    @staticmethod
+    def _settle(items: List[Tuple[List[BaseMessage], Any]], results: List[ChatResult], error: Optional[BaseException]) -> None:
+        """Hands every waiter still pending its result or an error."""
+        for i, (_, waiter) in enumerate(items):
+            if waiter.done():
+                continue
+            if error is not None:
+                waiter.set_exception(error)
+            elif i < len(results):
+                waiter.set_result(results[i])
+            else:
+                waiter.set_exception(
+                    RuntimeError(f"batch endpoint returned {len(results)} results for {len(items)} prompts")
+                )
+
+    def _run_batch(self, batch: _Batch) -> None:
+        results: List[ChatResult] = []
+        error: Optional[BaseException] = None
+        try:
+            results = self.inner._generate_batch(
+                [messages for messages, _ in batch.items], stop=batch.stop, **batch.kwargs
+            )
+        except BaseException as e:
+            error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._settle(batch.items, results, error)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if not has_batch_endpoint(self.inner):
+            return self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        key = ("sync", self._get_llm_string(stop=stop, **kwargs))
+        waiter: Future = Future()
+        batch = self._join(key, messages, waiter, threading.Event, stop, kwargs)
+        if batch is not None:
+            batch.full.wait(self.window)
+            self._close(key, batch)
+            self._run_batch(batch)
+        return waiter.result()
+
+    # --- Async path (batches never span event loops) ---
+    async def _arun_batch(self, batch: _Batch) -> None:
+        # Members cancelled while the batch was open are left out.
+        items = [(messages, waiter) for messages, waiter in batch.items if not waiter.done()]
+        if not items:
+            return
+        results: List[ChatResult] = []
+        error: Optional[BaseException] = None
+        try:
+            results = await self.inner._agenerate_batch(
+                [messages for messages, _ in items], stop=batch.stop, **batch.kwargs
+            )
+        except asyncio.CancelledError:
+            for _, waiter in items:
+                waiter.cancel()
+            raise
+        except BaseException as e:
+            error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._settle(items, results, error)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if not has_batch_endpoint(self.inner):
+            return await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        loop = asyncio.get_running_loop()
+        key = (id(loop), self._get_llm_string(stop=stop, **kwargs))
+        waiter = loop.create_future()
+        batch = self._join(key, messages, waiter, asyncio.Event, stop, kwargs)
+        if batch is not None:
+            try:
+                await asyncio.wait_for(batch.full.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Nobody will await our result: drop it from the batch
+                # rather than leave an unretrieved exception behind.
+                waiter.cancel()
+                raise
+            finally:
+                self._close(key, batch)
+                # Run the batch on its own task so cancelling the leader
+                # does not cancel the calls of the other members.
+                task = loop.create_task(self._arun_batch(batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        return await waiter
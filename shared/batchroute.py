@@ -0,0 +1,142 @@
+"""
+Batched routing: classify many pending requests in one model call.
+
+When a queue of requests backs up, classifying each with its own call
+costs one round trip per request. route_batch() sends up to
+``batch_size`` of them in a single numbered prompt and asks for one
+``<index>: <label>`` line each:
+
+    routes = route_batch(llm, requests, labels=["booker", "info", "unclear"],
+                         instructions=ROUTER_INSTRUCTIONS, default="unclear")
+    for request, route in zip(requests, routes):
+        dispatch(route, request)
+
+The reply is validated line by line. Items whose line is missing, out of
+range or holds an unknown label are retried (only those) up to
+``retries`` times. Each retry halves the batch size and tells the model
+its previous reply was unusable, so the retried prompt never repeats a
+cached or coalesced one. Anything still unresolved gets ``default``, or
+raises BatchRoutingError when no default is given.
+aroute_batch() is the asyncio variant and runs the batches concurrently.
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+_LINE = re.compile(r"^\W*(\d+)\s*[:.)\]-]\s*['\"`*]*([\w-]+)", re.MULTILINE)
+
+_BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "{instructions}\n\n"
+     "You will receive several numbered requests. Classify each one independently. "
+     "Output exactly one line per request in the form '<number>: <label>', where <label> "
+     "is one of: {labels}. Output nothing else.{retry}"),
+    ("user", "{requests}"),
+])
+
+
+class BatchRoutingError(ValueError):
+    """Some requests could not be routed and no default was given."""
+
+    def __init__(self, message: str, unresolved: List[int]):
+        super().__init__(message)
+        self.unresolved = unresolved
+
+
+def parse_routes(text: str, count: int, labels: Sequence[str]) -> Dict[int, str]:
+    """``{index: label}`` for every valid line of a batch reply (0-based).
+
+    Lines may be written as ``1: info``, ``1. info``, ``[1] info`` and so on;
+    the first valid line for an index wins.
+    """
+    allowed = {label.lower(): label for label in labels}
+    routes: Dict[int, str] = {}
+    for match in _LINE.finditer(text):
+        index = int(match.group(1)) - 1
+        label = allowed.get(match.group(2).lower())
+        if 0 <= index < count and label is not None and index not in routes:
+            routes[index] = label
+    return routes
+
+
+def _prompt_inputs(
+    requests: Sequence[str], labels: Sequence[str], instructions: str, attempt: int = 0
+) -> Dict[str, str]:
+    numbered = "\n".join(f"{i}. {' '.join(request.split())}" for i, request in enumerate(requests, 1))
+    retry = ""
+    if attempt:
+        retry = (f"\n\nRetry {attempt}: a previous reply for these requests had no valid "
+                 "'<number>: <label>' line. Use only the listed labels and the given numbers.")
+    return {"instructions": instructions, "labels": ", ".join(labels), "requests": numbered, "retry": retry}
+
+
+def _chunks(items: List[int], batch_size: int, attempt: int = 0) -> List[List[int]]:
+    size = max(1, batch_size >> attempt)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _finish(routes: Dict[int, str], count: int, default: Optional[str]) -> List[str]:
+    unresolved = [i for i in range(count) if i not in routes]
+    if unresolved and default is None:
+        raise BatchRoutingError(f"{len(unresolved)} of {count} requests could not be routed", unresolved)
+    return [routes.get(i, default) for i in range(count)]
+
+
+def route_batch(
+    llm: Any,
+    requests: Sequence[str],
+    labels: Sequence[str],
+    instructions: str = "",
+    batch_size: int = 20,
+    retries: int = 2,
+    default: Optional[str] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """One label per request, in order, using ceil(len/batch_size) calls
+    plus one call per retried batch of failed items."""
+    chain = _BATCH_PROMPT | llm | StrOutputParser()
+    routes: Dict[int, str] = {}
+    pending = list(range(len(requests)))
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        for indices in _chunks(pending, batch_size, attempt):
+            inputs = _prompt_inputs([requests[i] for i in indices], labels, instructions, attempt)
+            reply = chain.invoke(inputs, config)
+            for position, label in parse_routes(reply, len(indices), labels).items():
+                routes[indices[position]] = label
+        pending = [i for i in pending if i not in routes]
+    return _finish(routes, len(requests), default)
+
+
+async def aroute_batch(
+    llm: Any,
+    requests: Sequence[str],
+    labels: Sequence[str],
+    instructions: str = "",
+    batch_size: int = 20,
+    retries: int = 2,
+    default: Optional[str] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """Async route_batch(); the batches of each round run concurrently."""
+    chain = _BATCH_PROMPT | llm | StrOutputParser()
+    routes: Dict[int, str] = {}
+    pending = list(range(len(requests)))
+
+    async def classify(indices: List[int], attempt: int) -> None:
+        inputs = _prompt_inputs([requests[i] for i in indices], labels, instructions, attempt)
+        reply = await chain.ainvoke(inputs, config)
+        for position, label in parse_routes(reply, len(indices), labels).items():
+            routes[indices[position]] = label
+
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        await asyncio.gather(*(classify(indices, attempt) for indices in _chunks(pending, batch_size, attempt)))
+        pending = [i for i in pending if i not in routes]
+    return _finish(routes, len(requests), default)
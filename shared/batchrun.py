@@ -0,0 +1,250 @@
+"""
+Resumable, high-volume batch execution of a chain over a JSONL/CSV file.
+
+Inputs are streamed (never loaded whole), run with bounded async
+concurrency and written to the output file as soon as each one finishes:
+
+    results = await run_batch(
+        chain, "products.jsonl", "results.jsonl",
+        make_inputs=lambda record: {"text_input": record["description"]},
+        concurrency=32,
+    )
+
+Every output line is ``{"id": ..., "input": ..., "output": ...}``; failed
+items go to ``<output>.errors.jsonl``. The output file is the checkpoint:
+on restart, ids already present in it are skipped, so a crashed or
+interrupted job resumes where it stopped and failed items are retried. A
+line torn by a crash is cut off before appending, and its item re-run.
+Writes (and periodic fsyncs) run on a worker thread, off the event loop.
+Records are identified by their ``id`` field (configurable), or by their
+position in the input file when they have none.
+
+Progress (items/s, tokens/s, errors) is printed periodically and returned
+at the end.
+"""
+
+import asyncio
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Set, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from shared.adaptive import is_overload_error
+
+
+class UsageCounter(BaseCallbackHandler):
+    """Counts chat model calls and sums the token usage they report."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self.calls += 1
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                with self._lock:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+
+
+def iter_records(path: Path, id_field: str = "id") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yields (id, record) from a JSONL or CSV file, one line at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows: Iterator[Dict[str, Any]] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for index, record in enumerate(rows):
+            yield str(record.get(id_field, index)), record
+
+
+def completed_ids(output: Path) -> Set[str]:
+    """Ids already written to ``output`` (a torn last line is ignored)."""
+    done: Set[str] = set()
+    if not output.exists():
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def open_for_append(path: Path):
+    """Opens ``path`` for appending JSONL, first truncating a torn last line
+    so the next record does not get glued onto it."""
+    if path.exists():
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                step = min(4096, position)
+                f.seek(position - step)
+                block = f.read(step)
+                newline = block.rfind(b"\n")
+                if newline != -1:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            if position != end:
+                f.truncate(position)
+    return open(path, "a", encoding="utf-8")
+
+
+class _Progress:
+    def __init__(self, skipped: int, counter: UsageCounter):
+        self.started = time.perf_counter()
+        self.skipped = skipped
+        self.done = 0
+        self.errors = 0
+        self.counter = counter
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        tokens = self.counter.input_tokens + self.counter.output_tokens
+        return {
+            "done": self.done,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "elapsed": elapsed,
+            "items_per_second": self.done / elapsed,
+            "input_tokens": self.counter.input_tokens,
+            "output_tokens": self.counter.output_tokens,
+            "tokens_per_second": tokens / elapsed,
+        }
+
+    def report(self, out=sys.stderr) -> None:
+        s = self.stats()
+        print(
+            f"[batch] done={s['done']} errors={s['errors']} skipped={s['skipped']} "
+            f"{s['items_per_second']:.1f} items/s {s['tokens_per_second']:.0f} tokens/s",
+            file=out,
+        )
+
+
+async def run_batch(
+    chain: Any,
+    input_path: str,
+    output_path: str,
+    make_inputs: Callable[[Dict[str, Any]], Dict[str, Any]],
+    concurrency: int = 16,
+    retries: int = 2,
+    id_field: str = "id",
+    report_every: float = 10.0,
+    fsync_every: int = 100,
+) -> Dict[str, Any]:
+    """Runs ``chain`` on every record of ``input_path``; returns final stats.
+
+    Overload errors (429/5xx) are retried with exponential backoff up to
+    ``retries`` times; other errors are recorded for the item at once.
+    """
+    input_file, output_file = Path(input_path), Path(output_path)
+    errors_file = output_file.with_name(output_file.name + ".errors.jsonl")
+    done = completed_ids(output_file)
+    counter = UsageCounter()
+    progress = _Progress(skipped=0, counter=counter)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    out = open_for_append(output_file)
+    err = open_for_append(errors_file)
+    writes: asyncio.Queue = asyncio.Queue()
+    written = 0
+
+    def write_lines(batch) -> None:
+        # Runs on a worker thread: one writer at a time (see writer()).
+        nonlocal written
+        for f, record in batch:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for f in {f for f, _ in batch}:
+            f.flush()
+        before, written = written, written + len(batch)
+        if written // fsync_every > before // fsync_every:
+            for f in (out, err):
+                os.fsync(f.fileno())
+
+    async def writer() -> None:
+        # Single consumer, so lines never interleave; whatever queued up
+        # during the previous write goes out in one batch.
+        while True:
+            batch = [await writes.get()]
+            while not writes.empty():
+                batch.append(writes.get_nowait())
+            lines = [item for item in batch if item is not None]
+            if lines:
+                await asyncio.to_thread(write_lines, lines)
+            if len(lines) < len(batch):
+                return
+
+    def close_files() -> None:
+        for f in (out, err):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+    async def produce() -> None:
+        # Reading runs on the loop; each line is small, and the bounded
+        # queue keeps memory flat however large the input is.
+        for record_id, record in iter_records(input_file, id_field):
+            if record_id in done:
+                progress.skipped += 1
+                continue
+            await queue.put((record_id, record))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work() -> None:
+        config = {"callbacks": [counter]}
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            record_id, record = item
+            for attempt in range(retries + 1):
+                try:
+                    output = await chain.ainvoke(make_inputs(record), config=config)
+                except Exception as e:
+                    if attempt < retries and is_overload_error(e):
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    progress.errors += 1
+                    writes.put_nowait((err, {"id": record_id, "input": record, "error": repr(e)}))
+                    break
+                progress.done += 1
+                writes.put_nowait((out, {"id": record_id, "input": record, "output": output}))
+                break
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(report_every)
+            progress.report()
+
+    reporter = asyncio.create_task(report())
+    writing = asyncio.create_task(writer())
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    finally:
+        reporter.cancel()
+        writes.put_nowait(None)
+        try:
+            await writing
+        finally:
+            await asyncio.to_thread(close_files)
+            progress.report()
+    return progress.stats()
@@ -0,0 +1,183 @@
+"""
+Persistent SQLite-backed LLM response cache.
+
+Plugs into LangChain's cache hook (the ``cache`` field of every chat
+model), so identical calls -- same serialized messages, model and
+generation kwargs -- are answered from disk instead of the provider.
+
+get_llm() attaches it to deterministic (temperature=0) models when the
+LLM_CACHE environment variable is set:
+
+    LLM_CACHE=.cache/llm.sqlite
+    LLM_CACHE_TTL=86400          # seconds, 0 = never expire
+    LLM_CACHE_MAX_ENTRIES=50000  # LRU eviction beyond this, 0 = unbounded
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+
+def _dump_generations(generations: RETURN_VAL_TYPE) -> str:
+    records = []
+    for generation in generations:
+        record = {"text": generation.text, "generation_info": generation.generation_info}
+        if isinstance(generation, ChatGeneration):
+            record["message"] = message_to_dict(generation.message)
+        records.append(record)
+    return json.dumps(records, default=str)
+
+
+def _load_generations(value: str) -> RETURN_VAL_TYPE:
+    """Cached generations, tagged ``generation_info["cache_hit"] = True`` so
+    callbacks (e.g. the trace recorder) can tell them from provider calls."""
+    generations = []
+    for record in json.loads(value):
+        info = {**(record["generation_info"] or {}), "cache_hit": True}
+        if "message" in record:
+            (message,) = messages_from_dict([record["message"]])
+            generations.append(ChatGeneration(message=message, generation_info=info))
+        else:
+            generations.append(Generation(text=record["text"], generation_info=info))
+    return generations
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain cache stored in a single SQLite file.
+
+    Entries are keyed by a SHA-256 of the prompt (the serialized messages)
+    and the llm string (model name plus generation kwargs). Supports a TTL,
+    a maximum number of entries with least-recently-used eviction, and
+    hit/miss/byte counters available through ``stats()``.
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/llm.sqlite",
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = path
+        self.ttl = ttl or None
+        self.max_entries = max_entries or None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_read = 0
+        self._bytes_written = 0
+        self._evictions = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)"
+        )
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(prompt.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(llm_string.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            value, size, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._misses += 1
+                return None
+            try:
+                generations = _load_generations(value)
+            except Exception:
+                # Entries written by an incompatible format are treated as
+                # misses and overwritten on the next update.
+                self._misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._hits += 1
+            self._bytes_read += size
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        value = _dump_generations(return_val)
+        size = len(value.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._bytes_written += size
+            if self.max_entries is not None:
+                self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY accessed ASC LIMIT ?)",
+            (excess,),
+        )
+        self._evictions += excess
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        """Returns hit/miss/byte counters and the current on-disk footprint."""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "bytes_read": self._bytes_read,
+                "bytes_written": self._bytes_written,
+                "evictions": self._evictions,
+                "entries": entries,
+                "bytes_stored": total_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
@@ -0,0 +1,148 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests.
+
+When several callers send the same prompt to the same model at the same
+moment (e.g. many users asking the same FAQ), only the first one -- the
+leader -- calls the provider; the others wait for its result. Unlike the
+response cache this also helps on a cold start.
+
+get_llm() enables it for deterministic (temperature=0) models with:
+
+    LLM_COALESCE=1
+
+Requests are identical when their serialized messages and llm string
+(model, generation kwargs, stop words, bound tools) match. Sync and async
+callers share the same in-flight table. Streaming calls are not coalesced.
+"""
+
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.load import dumps
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+
+from shared.wrappers import DelegatingChatModel
+
+
+class _LeaderCancelled(Exception):
+    """The leading call was cancelled; followers retry on their own."""
+
+
+class SingleFlight:
+    """Table of in-flight requests keyed by request hash."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """Returns (flight, is_leader) for a request key."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.followers += 1
+                return flight, False
+            flight = Future()
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def land(self, key: str, flight: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "in_flight": len(self._flights),
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def coalesce_stats() -> Dict[str, int]:
+    """Counters of the process-wide single-flight table."""
+    return _single_flight.stats()
+
+
+class CoalescingChatModel(DelegatingChatModel):
+    """Shares one upstream call among concurrent identical requests."""
+
+    def _flight_key(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(dumps(messages).encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(self._get_llm_string(stop=stop, **kwargs).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._flight_key(messages, stop, kwargs)
+        while True:
+            flight, leader = _single_flight.join(key)
+            if not leader:
+                try:
+                    # Callers decorate the returned messages (ids, metadata),
+                    # so each follower gets its own copy.
+                    return flight.result().model_copy(deep=True)
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except BaseException as e:
+                flight.set_exception(e if isinstance(e, Exception) else _LeaderCancelled())
+                raise
+            else:
+                flight.set_result(result)
+                return result
+            finally:
+                _single_flight.land(key, flight)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._flight_key(messages, stop, kwargs)
+        while True:
+            flight, leader = _single_flight.join(key)
+            if not leader:
+                try:
+                    result = await asyncio.shield(asyncio.wrap_future(flight))
+                    return result.model_copy(deep=True)
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except asyncio.CancelledError:
+                flight.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                flight.set_exception(e if isinstance(e, Exception) else _LeaderCancelled())
+                raise
+            else:
+                flight.set_result(result)
+                return result
+            finally:
+                _single_flight.land(key, flight)
@@ -0,0 +1,30 @@
+"""
+One-time loading of the project's .env file.
+
+Scripts and shared/llm.py both need the environment loaded before reading
+any configuration. load_env() parses .env on the first call only, so the
+file is read once per process however many modules ask for it.
+"""
+
+import threading
+from typing import Optional
+
+_found: Optional[bool] = None
+_lock = threading.Lock()
+
+
+def load_env() -> bool:
+    """Loads .env into os.environ once; returns True if a file was found.
+
+    The file is searched upwards from the repository, as python-dotenv's
+    load_dotenv() does, and variables already set in the environment take
+    precedence.
+    """
+    global _found
+    with _lock:
+        if _found is None:
+            from dotenv import find_dotenv, load_dotenv
+
+            path = find_dotenv()
+            _found = bool(path) and load_dotenv(path)
+        return _found
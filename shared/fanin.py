@@ -0,0 +1,131 @@
+"""
+Streaming fan-in: fold branch results as they arrive.
+
+A fan-out graph that merges at a barrier waits for its slowest branch
+before aggregation even starts. fold_as_completed() starts every branch,
+folds results into a running value as each one completes, and can stop
+waiting early:
+
+    result = await fold_as_completed(
+        {"a": branch_a(), "b": branch_b(), "c": branch_c()},
+        fold=refine,          # async (value, [(name, result), ...]) -> value
+        initial="",
+        quorum=2,             # finalize once 2 of 3 branches have returned...
+        deadline=5.0,         # ...and 5s have passed; stragglers are cancelled
+    )
+    result.value, result.arrived, result.dropped
+
+Folds run one at a time; results that arrive while a fold is in flight
+are folded together in the next one, so a burst of arrivals costs one
+fold rather than one each. Without a deadline every branch is awaited
+(stragglers are folded in as they arrive, and ``on_quorum`` hands out the
+value folded from the first ``quorum`` results meanwhile); with deadline=0 the value is
+finalized as soon as the quorum has returned. The quorum always wins over
+the deadline: a run never finalizes with fewer than ``quorum`` results
+unless the other branches failed.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+Fold = Callable[[Any, Sequence[Tuple[Hashable, Any]]], Awaitable[Any]]
+
+
+@dataclass
+class FanInResult:
+    """Outcome of a fold_as_completed() run; names are in arrival order.
+
+    ``failed`` branches raised (``errors`` holds each one's exception);
+    ``dropped`` ones were still running at the deadline and were cancelled.
+    """
+
+    value: Any
+    arrived: List[Hashable] = field(default_factory=list)
+    failed: List[Hashable] = field(default_factory=list)
+    errors: Dict[Hashable, BaseException] = field(default_factory=dict)
+    dropped: List[Hashable] = field(default_factory=list)
+    folds: int = 0
+    quorum_seconds: Optional[float] = None
+    seconds: float = 0.0
+
+
+async def fold_as_completed(
+    branches: Dict[Hashable, Awaitable[Any]],
+    fold: Fold,
+    initial: Any = None,
+    quorum: Optional[int] = None,
+    deadline: Optional[float] = None,
+    on_quorum: Optional[Callable[[Any], None]] = None,
+) -> FanInResult:
+    """Runs ``branches`` concurrently and folds their results as they complete.
+
+    ``quorum`` defaults to all branches; ``deadline`` is in seconds from the
+    start. A branch that raises is recorded as failed and never folded.
+    ``on_quorum`` is called once with the value as soon as the quorum's
+    results have been folded, so a caller can use it before the stragglers
+    (awaited without a deadline) are in.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    names = {asyncio.ensure_future(branch): name for name, branch in branches.items()}
+    pending = set(names)
+    needed = len(names) if quorum is None else max(0, min(quorum, len(names)))
+    result = FanInResult(value=initial)
+    ready: List[Tuple[Hashable, Any]] = []
+    folding: Optional[asyncio.Future] = None
+    folding_size = folded = 0
+
+    def expired() -> bool:
+        return deadline is not None and loop.time() - started >= deadline
+
+    try:
+        while pending or ready or folding is not None:
+            if folding is None and ready:
+                batch, ready = ready, []
+                folding = asyncio.ensure_future(fold(result.value, batch))
+                folding_size = len(batch)
+                result.folds += 1
+
+            if pending and len(result.arrived) >= needed and expired():
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                result.dropped.extend(names[task] for task in names if task in pending)
+                pending = set()
+                continue
+
+            timeout = None
+            if pending and deadline is not None and len(result.arrived) >= needed:
+                timeout = max(0.0, started + deadline - loop.time())
+            waiting = set(pending) | ({folding} if folding is not None else set())
+            done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task is folding:
+                    result.value = task.result()
+                    folding = None
+                    reached = folded < needed <= folded + folding_size
+                    folded += folding_size
+                    if reached and on_quorum is not None:
+                        on_quorum(result.value)
+                    continue
+                pending.discard(task)
+                if task.exception() is not None:
+                    result.failed.append(names[task])
+                    result.errors[names[task]] = task.exception()
+                    continue
+                ready.append((names[task], task.result()))
+                result.arrived.append(names[task])
+                if result.quorum_seconds is None and len(result.arrived) >= needed:
+                    result.quorum_seconds = loop.time() - started
+    finally:
+        # Only reached with work left if a fold raised or we were cancelled.
+        leftovers = pending | ({folding} if folding is not None else set())
+        for task in leftovers:
+            task.cancel()
+        if leftovers:
+            await asyncio.gather(*leftovers, return_exceptions=True)
+
+    result.seconds = loop.time() - started
+    return result
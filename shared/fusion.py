@@ -0,0 +1,201 @@
+"""
+Stage fusion: run several chain stages in a single model call.
+
+A staged chain such as extract -> transform or plan -> write makes one
+round trip per stage, even when the caller only uses the last result.
+fuse_stages() merges adjacent stages into one structured prompt that asks
+for every stage's result under its own ``### NAME`` header, and parses
+the reply back into a dict of sections:
+
+    fused = fuse_stages(llm, [
+        Stage("PLAN", "Create an article plan for: {topic}"),
+        Stage("ARTICLE", "Write the article following the PLAN."),
+    ])
+    article = (fused | final_section).invoke({"topic": topic})
+
+The intermediate sections are still in the dict, so a fused chain can be
+inspected the same way as the staged one. Whether fusion is worth it is
+an empirical question per pipeline: ab_benchmark() runs both variants on
+the same inputs and compares latency, calls, tokens and (optionally) an
+LLM-judged quality score:
+
+    rows = await ab_benchmark({"staged": staged, "fused": fused_chain},
+                              inputs, task="...", judge=get_llm(temperature=0))
+    print_ab(rows)
+"""
+
+import re
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, TextIO
+
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from shared.batchrun import UsageCounter
+
+
+class Stage(NamedTuple):
+    """One stage of a fused chain: a section name and its instruction.
+
+    The instruction may use the chain's input variables and refer to
+    earlier stages by their section name.
+    """
+
+    name: str
+    instruction: str
+
+
+_FUSED_SYSTEM = (
+    "Complete the following steps in order, in a single response. Write the result of each "
+    "step under a line containing only its header (e.g. ### {first}), in the order given, "
+    "and write nothing before the first header."
+)
+
+
+def fused_prompt(stages: Sequence[Stage], system: Optional[str] = None) -> ChatPromptTemplate:
+    """Prompt asking for every stage's result under its own header."""
+    if not stages:
+        raise ValueError("fused_prompt() needs at least one stage")
+    instructions = _FUSED_SYSTEM.replace("{first}", stages[0].name)
+    if system:
+        instructions = f"{system}\n\n{instructions}"
+    steps = "\n\n".join(
+        f"Step {i}: ### {stage.name}\n{stage.instruction}" for i, stage in enumerate(stages, 1)
+    )
+    return ChatPromptTemplate.from_messages([
+        ("system", instructions.replace("{", "{{").replace("}", "}}")),
+        ("user", steps),
+    ])
+
+
+class SectionParser(BaseOutputParser[Dict[str, str]]):
+    """Splits a fused reply into ``{section name: text}``.
+
+    Headers are matched case-insensitively with any number of ``#`` and an
+    optional trailing colon. Missing sections are empty strings; a reply
+    with no recognizable header is taken as the last section.
+    """
+
+    sections: List[str]
+
+    def parse(self, text: str) -> Dict[str, str]:
+        names = {name.lower(): name for name in self.sections}
+        pattern = re.compile(
+            r"^[ \t]*#{1,6}[ \t]*(" + "|".join(re.escape(name) for name in self.sections) + r")[ \t]*:?[ \t]*$",
+            re.IGNORECASE | re.MULTILINE,
+        )
+        result = {name: "" for name in self.sections}
+        matches = list(pattern.finditer(text))
+        if not matches:
+            result[self.sections[-1]] = text.strip()
+            return result
+        for match, following in zip(matches, matches[1:] + [None]):
+            end = following.start() if following else len(text)
+            name = names[match.group(1).lower()]
+            if not result[name]:
+                result[name] = text[match.end():end].strip()
+        return result
+
+    @property
+    def _type(self) -> str:
+        return "fused_sections"
+
+
+def fuse_stages(llm: Any, stages: Sequence[Stage], system: Optional[str] = None) -> Runnable:
+    """``fused_prompt | llm | SectionParser``: one call, a dict of sections."""
+    return fused_prompt(stages, system) | llm | SectionParser(sections=[stage.name for stage in stages])
+
+
+def _last_section(sections: Dict[str, str]) -> str:
+    return list(sections.values())[-1]
+
+
+final_section = RunnableLambda(_last_section, name="final_section")
+
+
+# --- A/B benchmark ---
+
+_JUDGE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a strict evaluator. Rate how well the output accomplishes the task on a scale "
+     "from 1 (useless) to 10 (excellent). Answer with the number only."),
+    ("user", "Task: {task}\n\nOutput:\n{output}"),
+])
+
+
+async def judge_quality(judge: Any, task: str, output: str) -> Optional[float]:
+    """1-10 score from ``judge``, or None if the reply does not start with one."""
+    reply = await (_JUDGE_PROMPT | judge).ainvoke({"task": task, "output": output})
+    match = re.match(r"\s*\**(\d+(?:\.\d+)?)", reply.text if isinstance(reply.text, str) else reply.text())
+    return min(10.0, max(1.0, float(match.group(1)))) if match else None
+
+
+async def ab_benchmark(
+    variants: Dict[str, Runnable],
+    inputs: Sequence[Dict[str, Any]],
+    task: str = "",
+    judge: Any = None,
+    runs: int = 1,
+) -> List[Dict[str, Any]]:
+    """Runs every variant ``runs`` times on each input; one row per variant.
+
+    Calls are sequential so latencies are not skewed by contention. A
+    variant returning a dict of sections (a fused chain without
+    final_section) is scored on its last section, and counted incomplete
+    if any section is empty. The judge's own calls are not counted.
+    """
+    rows = []
+    for name, chain in variants.items():
+        counter = UsageCounter()
+        latencies: List[float] = []
+        scores: List[float] = []
+        incomplete = errors = 0
+        for _ in range(runs):
+            for item in inputs:
+                started = time.perf_counter()
+                try:
+                    output = await chain.ainvoke(item, config={"callbacks": [counter]})
+                except Exception as e:
+                    errors += 1
+                    print(f"[ab] {name}: {e!r}", file=sys.stderr)
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if isinstance(output, dict):
+                    incomplete += not all(output.values())
+                    output = _last_section(output)
+                if judge is not None:
+                    score = await judge_quality(judge, task, str(output))
+                    if score is not None:
+                        scores.append(score)
+        completed = max(len(latencies), 1)
+        rows.append({
+            "variant": name,
+            "runs": len(latencies),
+            "errors": errors,
+            "latency_p50": statistics.median(latencies) if latencies else 0.0,
+            "latency_mean": statistics.fmean(latencies) if latencies else 0.0,
+            "calls": counter.calls / completed,
+            "input_tokens": counter.input_tokens / completed,
+            "output_tokens": counter.output_tokens / completed,
+            "quality": statistics.fmean(scores) if scores else None,
+            "incomplete": incomplete,
+        })
+    return rows
+
+
+def print_ab(rows: List[Dict[str, Any]], out: TextIO = sys.stdout) -> None:
+    header = (f"{'variant':<12}{'runs':>6}{'errors':>8}{'p50 s':>9}{'mean s':>9}{'calls':>7}"
+              f"{'in tok':>9}{'out tok':>9}{'quality':>9}{'incomplete':>12}")
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    for row in rows:
+        quality = f"{row['quality']:.1f}" if row["quality"] is not None else "-"
+        print(
+            f"{row['variant']:<12}{row['runs']:>6}{row['errors']:>8}{row['latency_p50']:>9.2f}"
+            f"{row['latency_mean']:>9.2f}{row['calls']:>7.1f}{row['input_tokens']:>9.0f}"
+            f"{row['output_tokens']:>9.0f}{quality:>9}{row['incomplete']:>12}",
+            file=out,
+        )
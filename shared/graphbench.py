@@ -0,0 +1,167 @@
+"""
+Sync vs async fan-out throughput of the parallel example graphs.
+
+Runs N copies of a graph concurrently against the synthetic provider and
+reports wall time, graphs/s, per-graph latency and peak thread count for:
+
+    sync-threads  sync nodes, graph.invoke() on a pool of --workers threads
+    sync-nodes    sync nodes, graph.ainvoke() (nodes run in the default executor)
+    async         async nodes, graph.ainvoke() on the event loop
+
+    python -m shared.graphbench --runs 10 100 1000
+    python -m shared.graphbench --graph agents --latency 0.5 --max-concurrency 2
+
+``--max-concurrency`` is passed to every run's config and caps the
+branches a single graph runs at once.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+GRAPHS = {
+    "research": (
+        "03_Parallelization/langgraph_parallel_research.py",
+        "build_parallel_research_graph",
+        lambda i: {"topic": f"Clean technology topic {i}", "findings": []},
+    ),
+    "agents": (
+        "07_Multi_Agent/langgraph_parallel_agents.py",
+        "build_parallel_graph",
+        lambda i: {"city": f"City {i}", "results": []},
+    ),
+}
+
+
+def _load_script(relative: str) -> Any:
+    path = _ROOT / relative
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _ThreadPeak:
+    """Samples threading.active_count() in the background."""
+
+    def __init__(self, interval: float = 0.01):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, args=(interval,), daemon=True)
+
+    def _sample(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "_ThreadPeak":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _timed(fn: Callable[[], Any], latencies: List[float]) -> Any:
+    started = time.perf_counter()
+    result = fn()
+    latencies.append(time.perf_counter() - started)
+    return result
+
+
+def run_threads(graph: Any, inputs: List[dict], config: Optional[dict], workers: int) -> List[float]:
+    latencies: List[float] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda item: _timed(lambda: graph.invoke(item, config), latencies), inputs))
+    return latencies
+
+
+async def run_async(graph: Any, inputs: List[dict], config: Optional[dict]) -> List[float]:
+    latencies: List[float] = []
+
+    async def one(item: dict) -> None:
+        started = time.perf_counter()
+        await graph.ainvoke(item, config)
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(item) for item in inputs))
+    return latencies
+
+
+def benchmark(name: str, runs: int, workers: int, max_concurrency: Optional[int]) -> List[Dict[str, Any]]:
+    script, builder_name, make_inputs = GRAPHS[name]
+    module = _load_script(script)
+    build = getattr(module, builder_name)
+    sync_graph, async_graph = build(), build(use_async=True)
+    inputs = [make_inputs(i) for i in range(runs)]
+    config = {"max_concurrency": max_concurrency} if max_concurrency else None
+
+    modes = {
+        "sync-threads": lambda: run_threads(sync_graph, inputs, config, min(workers, runs)),
+        "sync-nodes": lambda: asyncio.run(run_async(sync_graph, inputs, config)),
+        "async": lambda: asyncio.run(run_async(async_graph, inputs, config)),
+    }
+    rows = []
+    for mode, run in modes.items():
+        with contextlib.redirect_stdout(io.StringIO()), _ThreadPeak() as threads:
+            started = time.perf_counter()
+            latencies = run()
+            elapsed = time.perf_counter() - started
+        ordered = sorted(latencies)
+        rows.append({
+            "graph": name,
+            "mode": mode,
+            "runs": runs,
+            "seconds": elapsed,
+            "graphs_per_second": runs / elapsed,
+            "latency_p50": statistics.median(ordered),
+            "latency_p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+            "peak_threads": threads.peak,
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync vs async fan-out throughput")
+    parser.add_argument("--graph", choices=sorted(GRAPHS), nargs="+", default=sorted(GRAPHS))
+    parser.add_argument("--runs", type=int, nargs="+", default=[10, 100, 1000], help="concurrent graph runs")
+    parser.add_argument("--workers", type=int, default=64, help="thread pool size for sync-threads")
+    parser.add_argument("--max-concurrency", type=int, help="max branches per graph run")
+    parser.add_argument("--latency", type=float, default=0.2, help="synthetic time to first token, seconds")
+    args = parser.parse_args()
+    os.environ.update({
+        "LLM_PROVIDER": "synthetic",
+        "SYNTHETIC_LATENCY": "fixed",
+        "SYNTHETIC_LATENCY_MEAN": str(args.latency),
+        "SYNTHETIC_TOKENS_PER_SECOND": "0",
+        "SYNTHETIC_OUTPUT_TOKENS": "16",
+        # The research graph caps in-flight branches across all runs; lift
+        # it so the benchmark measures the execution model, not the cap.
+        "RESEARCH_CONCURRENCY": os.environ.get("RESEARCH_CONCURRENCY", "100000"),
+    })
+
+    print(f"synthetic provider, {args.latency}s per call; sync-threads uses up to {args.workers} threads")
+    header = f"{'graph':<10}{'mode':<14}{'runs':>6}{'seconds':>9}{'graphs/s':>10}{'p50 s':>8}{'p95 s':>8}{'threads':>9}"
+    print(header)
+    print("-" * len(header))
+    for name in args.graph:
+        for runs in args.runs:
+            for row in benchmark(name, runs, args.workers, args.max_concurrency):
+                print(f"{row['graph']:<10}{row['mode']:<14}{row['runs']:>6}{row['seconds']:>9.2f}"
+                      f"{row['graphs_per_second']:>10.1f}{row['latency_p50']:>8.2f}{row['latency_p95']:>8.2f}"
+                      f"{row['peak_threads']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Hedged requests with cross-provider latency failover.
+
+If the primary provider has not answered (or, when streaming, has not
+produced its first token) by an adaptive deadline -- the recent p95 of its
+latency -- a backup request is sent to a secondary provider. Whichever
+finishes first wins and the other is cancelled. A primary that fails
+outright fails over to the secondary.
+
+    LLM_HEDGE_PROVIDER=ollama    # secondary provider; enables hedging
+    LLM_HEDGE_BUDGET=0.05        # max fraction of requests that get a hedge
+    LLM_HEDGE_PERCENTILE=0.95    # deadline = this percentile of primary latency
+    LLM_HEDGE_MIN_DELAY=0.5      # seconds, lower bound of the deadline
+    LLM_HEDGE_INITIAL_DELAY=5.0  # seconds, used until enough samples exist
+
+    LLM_HEDGE_WORKERS=32         # threads running the requests of sync calls
+
+Only plain calls are hedged: calls carrying call-time kwargs (bound tools,
+structured output) are provider specific and always go to the primary.
+
+Async calls (ainvoke/astream) cancel the losing request. Sync calls
+(invoke/stream) run both requests on a pool of LLM_HEDGE_WORKERS threads
+while the caller waits for the first to finish; a blocking call cannot
+be interrupted, so a loser that has already started runs to completion
+in the background and its result is discarded (a losing stream is
+closed). The deadline is measured from when the primary actually starts.
+``hedge_wins``/``primary_wins`` only count calls where both requests
+raced.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from shared.wrappers import DelegatingChatModel
+
+MIN_SAMPLES = 20
+DEFAULT_WORKERS = 32
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _hedge_pool() -> ThreadPoolExecutor:
+    """Threads running the primary and backup requests of sync calls
+    (LLM_HEDGE_WORKERS)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.environ.get("LLM_HEDGE_WORKERS", DEFAULT_WORKERS))
+            _pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="llm-hedge")
+        return _pool
+
+
+def _submit(fn: Callable[[], Any]) -> Future:
+    return _hedge_pool().submit(contextvars.copy_context().run, fn)
+
+
+def _release(future: Optional[Future], discard: Optional[Callable[[], None]]) -> None:
+    """Drops a losing (or never started) request: cancels it if it has not
+    started, otherwise hands it to ``discard`` once it has finished."""
+    if future is not None and not future.cancel():
+        if discard is not None:
+            future.add_done_callback(lambda _: discard())
+    elif discard is not None:
+        discard()
+
+
+class HedgePolicy:
+    """Adaptive hedge deadline, hedge budget and win-rate counters."""
+
+    def __init__(
+        self,
+        budget: float = 0.05,
+        percentile: float = 0.95,
+        min_delay: float = 0.5,
+        initial_delay: float = 5.0,
+        window: int = 256,
+    ):
+        self.budget = budget
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._counts = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "failovers": 0,
+            "budget_denied": 0,
+        }
+
+    def delay(self) -> float:
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return max(self.min_delay, self.initial_delay)
+            ordered = sorted(self._latencies)
+            value = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+            return max(self.min_delay, value)
+
+    def record_latency(self, latency: float) -> None:
+        """Primary latency sample (a lower bound when the primary lost)."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def start(self) -> None:
+        with self._lock:
+            self._counts["requests"] += 1
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            allowed = self._counts["hedged"] + 1 <= self.budget * self._counts["requests"] + 1
+            self._counts["hedged" if allowed else "budget_denied"] += 1
+            return allowed
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay()
+        with self._lock:
+            counts = dict(self._counts)
+        hedged = counts["hedged"]
+        counts["hedge_rate"] = hedged / counts["requests"] if counts["requests"] else 0.0
+        counts["hedge_win_rate"] = counts["hedge_wins"] / hedged if hedged else 0.0
+        counts["delay"] = delay
+        return counts
+
+
+_policy: Optional[HedgePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Process-wide hedge policy configured from the environment."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = HedgePolicy(
+                budget=float(os.environ.get("LLM_HEDGE_BUDGET", 0.05)),
+                percentile=float(os.environ.get("LLM_HEDGE_PERCENTILE", 0.95)),
+                min_delay=float(os.environ.get("LLM_HEDGE_MIN_DELAY", 0.5)),
+                initial_delay=float(os.environ.get("LLM_HEDGE_INITIAL_DELAY", 5.0)),
+            )
+        return _policy
+
+
+def hedge_stats() -> Optional[Dict[str, Any]]:
+    """Hedge counters and win rates, or None if hedging was never used."""
+    return _policy.stats() if _policy is not None else None
+
+
+class HedgedChatModel(DelegatingChatModel):
+    """Races ``inner`` (primary) against ``secondary`` past a deadline."""
+
+    secondary: BaseChatModel
+    policy: HedgePolicy
+
+    # --- Racing (shared by plain calls and first streaming chunks) ---
+    def _race(
+        self,
+        primary: Callable[[], Any],
+        secondary: Callable[[], Any],
+        discard_primary: Optional[Callable[[], None]] = None,
+        discard_secondary: Optional[Callable[[], None]] = None,
+    ) -> Tuple[str, Any]:
+        """Runs ``primary`` on a worker; past the deadline a backup runs
+        ``secondary`` on another and the first to succeed wins. The
+        ``discard_*`` callbacks release a losing or unused request (e.g.
+        close its stream) once it is no longer running."""
+        policy = self.policy
+        policy.start()
+        started = threading.Event()
+        clock: List[float] = []
+
+        def run_primary() -> Any:
+            clock.append(time.monotonic())
+            started.set()
+            return primary()
+
+        first = _submit(run_primary)
+        started.wait()
+        done, _ = wait([first], timeout=max(0.0, clock[0] + policy.delay() - time.monotonic()))
+        if done:
+            if first.exception() is None:
+                policy.record_latency(time.monotonic() - clock[0])
+                _release(None, discard_secondary)
+                return "primary", first.result()
+            policy.count("failovers")
+            return "secondary", secondary()
+        if not policy.try_hedge():
+            _release(None, discard_secondary)
+            try:
+                result = first.result()
+            except Exception:
+                policy.count("failovers")
+                return "secondary", secondary()
+            policy.record_latency(time.monotonic() - clock[0])
+            return "primary", result
+
+        backup = _submit(secondary)
+        sources = {first: "primary", backup: "secondary"}
+        discards = {first: discard_primary, backup: discard_secondary}
+        pending = {first, backup}
+        errors = []
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        errors.append(future.exception())
+                        continue
+                    source = sources[future]
+                    policy.record_latency(time.monotonic() - clock[0])
+                    policy.count("hedge_wins" if source == "secondary" else "primary_wins")
+                    return source, future.result()
+            raise errors[0]
+        finally:
+            for future in pending:
+                _release(future, discards[future])
+
+    async def _arace(self, primary: Callable[[], Any], secondary: Callable[[], Any]) -> Tuple[str, Any]:
+        policy = self.policy
+        policy.start()
+        started = time.monotonic()
+        first = asyncio.ensure_future(primary())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=policy.delay())
+            if done:
+                if first.exception() is None:
+                    policy.record_latency(time.monotonic() - started)
+                    return "primary", first.result()
+                policy.count("failovers")
+                return "secondary", await secondary()
+            if not policy.try_hedge():
+                result = await first
+                policy.record_latency(time.monotonic() - started)
+                return "primary", result
+
+            backup = asyncio.ensure_future(secondary())
+            tasks.append(backup)
+            sources = {first: "primary", backup: "secondary"}
+            pending = {first, backup}
+            errors = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        continue
+                    source = sources[task]
+                    policy.record_latency(time.monotonic() - started)
+                    policy.count("hedge_wins" if source == "secondary" else "primary_wins")
+                    return source, task.result()
+            raise errors[0]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    # --- Plain calls ---
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if kwargs:
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        _, result = self._race(
+            lambda: self.inner._generate(messages, stop=stop),
+            lambda: self.secondary._generate(messages, stop=stop),
+        )
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if kwargs:
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        _, result = await self._arace(
+            lambda: self.inner._agenerate(messages, stop=stop),
+            lambda: self.secondary._agenerate(messages, stop=stop),
+        )
+        return result
+
+    # --- Streaming: the deadline applies to the first chunk ---
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if kwargs:
+            yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return
+        streams = {
+            "primary": self.inner._stream(messages, stop=stop),
+            "secondary": self.secondary._stream(messages, stop=stop),
+        }
+        source, first = self._race(
+            lambda: next(streams["primary"], None),
+            lambda: next(streams["secondary"], None),
+            discard_primary=streams["primary"].close,
+            discard_secondary=streams["secondary"].close,
+        )
+        # Chunks are forwarded here (inner calls get no run manager) so
+        # callbacks only ever see the winning stream.
+        chunks = streams[source]
+        while first is not None:
+            if run_manager:
+                run_manager.on_llm_new_token(first.text, chunk=first)
+            yield first
+            first = next(chunks, None)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if kwargs:
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+            return
+        streams = {
+            "primary": self.inner._astream(messages, stop=stop),
+            "secondary": self.secondary._astream(messages, stop=stop),
+        }
+
+        async def first_chunk(name: str) -> Optional[ChatGenerationChunk]:
+            try:
+                return await streams[name].__anext__()
+            except StopAsyncIteration:
+                return None
+
+        source, chunk = await self._arace(
+            lambda: first_chunk("primary"), lambda: first_chunk("secondary")
+        )
+        # The losing request was cancelled mid-stream (or never started);
+        # close its generator so the connection is released now.
+        await streams["secondary" if source == "primary" else "primary"].aclose()
+        while chunk is not None:
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            chunk = await first_chunk(source)
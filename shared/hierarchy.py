@@ -0,0 +1,300 @@
+"""
+Hierarchical intent routing for graphs with many specialists.
+
+Listing every route in one classifier prompt makes each routing call
+longer (and slower) as specialists are added. A RouteRegistry arranges
+routes in a tree of domains; HierarchicalRouter classifies coarse to fine,
+and each call's prompt lists only the children of the current domain:
+
+    registry = RouteRegistry()
+    registry.add_domain("travel", "Trips, bookings and travel logistics")
+    registry.add_route("travel/flights", "Book, change or cancel flights", node="flight_agent")
+    registry.add_route("travel/hotels", "Hotel reservations", node="hotel_agent")
+    registry.add_route("general", "Anything else", node="general_agent")
+
+    router = HierarchicalRouter(registry, default="general")
+    builder.add_node("route", router.node)
+    router.add_conditional_edges(builder, "route")   # route -> its specialist node
+
+A domain with a single child is descended without a call, and an answer
+that names no child falls back to ``default``. FlatRouter lists every
+route in one prompt and is kept as the baseline for:
+
+    python -m shared.hierarchy --routes 10 100 1000
+
+which measures latency, calls and input tokens per classification for
+both routers against the synthetic provider as the route count grows.
+"""
+
+import argparse
+import asyncio
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from shared.nodes import llm_chain
+
+
+@dataclass
+class RouteNode:
+    """A domain (with children) or a route (a leaf mapped to a graph node)."""
+
+    path: str
+    description: str
+    node: Optional[str] = None
+    children: Dict[str, "RouteNode"] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+
+class RouteRegistry:
+    """Tree of routes addressed by slash-separated paths."""
+
+    def __init__(self):
+        self.root = RouteNode("", "")
+
+    def _parent(self, path: str) -> RouteNode:
+        parent = self.root
+        for part in path.split("/")[:-1]:
+            if part not in parent.children:
+                raise KeyError(f"Unknown domain {part!r} in {path!r}; add_domain() it first")
+            parent = parent.children[part]
+        if parent.node is not None:
+            raise ValueError(f"{parent.path!r} is a route and cannot have children")
+        return parent
+
+    def add_domain(self, path: str, description: str) -> None:
+        parent = self._parent(path)
+        parent.children.setdefault(path.rsplit("/", 1)[-1], RouteNode(path, description))
+
+    def add_route(self, path: str, description: str, node: Optional[str] = None) -> None:
+        """Registers a leaf route; ``node`` defaults to the path with '/' as '_'."""
+        parent = self._parent(path)
+        name = path.rsplit("/", 1)[-1]
+        if name in parent.children:
+            raise ValueError(f"Route {path!r} is already registered")
+        parent.children[name] = RouteNode(path, description, node or path.replace("/", "_"))
+
+    def get(self, path: str) -> RouteNode:
+        current = self.root
+        for part in path.split("/"):
+            current = current.children[part]
+        return current
+
+    def routes(self) -> List[RouteNode]:
+        """All leaf routes, depth first."""
+        leaves, stack = [], list(reversed(self.root.children.values()))
+        while stack:
+            current = stack.pop()
+            if current.node is not None:
+                leaves.append(current)
+            else:
+                stack.extend(reversed(current.children.values()))
+        return leaves
+
+    def node_for(self, path: str) -> str:
+        return self.get(path).node
+
+    def nodes(self) -> List[str]:
+        return [route.node for route in self.routes()]
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _options(children: List[RouteNode], full_path: bool = False) -> str:
+    return "\n".join(f"- {c.path if full_path else c.name}: {_escape(c.description)}" for c in children)
+
+
+def _match(answer: str, candidates: Dict[str, RouteNode]) -> Optional[RouteNode]:
+    answer = answer.strip().strip("'\"`*.").lower()
+    lowered = {key.lower(): node for key, node in candidates.items()}
+    return lowered.get(answer) or lowered.get(answer.rsplit("/", 1)[-1])
+
+
+class _Router(ABC):
+    """Shared chain cache and graph wiring; subclasses decide how to classify."""
+
+    def __init__(self, registry: RouteRegistry, default: str, llm: Any = None, request_key: str = "request"):
+        self.registry = registry
+        self.default = default
+        self.llm = llm
+        self.request_key = request_key
+        self._chains: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _compile(self, key: str, system: str) -> Any:
+        chain = self._chains.get(key)
+        if chain is None:
+            with self._lock:
+                chain = self._chains.get(key)
+                if chain is None:
+                    messages = [("system", system), ("user", "{request}")]
+                    if self.llm is None:
+                        chain = llm_chain(messages, temperature=0)
+                    else:
+                        from langchain_core.output_parsers import StrOutputParser
+                        from langchain_core.prompts import ChatPromptTemplate
+
+                        chain = ChatPromptTemplate.from_messages(messages) | self.llm | StrOutputParser()
+                    self._chains[key] = chain
+        return chain
+
+    @abstractmethod
+    def classify(self, request: str, config: Optional[dict] = None) -> str:
+        """Route path for ``request``, or ``default`` if none matches."""
+
+    @abstractmethod
+    async def aclassify(self, request: str, config: Optional[dict] = None) -> str:
+        """Async classify()."""
+
+    def node(self, state: dict) -> dict:
+        """Graph node: classifies ``state[request_key]`` into ``{"route": path}``."""
+        print("--- NODE: route ---")
+        route = self.classify(state[self.request_key])
+        print(f"  Routed to: {route}")
+        return {"route": route}
+
+    def add_conditional_edges(self, builder: Any, source: str, state_key: str = "route") -> None:
+        """Edges from ``source`` to the graph node of ``state[state_key]``."""
+        nodes = self.registry.nodes()
+        builder.add_conditional_edges(
+            source,
+            lambda state: self.registry.node_for(state[state_key]),
+            {node: node for node in nodes},
+        )
+
+
+class HierarchicalRouter(_Router):
+    """Coarse-to-fine classification, one call per ambiguous level."""
+
+    def _level_chain(self, domain: RouteNode) -> Any:
+        where = f"within the '{_escape(domain.path)}' domain " if domain.path else ""
+        system = (
+            f"Classify the user's request {where}into one of these options:\n"
+            f"{_options(list(domain.children.values()))}\n"
+            "ONLY output the option name."
+        )
+        return self._compile(domain.path or "/", system)
+
+    def _step(self, domain: RouteNode, answer: Optional[str]) -> Optional[RouteNode]:
+        if len(domain.children) == 1:
+            return next(iter(domain.children.values()))
+        return _match(answer or "", domain.children)
+
+    def classify(self, request: str, config: Optional[dict] = None) -> str:
+        current = self.registry.root
+        while current.node is None:
+            answer = None
+            if len(current.children) > 1:
+                answer = self._level_chain(current).invoke({"request": request}, config)
+            current = self._step(current, answer)
+            if current is None:
+                return self.default
+        return current.path
+
+    async def aclassify(self, request: str, config: Optional[dict] = None) -> str:
+        current = self.registry.root
+        while current.node is None:
+            answer = None
+            if len(current.children) > 1:
+                answer = await self._level_chain(current).ainvoke({"request": request}, config)
+            current = self._step(current, answer)
+            if current is None:
+                return self.default
+        return current.path
+
+
+class FlatRouter(_Router):
+    """Every route in a single prompt (the baseline)."""
+
+    def _flat_chain(self) -> Any:
+        system = (
+            "Classify the user's request into one of these routes:\n"
+            f"{_options(self.registry.routes(), full_path=True)}\n"
+            "ONLY output the route name."
+        )
+        return self._compile("*", system)
+
+    def classify(self, request: str, config: Optional[dict] = None) -> str:
+        answer = self._flat_chain().invoke({"request": request}, config)
+        route = _match(answer, {r.path: r for r in self.registry.routes()})
+        return route.path if route else self.default
+
+    async def aclassify(self, request: str, config: Optional[dict] = None) -> str:
+        answer = await self._flat_chain().ainvoke({"request": request}, config)
+        route = _match(answer, {r.path: r for r in self.registry.routes()})
+        return route.path if route else self.default
+
+
+# --- Benchmark ---
+
+_FILLER = ("handles customer requests about accounts orders payments shipping returns "
+           "schedules documents devices subscriptions and related questions").split()
+
+
+def synthetic_registry(route_count: int) -> RouteRegistry:
+    """~sqrt(route_count) domains of ~sqrt(route_count) routes each."""
+    registry = RouteRegistry()
+    domains = max(1, round(math.sqrt(route_count)))
+    for d in range(domains):
+        registry.add_domain(f"d{d}", f"Domain {d}: " + " ".join(_FILLER[d % 5:d % 5 + 6]))
+    for r in range(route_count):
+        domain = r % domains
+        registry.add_route(f"d{domain}/r{r}", f"Specialist {r} " + " ".join(_FILLER[r % 7:r % 7 + 10]))
+    return registry
+
+
+def _benchmark(route_counts: List[int], requests: int, latency: float, prefill: float) -> None:
+    from shared.batchrun import UsageCounter
+    from shared.offline import SyntheticChatModel
+
+    settings = dict(latency_mean=latency, tokens_per_second=0, prefill_tokens_per_second=prefill)
+    print(f"{requests} classifications per router; synthetic latency {latency}s + prompt tokens / {prefill:g} tok/s")
+    header = f"{'routes':>7}{'router':>14}{'calls':>7}{'in tok':>9}{'ms/route':>10}"
+    print(header)
+    print("-" * len(header))
+    for count in route_counts:
+        registry = synthetic_registry(count)
+        first = registry.routes()[0]
+        domain, leaf = first.path.split("/")
+        routers = {
+            "flat": FlatRouter(registry, first.path, llm=SyntheticChatModel(responses=[first.path], **settings)),
+            "hierarchical": HierarchicalRouter(
+                registry, first.path, llm=SyntheticChatModel(responses=[domain, leaf], **settings)
+            ),
+        }
+        for name, router in routers.items():
+            router.classify("warm-up")  # compiles the prompts
+            counter = UsageCounter()
+
+            async def run() -> None:
+                for i in range(requests):
+                    route = await router.aclassify(f"request {i}", {"callbacks": [counter]})
+                    assert route == first.path, route
+
+            started = time.perf_counter()
+            asyncio.run(run())
+            elapsed = time.perf_counter() - started
+            print(f"{count:>7}{name:>14}{counter.calls / requests:>7.1f}{counter.input_tokens / requests:>9.0f}"
+                  f"{elapsed / requests * 1000:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flat vs hierarchical routing cost as the route count grows")
+    parser.add_argument("--routes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="fixed time to first token, seconds")
+    parser.add_argument("--prefill", type=float, default=20000, help="prompt tokens processed per second")
+    args = parser.parse_args()
+    _benchmark(args.routes, args.requests, args.latency, args.prefill)
+
+
+if __name__ == "__main__":
+    main()
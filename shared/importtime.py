@@ -0,0 +1,125 @@
+"""
+Startup cost of the pattern scripts.
+
+Each script is executed in a fresh interpreter under ``python -X importtime``
+with a run name other than ``__main__``, so its module body (imports, graph
+construction) runs but main() does not. The report shows the wall time of
+the process and the heaviest top-level packages it imported:
+
+    python -m shared.importtime                         # every pattern script
+    python -m shared.importtime 02_Routing/*.py --top 15
+
+With a budget it doubles as a regression check; the exit status is 1 when
+any script takes longer to start (or fails to start):
+
+    python -m shared.importtime --budget-ms 1500 --repeat 3
+
+Timings include the -X importtime overhead and the first run pays for a cold
+page cache, so --repeat keeps the fastest of several runs.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_RUNNER = "import runpy, sys; sys.argv = [sys.argv[1]]; runpy.run_path(sys.argv[0], run_name='__importtime__')"
+
+
+@dataclass
+class StartupReport:
+    script: str
+    wall_ms: float = 0.0
+    import_ms: float = 0.0
+    packages: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def default_scripts() -> List[Path]:
+    return sorted(ROOT.glob("[0-9][0-9]_*/*.py"))
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Cumulative import time in ms per top-level package.
+
+    Only modules imported directly by the script (no indentation in the
+    importtime tree) are counted, so nested imports are not double counted.
+    """
+    packages: Dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        if name[1:2] == " ":  # nested import
+            continue
+        packages[name.strip().split(".")[0]] += int(parts[1]) / 1000
+    return dict(packages)
+
+
+def measure(script: Path, env: Optional[Dict[str, str]] = None) -> StartupReport:
+    report = StartupReport(script=os.path.relpath(script, ROOT))
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RUNNER, str(script)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    report.wall_ms = (time.perf_counter() - started) * 1000
+    report.packages = parse_importtime(proc.stderr)
+    report.import_ms = sum(report.packages.values())
+    if proc.returncode != 0:
+        lines = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        report.error = lines[-1] if lines else f"exit status {proc.returncode}"
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time report and startup budget check")
+    parser.add_argument("scripts", nargs="*", type=Path, help="defaults to every pattern script")
+    parser.add_argument("--top", type=int, default=5, help="heaviest packages listed per script")
+    parser.add_argument("--repeat", type=int, default=1, help="keep the fastest of N runs")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if a script starts slower")
+    parser.add_argument("--provider", default=None, help="LLM_PROVIDER for the child processes")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.provider:
+        env["LLM_PROVIDER"] = args.provider
+    scripts = [p.resolve() for p in args.scripts] or default_scripts()
+
+    over = []
+    header = f"{'script':<58}{'wall_ms':>9}{'import_ms':>11}  heaviest imports"
+    print(header)
+    print("-" * len(header))
+    for script in scripts:
+        runs = [measure(script, env) for _ in range(max(args.repeat, 1))]
+        report = min(runs, key=lambda r: r.wall_ms)
+        heaviest = sorted(report.packages.items(), key=lambda kv: -kv[1])[: args.top]
+        detail = report.error or ", ".join(f"{name} {ms:.0f}" for name, ms in heaviest)
+        print(f"{report.script[:57]:<58}{report.wall_ms:>9.0f}{report.import_ms:>11.0f}  {detail}")
+        if args.budget_ms is not None and (report.error or report.wall_ms > args.budget_ms):
+            over.append(report)
+
+    if args.budget_ms is not None:
+        if over:
+            print(f"\n{len(over)} script(s) over the {args.budget_ms:.0f} ms startup budget:")
+            for report in over:
+                print(f"  {report.script}: {report.error or f'{report.wall_ms:.0f} ms'}")
+            raise SystemExit(1)
+        print(f"\nAll {len(scripts)} script(s) start within {args.budget_ms:.0f} ms.")
+
+
+if __name__ == "__main__":
+    main()
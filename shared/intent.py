@@ -0,0 +1,349 @@
+"""
+Local fast-path intent classification in front of an LLM router.
+
+Routing nodes spend a full model round trip to output one word. A hashed
+n-gram linear model trained on the router's own past decisions answers
+most requests in microseconds; only requests it is unsure about go to the
+LLM:
+
+    router = FastPathRouter.from_env(
+        labels=["booker", "info"],
+        fallback=lambda text: CLASSIFY_CHAIN.invoke({"request": text}),
+    )
+    label, source = router.route("Book me a flight to London")  # "local", "cache" or "llm"
+
+Configuration (environment variables):
+
+    INTENT_MODEL=intent_model.json   # trained classifier; without it every request goes to the LLM
+    INTENT_THRESHOLD=0.85            # minimum local confidence to skip the LLM
+    INTENT_LOG=routing_log.jsonl     # append every LLM decision here (training data)
+    INTENT_SHADOW_RATE=0.0           # fraction of local answers also checked against the LLM
+    ROUTE_CACHE=1                    # reuse LLM routes of near-duplicate requests (shared/routecache.py)
+
+Offline workflow: run the routing examples with INTENT_LOG set to collect
+LLM decisions, then
+
+    python -m shared.intent train routing_log.jsonl -o intent_model.json
+    python -m shared.intent eval intent_model.json routing_log.jsonl
+
+``train`` holds out a fraction of the log and reports on it; ``eval``
+prints the agreement rate with the LLM, the share of requests answered
+locally and the agreement among those at several thresholds.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from shared.routecache import RouteCache
+
+_WORD = re.compile(r"\w+")
+
+
+def _features(text: str, dim: int) -> Dict[int, float]:
+    """Hashed word 1-2 grams and character 3-grams, L2-normalized."""
+    text = text.lower()
+    words = _WORD.findall(text)
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    padded = f" {' '.join(words)} "
+    grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    counts: Dict[int, float] = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode("utf-8")) % dim
+        counts[index] = counts.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {index: value / norm for index, value in counts.items()}
+
+
+def _softmax(scores: Dict[str, float]) -> Dict[str, float]:
+    top = max(scores.values())
+    exp = {label: math.exp(score - top) for label, score in scores.items()}
+    total = sum(exp.values())
+    return {label: value / total for label, value in exp.items()}
+
+
+class HashedNgramClassifier:
+    """Multinomial logistic regression over hashed n-gram features.
+
+    Weights are sparse (one dict per label), so the model file only holds
+    features seen in training and prediction touches a few hundred floats.
+    """
+
+    def __init__(self, labels: Sequence[str], dim: int = 2 ** 20):
+        self.labels = list(labels)
+        self.dim = dim
+        self.weights: Dict[str, Dict[int, float]] = {label: {} for label in self.labels}
+        self.bias: Dict[str, float] = {label: 0.0 for label in self.labels}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        features = _features(text, self.dim)
+        scores = {}
+        for label in self.labels:
+            weights = self.weights[label]
+            scores[label] = self.bias[label] + sum(weights.get(i, 0.0) * v for i, v in features.items())
+        return _softmax(scores)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(most likely label, its probability)."""
+        proba = self.predict_proba(text)
+        label = max(proba, key=proba.get)
+        return label, proba[label]
+
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        epochs: int = 20,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0,
+    ) -> "HashedNgramClassifier":
+        """Trains with plain SGD on the cross-entropy loss."""
+        examples = [(_features(text, self.dim), label) for text, label in zip(texts, labels)]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for features, target in examples:
+                scores = {
+                    label: self.bias[label] + sum(self.weights[label].get(i, 0.0) * v for i, v in features.items())
+                    for label in self.labels
+                }
+                proba = _softmax(scores)
+                for label in self.labels:
+                    gradient = proba[label] - (1.0 if label == target else 0.0)
+                    weights = self.weights[label]
+                    for i, v in features.items():
+                        weights[i] = weights.get(i, 0.0) * (1 - rate * l2) - rate * gradient * v
+                    self.bias[label] -= rate * gradient
+        return self
+
+    def save(self, path: str) -> None:
+        data = {
+            "labels": self.labels,
+            "dim": self.dim,
+            "bias": self.bias,
+            "weights": {label: {str(i): round(w, 6) for i, w in weights.items() if abs(w) > 1e-6}
+                        for label, weights in self.weights.items()},
+        }
+        Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        model = cls(data["labels"], data["dim"])
+        model.bias = {label: float(b) for label, b in data["bias"].items()}
+        model.weights = {label: {int(i): w for i, w in weights.items()} for label, weights in data["weights"].items()}
+        return model
+
+
+class FastPathRouter:
+    """Answers from the local classifier when confident, else asks ``fallback``.
+
+    ``fallback`` takes the request text and returns the LLM's label (any
+    case or surrounding whitespace). LLM decisions that match one of
+    ``labels`` are appended to ``log_path`` for the next training run and
+    stored in ``cache``, which is consulted before the LLM.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        fallback: Callable[[str], str],
+        classifier: Optional[HashedNgramClassifier] = None,
+        threshold: float = 0.85,
+        log_path: Optional[str] = None,
+        shadow_rate: float = 0.0,
+        cache: Optional[RouteCache] = None,
+    ):
+        self.labels = list(labels)
+        self.fallback = fallback
+        self.classifier = classifier
+        self.threshold = threshold
+        self.log_path = log_path
+        self.shadow_rate = shadow_rate
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._stats = {"local": 0, "cache": 0, "llm": 0, "shadowed": 0, "shadow_agreed": 0, "local_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls, labels: Sequence[str], fallback: Callable[[str], str], **kwargs) -> "FastPathRouter":
+        model_path = os.environ.get("INTENT_MODEL")
+        classifier = None
+        if model_path and Path(model_path).exists():
+            classifier = HashedNgramClassifier.load(model_path)
+            unknown = set(classifier.labels) - set(labels)
+            if unknown:
+                raise ValueError(f"{model_path} predicts labels {sorted(unknown)} not in {list(labels)}")
+        settings = dict(
+            classifier=classifier,
+            threshold=float(os.environ.get("INTENT_THRESHOLD", 0.85)),
+            log_path=os.environ.get("INTENT_LOG") or None,
+            shadow_rate=float(os.environ.get("INTENT_SHADOW_RATE", 0)),
+            cache=RouteCache.from_env(),
+        )
+        settings.update(kwargs)
+        return cls(labels, fallback, **settings)
+
+    def _ask_llm(self, text: str) -> str:
+        label = self.fallback(text).strip().lower()
+        if label in self.labels and self.cache is not None:
+            self.cache.add(text, label)
+        if self.log_path and label in self.labels:
+            record = json.dumps({"text": text, "label": label, "ts": time.time()}, ensure_ascii=False)
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(record + "\n")
+        return label
+
+    def route(self, text: str) -> Tuple[str, str]:
+        """Returns (label, source) with source "local", "cache" or "llm"."""
+        if self.classifier is not None:
+            started = time.perf_counter()
+            label, confidence = self.classifier.predict(text)
+            elapsed = time.perf_counter() - started
+            if confidence >= self.threshold:
+                with self._lock:
+                    self._stats["local"] += 1
+                    self._stats["local_seconds"] += elapsed
+                    shadow = self._rng.random() < self.shadow_rate
+                if shadow:
+                    agreed = self._ask_llm(text) == label
+                    with self._lock:
+                        self._stats["shadowed"] += 1
+                        self._stats["shadow_agreed"] += agreed
+                return label, "local"
+        if self.cache is not None:
+            label = self.cache.lookup(text)
+            if label is not None:
+                with self._lock:
+                    self._stats["cache"] += 1
+                return label, "cache"
+        label = self._ask_llm(text)
+        with self._lock:
+            self._stats["llm"] += 1
+        return label, "llm"
+
+    def stats(self) -> Dict[str, float]:
+        """Local and cache hit rates, mean local latency and shadow agreement rate."""
+        with self._lock:
+            s = dict(self._stats)
+        total = s["local"] + s["cache"] + s["llm"]
+        return {
+            "requests": total,
+            "local_rate": s["local"] / total if total else 0.0,
+            "cache_rate": s["cache"] / total if total else 0.0,
+            "local_us": s["local_seconds"] / s["local"] * 1e6 if s["local"] else 0.0,
+            "shadowed": s["shadowed"],
+            "shadow_agreement": s["shadow_agreed"] / s["shadowed"] if s["shadowed"] else None,
+        }
+
+
+# --- Offline training and evaluation ---
+
+def load_decisions(path: str) -> Tuple[List[str], List[str]]:
+    """(texts, labels) from a JSONL log of {"text", "label"} records."""
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            texts.append(record["text"])
+            labels.append(record["label"])
+    return texts, labels
+
+
+def evaluate(
+    model: HashedNgramClassifier,
+    texts: Sequence[str],
+    labels: Sequence[str],
+    thresholds: Iterable[float] = (0.5, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99),
+) -> Dict[str, object]:
+    """Agreement with the logged LLM labels, overall and per threshold."""
+    started = time.perf_counter()
+    predictions = [model.predict(text) for text in texts]
+    elapsed = time.perf_counter() - started
+    n = len(texts)
+    agreed = [p == label for (p, _), label in zip(predictions, labels)]
+    rows = []
+    for threshold in thresholds:
+        confident = [ok for (_, c), ok in zip(predictions, agreed) if c >= threshold]
+        rows.append({
+            "threshold": threshold,
+            "coverage": len(confident) / n if n else 0.0,
+            "agreement": sum(confident) / len(confident) if confident else None,
+        })
+    confusion: Dict[str, Dict[str, int]] = {}
+    for (predicted, _), label in zip(predictions, labels):
+        confusion.setdefault(label, {}).setdefault(predicted, 0)
+        confusion[label][predicted] += 1
+    return {
+        "examples": n,
+        "agreement": sum(agreed) / n if n else 0.0,
+        "us_per_prediction": elapsed / n * 1e6 if n else 0.0,
+        "thresholds": rows,
+        "confusion": confusion,
+    }
+
+
+def print_evaluation(report: Dict[str, object]) -> None:
+    print(f"examples: {report['examples']}  agreement with LLM: {report['agreement']:.1%}  "
+          f"{report['us_per_prediction']:.0f} us/prediction")
+    print(f"{'threshold':>10}{'local':>9}{'agreement':>11}")
+    for row in report["thresholds"]:
+        agreement = f"{row['agreement']:.1%}" if row["agreement"] is not None else "-"
+        print(f"{row['threshold']:>10.2f}{row['coverage']:>9.1%}{agreement:>11}")
+    print("confusion (LLM label -> local prediction):")
+    for label, predicted in sorted(report["confusion"].items()):
+        print(f"  {label}: " + ", ".join(f"{p}={count}" for p, count in sorted(predicted.items())))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train and evaluate the local intent classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="train on a log of LLM routing decisions")
+    train.add_argument("log")
+    train.add_argument("-o", "--output", default="intent_model.json")
+    train.add_argument("--epochs", type=int, default=20)
+    train.add_argument("--dim", type=int, default=2 ** 20)
+    train.add_argument("--holdout", type=float, default=0.2, help="fraction kept out for evaluation")
+    train.add_argument("--seed", type=int, default=0)
+
+    evaluate_cmd = commands.add_parser("eval", help="agreement of a trained model with logged LLM decisions")
+    evaluate_cmd.add_argument("model")
+    evaluate_cmd.add_argument("log")
+
+    args = parser.parse_args()
+    if args.command == "train":
+        texts, labels = load_decisions(args.log)
+        order = list(range(len(texts)))
+        random.Random(args.seed).shuffle(order)
+        cut = int(len(order) * (1 - args.holdout))
+        train_idx, test_idx = order[:cut], order[cut:]
+        started = time.perf_counter()
+        model = HashedNgramClassifier(sorted(set(labels)), dim=args.dim).fit(
+            [texts[i] for i in train_idx], [labels[i] for i in train_idx], epochs=args.epochs, seed=args.seed
+        )
+        model.save(args.output)
+        print(f"trained on {len(train_idx)} decisions in {time.perf_counter() - started:.1f}s -> {args.output}")
+        if test_idx:
+            print(f"\nheld-out evaluation ({len(test_idx)} decisions):")
+            print_evaluation(evaluate(model, [texts[i] for i in test_idx], [labels[i] for i in test_idx]))
+    else:
+        texts, labels = load_decisions(args.log)
+        print_evaluation(evaluate(HashedNgramClassifier.load(args.model), texts, labels))
+
+
+if __name__ == "__main__":
+    main()
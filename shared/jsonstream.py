@@ -0,0 +1,318 @@
+"""
+Incremental JSON object parsing with early schema validation.
+
+A StrOutputParser followed by json.loads() only finds out that a model
+answered with the wrong keys or types once the whole completion has been
+generated (and paid for). StreamingJSONParser validates the object as the
+tokens arrive instead:
+
+* an unexpected key, or a value whose first character already shows the
+  wrong type, raises SchemaViolation immediately;
+* as soon as the top-level object closes the parsed dict is emitted and the
+  stream stops, so trailing prose or code fences are never generated.
+
+The schema maps each key to its allowed Python type(s); every key is
+required unless ``required`` says otherwise:
+
+    SPEC_SCHEMA = {"cpu": str, "memory": str, "storage": str}
+    stage = streamed_json_stage(llm, SPEC_SCHEMA, retries=1)
+    chain = prompt | stage          # returns the validated dict
+
+Generation only stops early while the model is being streamed, so the
+stage streams internally even when the chain is called with invoke().
+Streaming calls bypass the response cache and request coalescing, which
+only apply to complete generations; a stage that stops early has no
+complete generation to cache.
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers.transform import BaseTransformOutputParser
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+
+_NUMBER = (int, float)
+_WHITESPACE = " \t\r\n"
+
+
+class SchemaViolation(OutputParserException):
+    """The streamed JSON does not match the expected schema."""
+
+
+def _type_names(types: Any) -> str:
+    types = types if isinstance(types, tuple) else (types,)
+    return "/".join(getattr(t, "__name__", str(t)) for t in types)
+
+
+def _type_of_first_char(ch: str) -> Optional[tuple]:
+    if ch == '"':
+        return (str,)
+    if ch == "{":
+        return (dict,)
+    if ch == "[":
+        return (list,)
+    if ch in "tf":
+        return (bool,)
+    if ch == "n":
+        return (type(None),)
+    if ch == "-" or ch.isdigit():
+        return _NUMBER
+    return None
+
+
+def _matches(value: Any, types: Any) -> bool:
+    types = types if isinstance(types, tuple) else (types,)
+    if isinstance(value, bool):
+        return bool in types or object in types  # bool is an int subclass, but not a JSON number
+    if isinstance(value, int) and float in types:
+        return True  # JSON has one number type: 3 is a valid float
+    return isinstance(value, types)
+
+
+class IncrementalJSONObject:
+    """Character-level parser for one top-level JSON object.
+
+    Text before the opening brace (e.g. a ```json fence) is skipped. Only
+    top-level keys are validated; nested values are parsed whole.
+    """
+
+    def __init__(self, schema: Dict[str, Any], required: Optional[List[str]] = None, allow_extra: bool = False):
+        self.schema = schema
+        self.required = list(schema) if required is None else list(required)
+        self.allow_extra = allow_extra
+        self.result: Dict[str, Any] = {}
+        self.done = False
+        self._state = "start"
+        self._buffer: List[str] = []
+        self._key = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> bool:
+        """Consumes more text; returns True once the object has closed."""
+        for ch in text:
+            if self.done:
+                break
+            self._step(ch)
+        return self.done
+
+    # --- State machine ---
+    def _step(self, ch: str) -> None:
+        state = self._state
+        if state == "start":
+            if ch == "{":
+                self._state = "key_or_end"
+        elif state in ("key_or_end", "key"):
+            if ch in _WHITESPACE:
+                return
+            if ch == "}" and state == "key_or_end":
+                self._close()
+            elif ch == '"':
+                self._buffer, self._escape = [], False
+                self._state = "in_key"
+            else:
+                raise SchemaViolation(f"Expected a key, got {ch!r}")
+        elif state == "in_key":
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._key = json.loads('"' + "".join(self._buffer) + '"')
+                self._check_key(self._key)
+                self._state = "colon"
+                return
+            self._buffer.append(ch)
+        elif state == "colon":
+            if ch in _WHITESPACE:
+                return
+            if ch != ":":
+                raise SchemaViolation(f"Expected ':' after key {self._key!r}, got {ch!r}")
+            self._state = "value_start"
+        elif state == "value_start":
+            if ch in _WHITESPACE:
+                return
+            self._check_value_start(ch)
+            self._buffer = [ch]
+            self._depth = 1 if ch in "{[" else 0
+            self._in_string = ch == '"'
+            self._escape = False
+            self._state = "in_value"
+        elif state == "in_value":
+            self._step_value(ch)
+        elif state == "comma_or_end":
+            if ch in _WHITESPACE:
+                return
+            if ch == ",":
+                self._state = "key"
+            elif ch == "}":
+                self._close()
+            else:
+                raise SchemaViolation(f"Expected ',' or '}}' after {self._key!r}, got {ch!r}")
+
+    def _step_value(self, ch: str) -> None:
+        if self._in_string:
+            self._buffer.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 0:
+                    self._finish_value()
+                    self._state = "comma_or_end"
+            return
+        if self._depth == 0 and (ch in ",}" or ch in _WHITESPACE):
+            # End of a number or literal.
+            self._finish_value()
+            self._state = "comma_or_end"
+            if ch not in _WHITESPACE:
+                self._step(ch)
+            return
+        self._buffer.append(ch)
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_value()
+                self._state = "comma_or_end"
+
+    # --- Validation ---
+    def _check_key(self, key: str) -> None:
+        if key in self.result:
+            raise SchemaViolation(f"Duplicate key {key!r}")
+        if key not in self.schema and not self.allow_extra:
+            raise SchemaViolation(f"Unexpected key {key!r}; expected {sorted(self.schema)}")
+
+    def _check_value_start(self, ch: str) -> None:
+        expected = self.schema.get(self._key)
+        predicted = _type_of_first_char(ch)
+        if predicted is None:
+            raise SchemaViolation(f"Invalid JSON value for {self._key!r} starting with {ch!r}")
+        if expected is None:
+            return
+        expected_types = expected if isinstance(expected, tuple) else (expected,)
+        if object not in expected_types and not any(p in expected_types for p in predicted):
+            raise SchemaViolation(
+                f"Key {self._key!r} should be {_type_names(expected)}, got {_type_names(predicted)}"
+            )
+
+    def _finish_value(self) -> None:
+        raw = "".join(self._buffer)
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise SchemaViolation(f"Invalid JSON value for {self._key!r}: {raw!r}") from e
+        expected = self.schema.get(self._key)
+        if expected is not None and not _matches(value, expected):
+            raise SchemaViolation(f"Key {self._key!r} should be {_type_names(expected)}, got {value!r}")
+        self.result[self._key] = value
+
+    def _close(self) -> None:
+        missing = [key for key in self.required if key not in self.result]
+        if missing:
+            raise SchemaViolation(f"JSON object is missing required keys {missing}")
+        self.done = True
+        self._state = "done"
+
+
+def _chunk_text(chunk: Union[str, BaseMessage]) -> str:
+    if isinstance(chunk, BaseMessage):
+        return chunk.text if isinstance(chunk.text, str) else chunk.text()
+    return chunk
+
+
+class StreamingJSONParser(BaseTransformOutputParser[dict]):
+    """Output parser that validates the object while it streams.
+
+    In an LCEL chain the tokens are still drained after the object closes
+    (the chain keeps the full input for tracing); use
+    streamed_json_stage() to actually stop generation.
+    """
+
+    spec: Dict[str, Any]
+    required: Optional[List[str]] = None
+    allow_extra: bool = False
+
+    def _new_object(self) -> IncrementalJSONObject:
+        return IncrementalJSONObject(self.spec, self.required, self.allow_extra)
+
+    def parse(self, text: str) -> dict:
+        obj = self._new_object()
+        if not obj.feed(text):
+            raise SchemaViolation("Incomplete JSON object", llm_output=text)
+        return obj.result
+
+    def _transform(self, input: Iterator[Union[str, BaseMessage]]) -> Iterator[dict]:
+        obj = self._new_object()
+        for chunk in input:
+            if obj.feed(_chunk_text(chunk)):
+                yield obj.result
+                return
+        raise SchemaViolation("Incomplete JSON object")
+
+    async def _atransform(self, input: AsyncIterator[Union[str, BaseMessage]]) -> AsyncIterator[dict]:
+        obj = self._new_object()
+        async for chunk in input:
+            if obj.feed(_chunk_text(chunk)):
+                yield obj.result
+                return
+        raise SchemaViolation("Incomplete JSON object")
+
+    @property
+    def _type(self) -> str:
+        return "streaming_json"
+
+
+def streamed_json_stage(
+    llm: Any,
+    schema: Dict[str, Any],
+    retries: int = 1,
+    required: Optional[List[str]] = None,
+    allow_extra: bool = False,
+) -> RunnableLambda:
+    """Runnable taking a prompt and returning the validated dict.
+
+    The model is always streamed and the stream is closed as soon as the
+    object is complete or violates ``schema``; a violation is retried up
+    to ``retries`` times before SchemaViolation is raised.
+    """
+
+    def run(prompt: Any, config: RunnableConfig) -> dict:
+        for attempt in range(retries + 1):
+            obj = IncrementalJSONObject(schema, required, allow_extra)
+            stream = llm.stream(prompt, config)
+            try:
+                for chunk in stream:
+                    if obj.feed(_chunk_text(chunk)):
+                        return obj.result
+                raise SchemaViolation("Incomplete JSON object")
+            except SchemaViolation:
+                if attempt == retries:
+                    raise
+            finally:
+                stream.close()  # stops generation on the provider side
+
+    async def arun(prompt: Any, config: RunnableConfig) -> dict:
+        for attempt in range(retries + 1):
+            obj = IncrementalJSONObject(schema, required, allow_extra)
+            stream = llm.astream(prompt, config)
+            try:
+                async for chunk in stream:
+                    if obj.feed(_chunk_text(chunk)):
+                        return obj.result
+                raise SchemaViolation("Incomplete JSON object")
+            except SchemaViolation:
+                if attempt == retries:
+                    raise
+            finally:
+                await stream.aclose()
+
+    return RunnableLambda(run, afunc=arun, name="streamed_json")
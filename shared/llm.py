@@ -2,8 +2,19 @@
 Centralized LLM provider factory.
 
 Switches between Gemini (default) and Ollama based on the LLM_PROVIDER
-environment variable. All example scripts import get_llm() from here
-instead of instantiating the LLM directly.
+environment variable. The offline ``replay`` and ``synthetic`` providers
+(see shared/offline.py) stand in for a real model when benchmarking. All
+example scripts import get_llm() from here instead of instantiating the LLM
+directly.
+
+Importing this module is cheap: provider SDKs, LangChain and the optional
+wrapper layers are imported on first use, so a script only pays for the
+provider it actually talks to (see shared/importtime.py).
+
+Model instances are pooled per process: repeated get_llm() calls with the
+same provider, model, temperature and kwargs return the same object, so
+nodes that call get_llm() on every invocation reuse one HTTP client
+instead of paying a new connection (and TLS handshake) per request.
 
 Usage in .env:
     # Default: Gemini (requires GOOGLE_API_KEY)
@@ -12,19 +23,286 @@ Usage in .env:
     # Ollama (requires ollama running locally)
     LLM_PROVIDER=ollama
     OLLAMA_MODEL=llama3.1:8b
+
+    # Offline providers for load testing (no network), see shared/offline.py
+    LLM_PROVIDER=replay
+    REPLAY_LOG=traces/
+    LLM_PROVIDER=synthetic
+
+    # Record every call (messages, response, usage, timing) into a
+    # compressed trace log, see shared/tracelog.py
+    LLM_RECORD=traces/
+
+    # Client-side rate limits per provider, see shared/ratelimit.py
+    GEMINI_RPM=10
+    GEMINI_TPM=250000
+    GEMINI_MAX_CONCURRENCY=4
+
+    # Let an AIMD controller move the concurrency cap with observed
+    # latency and 429/5xx errors, see shared/adaptive.py
+    LLM_ADAPTIVE_CONCURRENCY=1
+
+    # Share one upstream call among concurrent identical temperature=0
+    # requests, see shared/coalesce.py
+    LLM_COALESCE=1
+
+    # Hedge slow calls to a secondary provider, see shared/hedging.py
+    LLM_HEDGE_PROVIDER=ollama
+    LLM_HEDGE_BUDGET=0.05
+
+    # Maximum number of pooled model instances (least recently used
+    # instances are dropped from the pool beyond this)
+    LLM_POOL_SIZE=32
+
+    # Persistent response cache for deterministic (temperature=0) calls,
+    # see shared/cache.py
+    LLM_CACHE=.cache/llm.sqlite
+    LLM_CACHE_TTL=86400
+    LLM_CACHE_MAX_ENTRIES=50000
 """
 
 import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Hashable, Optional, Tuple
+
+from shared.env import load_env
+
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+    from shared.cache import SQLiteLLMCache
+    from shared.tracelog import TraceRecorder
+
+load_env()
+
+DEFAULT_POOL_SIZE = 32
+
+
+class _ModelRegistry:
+    """Thread-safe LRU registry of chat model instances.
+
+    Keys are built from (provider, model, temperature, kwargs). When the
+    registry grows past ``max_size`` the least recently used instance is
+    dropped from the pool. It is not closed: chains built earlier may still
+    hold it, so its HTTP clients are left to the garbage collector once the
+    last holder lets go. Only close_all() closes models explicitly.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE):
+        self.max_size = max_size
+        self._models: "OrderedDict[Hashable, BaseChatModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory) -> "BaseChatModel":
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+            # Building a model does not perform network I/O, so it is
+            # cheap enough to do while holding the lock and guarantees a
+            # single instance per key.
+            model = factory()
+            self._models[key] = model
+            while len(self._models) > max(self.max_size, 1):
+                self._models.popitem(last=False)
+        return model
+
+    def close_all(self) -> None:
+        with self._lock:
+            models = list(self._models.values())
+            self._models.clear()
+        for model in models:
+            _close_model(model)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Converts kwargs values into something usable as a dict key."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _close_model(model: Any) -> None:
+    """Best-effort close of the HTTP clients held by a chat model."""
+    import asyncio
+    import inspect
+
+    for attr in ("inner", "secondary"):
+        wrapped = getattr(model, attr, None)
+        if wrapped is not None:
+            _close_model(wrapped)
+    for attr in ("client", "_client", "async_client", "_async_client"):
+        client = getattr(model, attr, None)
+        close = getattr(client, "close", None)
+        if not callable(close):
+            continue
+        try:
+            if inspect.iscoroutinefunction(close):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    asyncio.run(close())
+                # Inside a running loop the client is left to be garbage
+                # collected; we cannot block on it here.
+            else:
+                close()
+        except Exception:
+            pass
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _pool_size() -> int:
+    try:
+        return int(os.environ.get("LLM_POOL_SIZE", DEFAULT_POOL_SIZE))
+    except ValueError:
+        return DEFAULT_POOL_SIZE
+
+
+_registry = _ModelRegistry(_pool_size())
+
+_cache_lock = threading.Lock()
+_response_cache = None
+_recorder_lock = threading.Lock()
+_recorder = None
+
+
+def get_response_cache() -> Optional["SQLiteLLMCache"]:
+    """Returns the process-wide response cache, or None if LLM_CACHE is unset."""
+    global _response_cache
+    path = os.environ.get("LLM_CACHE")
+    if not path:
+        return None
+    with _cache_lock:
+        if _response_cache is None:
+            from shared.cache import SQLiteLLMCache
+
+            _response_cache = SQLiteLLMCache(
+                path,
+                ttl=float(os.environ.get("LLM_CACHE_TTL", 0)),
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 0)),
+            )
+        return _response_cache
 
-from dotenv import load_dotenv
-from langchain_core.language_models.chat_models import BaseChatModel
 
-load_dotenv()
+def get_recorder() -> Optional["TraceRecorder"]:
+    """Returns the process-wide trace recorder, or None if LLM_RECORD is unset."""
+    global _recorder
+    path = os.environ.get("LLM_RECORD")
+    if not path:
+        return None
+    with _recorder_lock:
+        if _recorder is None:
+            from shared.tracelog import DEFAULT_SEGMENT_BYTES, TraceLog, TraceRecorder
 
+            segment_mb = os.environ.get("LLM_RECORD_SEGMENT_MB")
+            segment_bytes = int(float(segment_mb) * 1024 * 1024) if segment_mb else DEFAULT_SEGMENT_BYTES
+            _recorder = TraceRecorder(TraceLog(path, segment_bytes=segment_bytes))
+        return _recorder
 
-def get_llm(temperature: float = 0, **kwargs) -> BaseChatModel:
+
+def _build_provider_model(provider: str, model: str, temperature: float, **kwargs) -> "BaseChatModel":
+    if provider == "ollama":
+        from langchain_ollama import ChatOllama
+
+        return ChatOllama(model=model, temperature=temperature, **kwargs)
+
+    if provider == "replay":
+        from shared.offline import ReplayChatModel
+
+        return ReplayChatModel.from_env(temperature=temperature, **kwargs)
+
+    if provider == "synthetic":
+        from shared.offline import SyntheticChatModel
+
+        return SyntheticChatModel.from_env(temperature=temperature, **kwargs)
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature, **kwargs)
+
+
+def _rate_limited(provider: str, llm: "BaseChatModel") -> "BaseChatModel":
+    from shared.ratelimit import RateLimitedChatModel, get_limiter
+
+    limiter = get_limiter(provider)
+    if limiter is None:
+        return llm
+    return RateLimitedChatModel(inner=llm, limiter=limiter)
+
+
+def _resolve_model(provider: str) -> Tuple[str, str]:
+    """Normalizes a provider name and returns (provider, model name)."""
+    if provider == "ollama":
+        return provider, os.environ.get("OLLAMA_MODEL", "llama3.1:8b")
+    if provider in ("replay", "synthetic"):
+        return provider, provider
+    # Default: Gemini
+    return "gemini", os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+
+
+def _build_llm(provider: str, model: str, temperature: float, **kwargs) -> "BaseChatModel":
+    # Cache and callbacks belong on the outermost model so they fire once
+    # per call, before any wrapper layer (see shared/wrappers.py).
+    cache = kwargs.pop("cache", None)
+    if cache is None and temperature == 0:
+        cache = get_response_cache()
+    callbacks = list(kwargs.pop("callbacks", None) or [])
+    recorder = get_recorder()
+    if recorder is not None:
+        callbacks.append(recorder)
+
+    llm = _rate_limited(provider, _build_provider_model(provider, model, temperature, **kwargs))
+
+    hedge_provider = os.environ.get("LLM_HEDGE_PROVIDER", "").lower()
+    if hedge_provider and hedge_provider != provider:
+        from shared.hedging import HedgedChatModel, get_hedge_policy
+
+        # Constructor kwargs are provider specific, so the secondary only
+        # shares the temperature.
+        hedge_provider, hedge_model = _resolve_model(hedge_provider)
+        secondary = _rate_limited(
+            hedge_provider, _build_provider_model(hedge_provider, hedge_model, temperature)
+        )
+        llm = HedgedChatModel(inner=llm, secondary=secondary, policy=get_hedge_policy())
+
+    if temperature == 0 and _env_flag("LLM_COALESCE"):
+        from shared.coalesce import CoalescingChatModel
+
+        llm = CoalescingChatModel(inner=llm)
+
+    if cache is not None:
+        llm.cache = cache
+    if callbacks:
+        llm.callbacks = callbacks
+    return llm
+
+
+def get_llm(temperature: float = 0, **kwargs) -> "BaseChatModel":
     """Returns a chat LLM instance based on the LLM_PROVIDER env var.
 
+    Instances are shared: calls with the same provider, model, temperature
+    and kwargs return the same pooled object. When LLM_CACHE is set,
+    deterministic (temperature=0) models answer repeated calls from the
+    persistent response cache. When LLM_RECORD is set, every call is
+    appended to the trace log. Providers with RPM/TPM/concurrency limits
+    configured queue calls until they fit the budget. With
+    LLM_HEDGE_PROVIDER set, slow calls are hedged to that provider.
+
     Args:
         temperature: Sampling temperature (0 = deterministic).
         **kwargs: Extra arguments passed to the underlying model constructor
@@ -33,17 +311,21 @@ def get_llm(temperature: float = 0, **kwargs) -> BaseChatModel:
     Supported providers:
         gemini  - Google Gemini via langchain-google-genai (default).
         ollama  - Local models via langchain-ollama.
+        replay    - Responses served from a recorded log (offline).
+        synthetic - Canned responses with simulated latency (offline).
     """
-    provider = os.environ.get("LLM_PROVIDER", "gemini").lower()
+    provider, model = _resolve_model(os.environ.get("LLM_PROVIDER", "gemini").lower())
 
-    if provider == "ollama":
-        from langchain_ollama import ChatOllama
+    key = (provider, model, float(temperature), _freeze(kwargs))
+    return _registry.get_or_create(
+        key, lambda: _build_llm(provider, model, temperature, **kwargs)
+    )
 
-        model = os.environ.get("OLLAMA_MODEL", "llama3.1:8b")
-        return ChatOllama(model=model, temperature=temperature, **kwargs)
 
-    # Default: Gemini
-    from langchain_google_genai import ChatGoogleGenerativeAI
+def close_all() -> None:
+    """Closes and drops every pooled model instance.
 
-    model = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
-    return ChatGoogleGenerativeAI(model=model, temperature=temperature, **kwargs)
+    Meant for process shutdown: chains still holding one of these models
+    will fail on their next call.
+    """
+    _registry.close_all()
@@ -0,0 +1,469 @@
+"""
+Offline chat models for benchmarking and load testing.
+
+Two providers that never touch the network, selected through get_llm():
+
+    # Replay responses recorded from real traffic
+    LLM_PROVIDER=replay
+    REPLAY_LOG=traces/           # LLM_RECORD directory, or a JSONL file
+    REPLAY_TIMING=1              # reproduce recorded latency (0 = instant)
+
+    # Canned responses with a configurable latency/throughput/error profile
+    LLM_PROVIDER=synthetic
+    SYNTHETIC_LATENCY=lognormal  # fixed | lognormal | histogram
+    SYNTHETIC_LATENCY_MEAN=0.8   # seconds to first token (median for lognormal)
+    SYNTHETIC_LATENCY_SIGMA=0.5  # lognormal shape
+    SYNTHETIC_LATENCY_HISTOGRAM=latencies.json  # JSON list of seconds,
+                                                # or an LLM_RECORD directory
+    SYNTHETIC_TOKENS_PER_SECOND=50
+    SYNTHETIC_PREFILL_TOKENS_PER_SECOND=0  # adds prompt tokens / rate to the latency (0 = off)
+    SYNTHETIC_OUTPUT_TOKENS=64
+    SYNTHETIC_ERROR_RATE=0.0     # fraction of calls failing with a 429
+    SYNTHETIC_CAPACITY=8         # calls in flight beyond this fail with a 429
+    SYNTHETIC_SEED=42
+
+Both implement sync, async, batch and streaming calls, so any graph in the
+repository can be driven end to end to measure orchestration overhead and
+concurrency scaling. They also simulate a batch endpoint (one round trip
+for several prompts) used by the micro-batcher in shared/batching.py.
+"""
+
+import asyncio
+import contextlib
+import gzip
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+def serialize_messages(messages: Sequence[BaseMessage]) -> List[Dict[str, str]]:
+    """Reduces messages to the (type, content) pairs used for prompt hashing."""
+    return [{"type": m.type, "content": _message_text(m)} for m in messages]
+
+
+def prompt_hash(messages: Sequence[Any]) -> str:
+    """Stable hash of a prompt, shared by the recorder and the replay provider.
+
+    Accepts either message objects or their serialized dict form.
+    """
+    if messages and isinstance(messages[0], BaseMessage):
+        messages = serialize_messages(messages)
+    payload = json.dumps(messages, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _split_tokens(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text) or [text]
+
+
+class SyntheticProviderError(RuntimeError):
+    """Injected provider failure; ``status_code`` mimics the HTTP status."""
+
+    def __init__(self, message: str, status_code: int = 429):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ReplayMissError(KeyError):
+    """Raised when the replay log holds no response for a prompt."""
+
+
+@dataclass
+class _Plan:
+    text: str
+    ttft: float
+    tokens_per_second: float
+    input_tokens: int
+
+
+class _OfflineChatModel(BaseChatModel):
+    """Shared timing/streaming logic; subclasses only decide what to answer.
+
+    BaseChatModel's (pydantic) metaclass derives from ABCMeta, so the
+    abstract methods below are enforced at instantiation.
+    """
+
+    @abstractmethod
+    def _plan(self, messages: List[BaseMessage]) -> _Plan:
+        """The response, timing and input token count for one call."""
+
+    def _occupy(self):
+        """Context held while a call is in flight (for simulated capacity)."""
+        return contextlib.nullcontext()
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        """Binds ``tools`` as the ``tools`` call kwarg (so traces and cache
+        keys record them, as for a real provider). Offline models never
+        emit tool calls: a ``tool_choice`` that requires one raises ValueError."""
+        if tool_choice not in (None, False, "auto", "none"):
+            raise ValueError(
+                f"{self._llm_type} models never call tools; tool_choice={tool_choice!r} cannot be honoured"
+            )
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    @staticmethod
+    def _token_delay(plan: _Plan) -> float:
+        if plan.tokens_per_second <= 0:
+            return 0.0
+        return 1.0 / plan.tokens_per_second
+
+    @staticmethod
+    def _result(plan: _Plan) -> ChatResult:
+        output_tokens = len(_split_tokens(plan.text))
+        message = AIMessage(
+            content=plan.text,
+            usage_metadata={
+                "input_tokens": plan.input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": plan.input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _has_batch_endpoint(self) -> bool:
+        return True
+
+    def _batch_delay(self, plans: List[_Plan]) -> float:
+        # A batch endpoint answers all prompts in one round trip that lasts
+        # as long as its slowest member.
+        return max(p.ttft + len(_split_tokens(p.text)) * self._token_delay(p) for p in plans)
+
+    def _generate_batch(self, prompts: List[List[BaseMessage]], stop: Optional[List[str]] = None, **kwargs: Any) -> List[ChatResult]:
+        plans = [self._plan(messages) for messages in prompts]
+        with self._occupy():
+            time.sleep(self._batch_delay(plans))
+        return [self._result(plan) for plan in plans]
+
+    async def _agenerate_batch(
+        self, prompts: List[List[BaseMessage]], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> List[ChatResult]:
+        plans = [self._plan(messages) for messages in prompts]
+        with self._occupy():
+            await asyncio.sleep(self._batch_delay(plans))
+        return [self._result(plan) for plan in plans]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        plan = self._plan(messages)
+        tokens = _split_tokens(plan.text)
+        with self._occupy():
+            time.sleep(plan.ttft + len(tokens) * self._token_delay(plan))
+        return self._result(plan)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        plan = self._plan(messages)
+        tokens = _split_tokens(plan.text)
+        with self._occupy():
+            await asyncio.sleep(plan.ttft + len(tokens) * self._token_delay(plan))
+        return self._result(plan)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        plan = self._plan(messages)
+        delay = self._token_delay(plan)
+        with self._occupy():
+            time.sleep(plan.ttft)
+            for token in _split_tokens(plan.text):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+                if delay:
+                    time.sleep(delay)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        plan = self._plan(messages)
+        delay = self._token_delay(plan)
+        with self._occupy():
+            await asyncio.sleep(plan.ttft)
+            for token in _split_tokens(plan.text):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    await run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+                if delay:
+                    await asyncio.sleep(delay)
+
+
+def _load_histogram(path: str) -> List[float]:
+    if os.path.isdir(path):
+        from shared.tracelog import TraceLog
+
+        return [
+            float(r["ttft"] if r.get("ttft") is not None else r["wall_time"])
+            for r in TraceLog(path)
+            if not r.get("error") and r.get("wall_time") is not None
+        ]
+    with open(path) as f:
+        values = json.load(f)
+    return [float(v) for v in values]
+
+
+class SyntheticChatModel(_OfflineChatModel):
+    """Generates canned text with a configurable latency distribution.
+
+    Time to first token is drawn from ``latency`` (fixed, lognormal or an
+    empirical histogram), plus prompt tokens / ``prefill_tokens_per_second``
+    when that is set; tokens are emitted at ``tokens_per_second`` and a
+    fraction ``error_rate`` of calls fail with a SyntheticProviderError.
+    With ``capacity`` set, calls arriving while that many are already in
+    flight are rejected with a 429, like an overloaded provider.
+    """
+
+    model: str = "synthetic"
+    temperature: float = 0
+    latency: str = "fixed"
+    latency_mean: float = 0.5
+    latency_sigma: float = 0.5
+    histogram: List[float] = Field(default_factory=list)
+    tokens_per_second: float = 50.0
+    prefill_tokens_per_second: float = 0.0
+    output_tokens: int = 64
+    error_rate: float = 0.0
+    error_status: int = 429
+    capacity: Optional[int] = None
+    responses: List[str] = Field(default_factory=list)
+    seed: Optional[int] = None
+
+    _rng: random.Random = PrivateAttr()
+    _counter: int = PrivateAttr(default=0)
+    _in_flight: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @contextlib.contextmanager
+    def _occupy(self):
+        with self._lock:
+            if self.capacity is not None and self._in_flight >= self.capacity:
+                raise SyntheticProviderError("Synthetic provider over capacity", 429)
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    @classmethod
+    def from_env(cls, temperature: float = 0, **kwargs: Any) -> "SyntheticChatModel":
+        histogram_path = os.environ.get("SYNTHETIC_LATENCY_HISTOGRAM")
+        seed = os.environ.get("SYNTHETIC_SEED")
+        capacity = os.environ.get("SYNTHETIC_CAPACITY")
+        settings = dict(
+            temperature=temperature,
+            latency=os.environ.get("SYNTHETIC_LATENCY", "fixed").lower(),
+            latency_mean=float(os.environ.get("SYNTHETIC_LATENCY_MEAN", 0.5)),
+            latency_sigma=float(os.environ.get("SYNTHETIC_LATENCY_SIGMA", 0.5)),
+            histogram=_load_histogram(histogram_path) if histogram_path else [],
+            tokens_per_second=float(os.environ.get("SYNTHETIC_TOKENS_PER_SECOND", 50)),
+            prefill_tokens_per_second=float(os.environ.get("SYNTHETIC_PREFILL_TOKENS_PER_SECOND", 0)),
+            output_tokens=int(os.environ.get("SYNTHETIC_OUTPUT_TOKENS", 64)),
+            error_rate=float(os.environ.get("SYNTHETIC_ERROR_RATE", 0)),
+            capacity=int(capacity) if capacity else None,
+            seed=int(seed) if seed is not None else None,
+        )
+        settings.update(kwargs)
+        return cls(**settings)
+
+    @property
+    def _llm_type(self) -> str:
+        return "synthetic"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "temperature": self.temperature}
+
+    def _sample_latency(self) -> float:
+        if self.latency == "lognormal":
+            return self._rng.lognormvariate(math.log(max(self.latency_mean, 1e-6)), self.latency_sigma)
+        if self.latency == "histogram" and self.histogram:
+            return self._rng.choice(self.histogram)
+        return self.latency_mean
+
+    def _text(self, messages: List[BaseMessage], index: int) -> str:
+        if self.responses:
+            return self.responses[index % len(self.responses)]
+        last = _message_text(messages[-1]) if messages else ""
+        words = [f"Synthetic response {index} to: {last[:80]}"]
+        filler = "lorem ipsum dolor sit amet consectetur adipiscing elit".split()
+        while len(" ".join(words).split()) < self.output_tokens:
+            words.append(filler[len(words) % len(filler)])
+        return " ".join(words)
+
+    def _plan(self, messages: List[BaseMessage]) -> _Plan:
+        with self._lock:
+            index = self._counter
+            self._counter += 1
+            failed = self._rng.random() < self.error_rate
+            ttft = self._sample_latency()
+        if failed:
+            raise SyntheticProviderError(
+                f"Synthetic provider error {self.error_status}", self.error_status
+            )
+        prompt_text = "".join(_message_text(m) for m in messages)
+        input_tokens = estimate_tokens(prompt_text)
+        if self.prefill_tokens_per_second > 0:
+            ttft += input_tokens / self.prefill_tokens_per_second
+        return _Plan(
+            text=self._text(messages, index),
+            ttft=ttft,
+            tokens_per_second=self.tokens_per_second,
+            input_tokens=input_tokens,
+        )
+
+
+def _open_log(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _iter_log(path: str) -> Iterator[dict]:
+    if os.path.isdir(path):
+        from shared.tracelog import TraceLog
+
+        yield from TraceLog(path)
+        return
+    with _open_log(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_replay_records(path: str) -> Dict[str, List[dict]]:
+    """Reads a recorded log into prompt-hash -> records.
+
+    ``path`` is either an LLM_RECORD trace directory (see shared/tracelog.py)
+    or a JSONL file (optionally gzipped). Each record holds ``messages``
+    (list of {"type", "content"}) and ``response``; ``wall_time`` and
+    ``ttft`` are used when replaying with recorded timing. Failed calls are
+    skipped.
+    """
+    records: Dict[str, List[dict]] = {}
+    for record in _iter_log(path):
+        if record.get("response") is None:
+            continue
+        key = record.get("prompt_hash") or prompt_hash(record["messages"])
+        records.setdefault(key, []).append(record)
+    return records
+
+
+class ReplayChatModel(_OfflineChatModel):
+    """Serves responses recorded from real traffic, looked up by prompt hash.
+
+    When a prompt was recorded several times the responses are served in
+    rotation. With ``use_recorded_timing`` the original time to first token
+    and generation time are reproduced.
+    """
+
+    model: str = "replay"
+    temperature: float = 0
+    log_path: str
+    use_recorded_timing: bool = True
+
+    _records: Dict[str, List[dict]] = PrivateAttr(default_factory=dict)
+    _cursors: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._records = load_replay_records(self.log_path)
+
+    @classmethod
+    def from_env(cls, temperature: float = 0, **kwargs: Any) -> "ReplayChatModel":
+        path = os.environ.get("REPLAY_LOG")
+        if not path:
+            raise ValueError("LLM_PROVIDER=replay requires REPLAY_LOG to point at a recorded log")
+        settings = dict(
+            temperature=temperature,
+            log_path=path,
+            use_recorded_timing=os.environ.get("REPLAY_TIMING", "1") not in ("0", "false", "no"),
+        )
+        settings.update(kwargs)
+        return cls(**settings)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "log_path": self.log_path}
+
+    def _plan(self, messages: List[BaseMessage]) -> _Plan:
+        key = prompt_hash(messages)
+        with self._lock:
+            candidates = self._records.get(key)
+            if not candidates:
+                raise ReplayMissError(f"No recorded response for prompt {key[:12]}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+        record = candidates[cursor % len(candidates)]
+        text = record["response"]
+        ttft = tokens_per_second = 0.0
+        if self.use_recorded_timing:
+            wall_time = float(record.get("wall_time") or 0.0)
+            ttft = float(record.get("ttft") or wall_time)
+            generation_time = max(wall_time - ttft, 0.0)
+            if generation_time > 0:
+                tokens_per_second = len(_split_tokens(text)) / generation_time
+        prompt_text = "".join(m["content"] for m in serialize_messages(messages))
+        return _Plan(
+            text=text,
+            ttft=ttft,
+            tokens_per_second=tokens_per_second,
+            input_tokens=estimate_tokens(prompt_text),
+        )
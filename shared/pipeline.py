@@ -0,0 +1,89 @@
+"""
+Pipelined execution of multi-stage chains.
+
+In a plain LCEL chain a stage starts only when the previous one has
+finished. When the upstream output is a sequence of independent units (one
+specification per line, one item per list entry), the downstream stage can
+instead start on each unit as soon as it has been streamed:
+
+    lines = aiter_lines(extraction_chain.astream(inputs))
+    async for fields in pipelined(lines, transform_one_line):
+        ...
+
+End-to-end latency then approaches the slowest stage plus one unit, rather
+than the sum of all stages.
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+
+async def aiter_lines(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Re-chunks a token stream into complete, non-empty lines."""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield line.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def pipelined(
+    units: AsyncIterator[T],
+    stage: Callable[[T], Awaitable[R]],
+    max_concurrency: int = 8,
+) -> AsyncIterator[R]:
+    """Runs ``stage`` on each unit as soon as it arrives.
+
+    Results are yielded in completion order. At most ``max_concurrency``
+    stage calls run at once; an error in the upstream stream or in any
+    stage cancels the rest and is raised to the consumer as soon as it
+    happens, without waiting for the upstream to finish.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(unit: T) -> None:
+        async with semaphore:
+            result = await stage(unit)
+        queue.put_nowait((result, None))
+
+    def failed(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            queue.put_nowait((_DONE, task.exception()))
+
+    async def feed() -> None:
+        tasks = []
+        try:
+            async for unit in units:
+                task = asyncio.create_task(run(unit))
+                task.add_done_callback(failed)
+                tasks.append(task)
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            queue.put_nowait((_DONE, e))
+        else:
+            queue.put_nowait((_DONE, None))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            result, error = await queue.get()
+            if result is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield result
+    finally:
+        feeder.cancel()
@@ -0,0 +1,418 @@
+"""
+Client-side rate limiting per LLM provider.
+
+get_llm() puts a RateLimitedChatModel in front of the provider model when
+any limit is configured. Every model of the same provider in the process
+shares one ProviderLimiter, which enforces:
+
+    GEMINI_RPM=10                # requests per minute
+    GEMINI_TPM=250000            # estimated tokens per minute
+    GEMINI_MAX_CONCURRENCY=4     # calls in flight
+
+(``OLLAMA_*`` / ``SYNTHETIC_*`` likewise; ``LLM_RPM``, ``LLM_TPM`` and
+``LLM_MAX_CONCURRENCY`` apply to every provider.) ``LLM_BURST_SECONDS``
+(default 1) sets how much of the per-minute budget can be spent at once.
+With ``LLM_ADAPTIVE_CONCURRENCY=1`` the in-flight cap is driven by an AIMD
+controller instead (see shared/adaptive.py).
+
+Callers over budget are queued in arrival order -- threads and asyncio
+tasks share the same FIFO -- instead of being sent to the provider to
+collect a 429. Token costs are estimated up front (prompt size plus the
+expected completion) and corrected with the real usage_metadata once the
+call returns. ``stats()`` reports queue depth and wait times.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from shared.offline import estimate_tokens, serialize_messages
+from shared.wrappers import DelegatingChatModel
+
+WAIT_HISTORY = 1024
+
+
+class _Waiter:
+    __slots__ = ("cost", "enqueued", "event", "loop", "future", "granted", "granted_at", "wait")
+
+    def __init__(self, cost: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.cost = cost
+        self.enqueued = time.monotonic()
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+        self.granted = False
+        self.granted_at = 0.0
+        self.wait = 0.0
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ProviderLimiter:
+    """Token buckets for requests and tokens plus an in-flight cap.
+
+    Grants are issued strictly in arrival order: a large request at the
+    head of the queue is not overtaken by smaller ones behind it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        burst_seconds: float = 1.0,
+    ):
+        self.name = name
+        self.rpm = rpm or None
+        self.tpm = tpm or None
+        self.max_concurrency = max_concurrency or None
+        # Optional AdaptiveConcurrencyController (shared/adaptive.py) that
+        # moves max_concurrency based on observed latency and errors.
+        self.controller = None
+        self._req_rate = self.rpm / 60 if self.rpm else 0.0
+        self._tok_rate = self.tpm / 60 if self.tpm else 0.0
+        self._req_capacity = max(1.0, self._req_rate * burst_seconds)
+        self._tok_capacity = max(1.0, self._tok_rate * burst_seconds)
+        self._req_tokens = self._req_capacity
+        self._tok_tokens = self._tok_capacity
+        self._refilled = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._queue: Deque[_Waiter] = deque()
+        self._in_flight = 0
+        self._timer: Optional[threading.Timer] = None
+        self._timer_deadline = 0.0
+
+        self._admitted = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+        self._waits: Deque[float] = deque(maxlen=WAIT_HISTORY)
+
+    # --- Bucket bookkeeping (call with the lock held) ---
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled
+        self._refilled = now
+        if self.rpm:
+            self._req_tokens = min(self._req_capacity, self._req_tokens + elapsed * self._req_rate)
+        if self.tpm:
+            self._tok_tokens = min(self._tok_capacity, self._tok_tokens + elapsed * self._tok_rate)
+
+    def _delay_for(self, waiter: _Waiter) -> float:
+        delay = 0.0
+        if self.rpm and self._req_tokens < 1:
+            delay = (1 - self._req_tokens) / self._req_rate
+        if self.tpm:
+            # Requests larger than the burst only need a full bucket; the
+            # bucket then goes negative and delays whoever comes next.
+            needed = min(waiter.cost, self._tok_capacity)
+            if self._tok_tokens < needed:
+                delay = max(delay, (needed - self._tok_tokens) / self._tok_rate)
+        return delay
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        while self._queue:
+            if self.max_concurrency is not None and self._in_flight >= self.max_concurrency:
+                return  # release() dispatches again
+            waiter = self._queue[0]
+            delay = self._delay_for(waiter)
+            if delay > 0:
+                self._schedule(delay)
+                return
+            self._queue.popleft()
+            if self.rpm:
+                self._req_tokens -= 1
+            if self.tpm:
+                self._tok_tokens -= waiter.cost
+            self._in_flight += 1
+            self._grant(waiter, now)
+
+    def _grant(self, waiter: _Waiter, now: float) -> None:
+        waiter.granted = True
+        waiter.granted_at = now
+        waiter.wait = now - waiter.enqueued
+        self._admitted += 1
+        self._total_wait += waiter.wait
+        self._waits.append(waiter.wait)
+        if waiter.future is None:
+            waiter.event.set()
+            return
+        try:
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+        except RuntimeError:
+            # The caller's event loop is gone; give the slot back.
+            self._in_flight -= 1
+
+    def _schedule(self, delay: float) -> None:
+        deadline = time.monotonic() + delay
+        if self._timer is not None and self._timer_deadline <= deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer_deadline = deadline
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        with self._lock:
+            self._queue.append(waiter)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            self._dispatch()
+
+    # --- Public API ---
+    def acquire(self, cost: int = 0) -> _Waiter:
+        """Blocks the calling thread until the request fits the budget."""
+        waiter = _Waiter(cost)
+        self._enqueue(waiter)
+        waiter.event.wait()
+        return waiter
+
+    async def aacquire(self, cost: int = 0) -> _Waiter:
+        """Waits (without blocking the event loop) until the request fits."""
+        waiter = _Waiter(cost, loop=asyncio.get_running_loop())
+        self._enqueue(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                else:
+                    self._queue.remove(waiter)
+                self._dispatch()
+            raise
+        return waiter
+
+    def release(
+        self,
+        ticket: _Waiter,
+        actual_tokens: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Frees the in-flight slot and corrects the token estimate."""
+        with self._lock:
+            self._in_flight -= 1
+            if self.tpm and actual_tokens is not None:
+                self._tok_tokens = min(
+                    self._tok_capacity, self._tok_tokens + ticket.cost - actual_tokens
+                )
+            self._dispatch()
+        if self.controller is not None:
+            self.controller.on_result(time.monotonic() - ticket.granted_at, error)
+
+    def set_max_concurrency(self, limit: Optional[int]) -> None:
+        with self._lock:
+            self.max_concurrency = limit or None
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        adaptive = self.controller.stats() if self.controller is not None else None
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "provider": self.name,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "admitted": self._admitted,
+                "wait_avg": self._total_wait / self._admitted if self._admitted else 0.0,
+                "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0,
+                "adaptive": adaptive,
+            }
+
+
+_limiters: Dict[str, Optional[ProviderLimiter]] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_value(provider: str, name: str) -> Optional[str]:
+    return os.environ.get(f"{provider.upper()}_{name}") or os.environ.get(f"LLM_{name}")
+
+
+def _env_number(provider: str, name: str) -> Optional[float]:
+    value = _env_value(provider, name)
+    return float(value) if value else None
+
+
+def get_limiter(provider: str) -> Optional[ProviderLimiter]:
+    """Returns the shared limiter for a provider, or None if it has no limits."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            rpm = _env_number(provider, "RPM")
+            tpm = _env_number(provider, "TPM")
+            concurrency = _env_number(provider, "MAX_CONCURRENCY")
+            adaptive = (_env_value(provider, "ADAPTIVE_CONCURRENCY") or "").lower() in ("1", "true", "yes")
+            limiter = None
+            if rpm or tpm or concurrency or adaptive:
+                limiter = ProviderLimiter(
+                    provider,
+                    rpm=rpm,
+                    tpm=tpm,
+                    max_concurrency=int(concurrency) if concurrency else None,
+                    burst_seconds=float(os.environ.get("LLM_BURST_SECONDS", 1.0)),
+                )
+            if adaptive:
+                from shared.adaptive import AdaptiveConcurrencyController
+
+                limiter.controller = AdaptiveConcurrencyController(
+                    limiter,
+                    initial=int(_env_number(provider, "ADAPTIVE_INITIAL") or 4),
+                    min_limit=int(_env_number(provider, "ADAPTIVE_MIN") or 1),
+                    max_limit=int(concurrency or 64),
+                    latency_target=_env_number(provider, "ADAPTIVE_LATENCY_TARGET"),
+                )
+            _limiters[provider] = limiter
+        return _limiters[provider]
+
+
+def limiter_stats() -> List[Dict[str, Any]]:
+    """Stats of every active provider limiter."""
+    with _limiters_lock:
+        limiters = [limiter for limiter in _limiters.values() if limiter is not None]
+    return [limiter.stats() for limiter in limiters]
+
+
+def _usage_tokens(message: Any) -> Optional[int]:
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("total_tokens")
+    return None
+
+
+class RateLimitedChatModel(DelegatingChatModel):
+    """Holds each call until the provider's limiter admits it."""
+
+    limiter: ProviderLimiter
+
+    def _cost(self, messages: List[BaseMessage], kwargs: Dict[str, Any]) -> int:
+        prompt = "".join(m["content"] for m in serialize_messages(messages))
+        return estimate_tokens(prompt) + self.expected_output_tokens(**kwargs)
+
+    def _generate_batch(self, prompts: List[List[BaseMessage]], stop: Optional[List[str]] = None, **kwargs: Any) -> List[ChatResult]:
+        # A batch endpoint call is one request carrying every prompt's tokens.
+        ticket = self.limiter.acquire(sum(self._cost(m, kwargs) for m in prompts))
+        actual = error = None
+        try:
+            results = super()._generate_batch(prompts, stop=stop, **kwargs)
+            actual = sum(_usage_tokens(r.generations[0].message) or 0 for r in results)
+            return results
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(ticket, actual, error)
+
+    async def _agenerate_batch(
+        self, prompts: List[List[BaseMessage]], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> List[ChatResult]:
+        ticket = await self.limiter.aacquire(sum(self._cost(m, kwargs) for m in prompts))
+        actual = error = None
+        try:
+            results = await super()._agenerate_batch(prompts, stop=stop, **kwargs)
+            actual = sum(_usage_tokens(r.generations[0].message) or 0 for r in results)
+            return results
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(ticket, actual, error)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        ticket = self.limiter.acquire(self._cost(messages, kwargs))
+        actual = error = None
+        try:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            actual = _usage_tokens(result.generations[0].message)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(ticket, actual, error)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        ticket = await self.limiter.aacquire(self._cost(messages, kwargs))
+        actual = error = None
+        try:
+            result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            actual = _usage_tokens(result.generations[0].message)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(ticket, actual, error)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        ticket = self.limiter.acquire(self._cost(messages, kwargs))
+        actual = error = None
+        try:
+            for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                actual = _usage_tokens(chunk.message) or actual
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(ticket, actual, error)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        ticket = await self.limiter.aacquire(self._cost(messages, kwargs))
+        actual = error = None
+        try:
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                actual = _usage_tokens(chunk.message) or actual
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(ticket, actual, error)
@@ -0,0 +1,199 @@
+"""
+Near-duplicate routing decision cache (MinHash + LSH).
+
+Routing inputs repeat with small variations ("Book me a flight to London
+next Friday" vs "book a flight to london friday"). An exact-match cache
+misses those; this one normalizes the request, computes a MinHash
+signature of its word shingles and looks up candidates through an LSH
+band index, reusing the stored route when the estimated Jaccard
+similarity reaches ``threshold``:
+
+    cache = RouteCache(threshold=0.6, max_entries=10000)
+    route = cache.lookup(request)
+    if route is None:
+        route = classify_with_llm(request)
+        cache.add(request, route)
+
+Memory is bounded by ``max_entries`` (least recently used entries are
+evicted together with their index buckets); stats() reports hits, misses
+and evictions. FastPathRouter (shared/intent.py) consults it before the
+LLM when ROUTE_CACHE is set:
+
+    ROUTE_CACHE=1
+    ROUTE_CACHE_THRESHOLD=0.6
+    ROUTE_CACHE_MAX_ENTRIES=10000
+
+Replay a decision log (see INTENT_LOG) to pick a threshold:
+
+    python -m shared.routecache routing_log.jsonl --threshold 0.6
+"""
+
+import argparse
+import os
+import random
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an the me my i please can could would you for to of on in at is are do does will just".split()
+)
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercased words without punctuation or filler words."""
+    words = _WORD.findall(text.lower())
+    return [w for w in words if w not in _STOPWORDS] or words
+
+
+def _shingles(words: List[str]) -> Set[int]:
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams} or {0}
+
+
+class RouteCache:
+    """LRU-bounded MinHash LSH index from requests to routes.
+
+    ``num_perm`` hash functions are split into ``bands`` bands; two
+    requests become candidates when any band matches, and the route is
+    reused only if the signatures agree on at least ``threshold`` of
+    their positions. Exact repeats (after normalization) skip the index.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        max_entries: int = 10000,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self._rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, ...], str]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["RouteCache"]:
+        if os.environ.get("ROUTE_CACHE", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            threshold=float(os.environ.get("ROUTE_CACHE_THRESHOLD", 0.6)),
+            max_entries=int(os.environ.get("ROUTE_CACHE_MAX_ENTRIES", 10000)),
+        )
+
+    def _signature(self, words: List[str]) -> Tuple[int, ...]:
+        shingles = _shingles(words)
+        return tuple(
+            min((a * s + b) % _PRIME for s in shingles) & _MAX_HASH for a, b in self._perms
+        )
+
+    def _bands(self, signature: Tuple[int, ...]):
+        rows = self._rows
+        for band in range(self.bands):
+            yield band, signature[band * rows:(band + 1) * rows]
+
+    def lookup(self, text: str) -> Optional[str]:
+        """The cached route of the most similar request, or None."""
+        words = normalize(text)
+        key = " ".join(words)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry[1]
+        signature = self._signature(words)
+        with self._lock:
+            candidates: Set[str] = set()
+            for band in self._bands(signature):
+                candidates |= self._buckets.get(band, set())
+            best, best_similarity = None, self.threshold
+            for candidate in candidates:
+                other = self._entries[candidate][0]
+                similarity = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self._stats["near_hits"] += 1
+            return self._entries[best][1]
+
+    def add(self, text: str, route: str) -> None:
+        words = normalize(text)
+        key = " ".join(words)
+        signature = self._signature(words)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (signature, route)
+            for band in self._bands(signature):
+                self._buckets.setdefault(band, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        signature, _ = self._entries.pop(key)
+        for band in self._bands(signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = len(self._entries)
+            s["buckets"] = len(self._buckets)
+        hits = s["exact_hits"] + s["near_hits"]
+        lookups = hits + s["misses"]
+        s["hit_rate"] = hits / lookups if lookups else 0.0
+        return s
+
+
+def main() -> None:
+    from shared.intent import load_decisions
+
+    parser = argparse.ArgumentParser(description="Replay a routing decision log through the near-duplicate cache")
+    parser.add_argument("log", help="JSONL of {text, label} decisions, e.g. an INTENT_LOG file")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--max-entries", type=int, default=10000)
+    args = parser.parse_args()
+
+    texts, labels = load_decisions(args.log)
+    cache = RouteCache(threshold=args.threshold, max_entries=args.max_entries)
+    wrong = 0
+    for text, label in zip(texts, labels):
+        route = cache.lookup(text)
+        if route is None:
+            cache.add(text, label)
+        elif route != label:
+            wrong += 1
+    s = cache.stats()
+    hits = s["exact_hits"] + s["near_hits"]
+    print(f"{len(texts)} requests: hit rate {s['hit_rate']:.1%} "
+          f"({s['exact_hits']} exact, {s['near_hits']} near), {s['misses']} LLM calls")
+    print(f"wrong routes on hits: {wrong} ({wrong / hits:.1%})" if hits else "no hits")
+    print(f"entries {s['entries']}, buckets {s['buckets']}, evictions {s['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
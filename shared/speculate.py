@@ -0,0 +1,225 @@
+"""
+Speculative execution of routed branches.
+
+A classify -> specialist graph pays two model round trips in sequence.
+Speculator starts the most likely specialist(s) while the classifier is
+still running, keeps the branch that matches the final route and cancels
+the others:
+
+    speculator = Speculator(["booking_node", "info_node"], predictor=predict)
+    route, response = await speculator.run(
+        request,
+        classify=classify_async,                     # -> route
+        branches={"booking_node": book, "info_node": answer},
+    )
+
+Likely branches come from ``predictor`` (text -> {branch: probability},
+e.g. the local intent classifier) or, without one, from the observed
+frequency of each route. A cancelled branch is a wasted call, so the
+policy bounds how often speculation happens:
+
+    SPECULATE_MAX_BRANCHES=1      # branches started per request
+    SPECULATE_MIN_PROBABILITY=0.3 # only speculate on branches at least this likely
+    SPECULATE_WASTE_BUDGET=0.2    # long-run wasted calls allowed per request
+    SPECULATE_BURST=1.0           # wasted calls that may be spent up front
+
+The budget is a token bucket: each request adds SPECULATE_WASTE_BUDGET
+credit (up to SPECULATE_BURST) and a request only speculates on as many
+branches as the credit covers. Starting a branch spends one credit up
+front; it is refunded if the branch turns out to be the route.
+
+Inside a graph, start() and Speculation.resolve() split the same steps
+across nodes, so the classifier and the specialists stay separate nodes;
+BufferedStream holds a speculative branch's tokens back until it wins.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class Speculator:
+    """Runs a classifier and its likely branches concurrently."""
+
+    def __init__(
+        self,
+        branches: Sequence[str],
+        predictor: Optional[Callable[[str], Dict[str, float]]] = None,
+        max_branches: int = 1,
+        min_probability: float = 0.3,
+        waste_budget: float = 0.2,
+        burst: float = 1.0,
+    ):
+        self.branches = list(branches)
+        self.predictor = predictor
+        self.max_branches = max_branches
+        self.min_probability = min_probability
+        self.waste_budget = waste_budget
+        self.burst = burst
+        self._credit = burst
+        self._counts = {branch: 0 for branch in self.branches}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "speculated": 0, "hits": 0, "wasted": 0, "saved_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls, branches: Sequence[str], predictor: Optional[Callable[[str], Dict[str, float]]] = None, **kwargs) -> "Speculator":
+        settings = dict(
+            max_branches=int(os.environ.get("SPECULATE_MAX_BRANCHES", 1)),
+            min_probability=float(os.environ.get("SPECULATE_MIN_PROBABILITY", 0.3)),
+            waste_budget=float(os.environ.get("SPECULATE_WASTE_BUDGET", 0.2)),
+            burst=float(os.environ.get("SPECULATE_BURST", 1.0)),
+        )
+        settings.update(kwargs)
+        return cls(branches, predictor, **settings)
+
+    def predict(self, text: str) -> Dict[str, float]:
+        """Probability of each branch: the predictor's, or the route prior."""
+        if self.predictor is not None:
+            return self.predictor(text)
+        with self._lock:
+            total = sum(self._counts.values()) + len(self.branches)
+            return {branch: (count + 1) / total for branch, count in self._counts.items()}
+
+    def choose(self, text: str) -> List[str]:
+        """Branches to start now, within the waste budget.
+
+        Their credit is reserved immediately, so concurrent requests cannot
+        all pass the budget check before any of them has paid for it; the
+        winning branch's credit is refunded in Speculation.resolve().
+        """
+        probabilities = self.predict(text)
+        likely = sorted(
+            (b for b in self.branches if probabilities.get(b, 0.0) >= self.min_probability),
+            key=lambda b: probabilities[b],
+            reverse=True,
+        )
+        with self._lock:
+            self._credit = min(self.burst, self._credit + self.waste_budget)
+            chosen = likely[:max(0, min(self.max_branches, int(self._credit)))]
+            self._credit -= len(chosen)
+            return chosen
+
+    def start(self, text: str, branches: Dict[str, Callable[[], Awaitable[Any]]]) -> "Speculation":
+        """Starts the likely branches for ``text``; resolve the returned
+        Speculation with the classified route."""
+        chosen = self.choose(text)
+        tasks = {branch: asyncio.ensure_future(branches[branch]()) for branch in chosen}
+        return Speculation(self, tasks)
+
+    def _settle(self, route: Optional[str], hit: bool, wasted: int, speculated: bool, saved: float) -> None:
+        with self._lock:
+            if route is not None:
+                self._counts[route] = self._counts.get(route, 0) + 1
+            if hit:
+                self._credit = min(self.burst, self._credit + 1)
+            self._stats["requests"] += 1
+            self._stats["speculated"] += speculated
+            self._stats["hits"] += hit
+            self._stats["wasted"] += wasted
+            self._stats["saved_seconds"] += saved
+
+    async def run(
+        self,
+        text: str,
+        classify: Callable[[], Awaitable[str]],
+        branches: Dict[str, Callable[[], Awaitable[Any]]],
+    ) -> Tuple[str, Any]:
+        """Returns (route, result of the route's branch).
+
+        ``classify`` must return one of ``branches``' keys. The branch is
+        awaited as is if it was speculated, started otherwise; every other
+        speculative branch is cancelled and counted as wasted.
+        """
+        speculation = self.start(text, branches)
+        try:
+            route = await classify()
+        except BaseException:
+            await speculation.cancel()
+            raise
+        task = await speculation.resolve(route)
+        result = await (task if task is not None else branches[route]())
+        return route, result
+
+    def stats(self) -> Dict[str, float]:
+        """Speculation and hit rates, wasted calls per request, time saved."""
+        with self._lock:
+            s = dict(self._stats)
+        requests = s["requests"]
+        return {
+            "requests": requests,
+            "speculation_rate": s["speculated"] / requests if requests else 0.0,
+            "hit_rate": s["hits"] / s["speculated"] if s["speculated"] else None,
+            "wasted_per_request": s["wasted"] / requests if requests else 0.0,
+            "saved_seconds": s["saved_seconds"],
+        }
+
+
+class Speculation:
+    """Branches started by Speculator.start() for one request."""
+
+    def __init__(self, speculator: Speculator, tasks: Dict[str, "asyncio.Future[Any]"]):
+        self.speculator = speculator
+        self.tasks = tasks
+        self.started = time.perf_counter()
+
+    async def _drop(self, branches: List[str]) -> None:
+        dropped = [self.tasks.pop(branch) for branch in branches]
+        for task in dropped:
+            task.cancel()
+        await asyncio.gather(*dropped, return_exceptions=True)
+
+    async def resolve(self, route: str) -> Optional["asyncio.Future[Any]"]:
+        """Cancels every branch but ``route``'s and returns that branch's
+        task, or None if it was not speculated (start it yourself)."""
+        classified = time.perf_counter()
+        hit = route in self.tasks
+        wasted = [branch for branch in self.tasks if branch != route]
+        await self._drop(wasted)
+        # The winning branch had a head start of the whole classify call.
+        self.speculator._settle(route, hit, len(wasted), bool(hit or wasted), classified - self.started if hit else 0.0)
+        return self.tasks.get(route)
+
+    async def cancel(self) -> None:
+        """Cancels every branch, e.g. when classification failed."""
+        wasted = list(self.tasks)
+        await self._drop(wasted)
+        self.speculator._settle(None, False, len(wasted), bool(wasted), 0.0)
+
+
+class BufferedStream:
+    """Consumes an async stream in the background and replays it on demand.
+
+    A speculative branch should not show its output before it is known to
+    win: run its stream through ``consume()`` (e.g. as the speculated
+    task), then ``replay()`` yields everything produced so far followed by
+    the rest as it arrives. A losing branch is cancelled unseen.
+    """
+
+    def __init__(self, stream: AsyncIterator[Any]):
+        self.chunks: List[Any] = []
+        self._stream = stream
+        self._changed = asyncio.Event()
+        self._done = False
+
+    async def consume(self) -> List[Any]:
+        try:
+            async for chunk in self._stream:
+                self.chunks.append(chunk)
+                self._changed.set()
+        finally:
+            self._done = True
+            self._changed.set()
+        return self.chunks
+
+    async def replay(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self._done:
+                return
+            self._changed.clear()
+            await self._changed.wait()
@@ -0,0 +1,261 @@
+"""
+Streaming execution of the example graphs with per-node latency stats.
+
+Every LangGraph example accepts ``--stream``: instead of waiting for
+graph.invoke() to finish, tokens are printed as the models produce them
+(LangGraph's ``stream_mode="messages"``), followed by a table of time to
+first token and tokens per second for each node:
+
+    uv run 07_Multi_Agent/langgraph_multi_agent_blog.py --stream
+
+In a script, run_graph() replaces graph.invoke() and returns the same final
+state either way; arun_graph() and astream_graph() are the asyncio
+variants. StreamRecorder can also be attached on its own
+(``config={"callbacks": [recorder]}``) to any streamed call.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import LLMResult
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class StreamRecorder(BaseCallbackHandler):
+    """Records time to first token and decode rate of each call, per node."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._done: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._runs[run_id] = {
+                "node": (metadata or {}).get("langgraph_node") or "(no node)",
+                "start": time.perf_counter(),
+                "first_token": None,
+                "chunks": 0,
+            }
+
+    def on_llm_new_token(self, token: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            if run["first_token"] is None:
+                run["first_token"] = now
+            run["chunks"] += 1
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        end = time.perf_counter()
+        usage = None
+        if response.generations and response.generations[0]:
+            usage = getattr(response.generations[0][0], "message", None)
+            usage = getattr(usage, "usage_metadata", None)
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            run["end"] = end
+            run["output_tokens"] = (usage or {}).get("output_tokens") or run["chunks"]
+            self._done.append(run)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per node: calls, p50/p95 time to first token, tokens per second.
+
+        Calls that did not stream (no token callbacks) count their full
+        latency as time to first token.
+        """
+        with self._lock:
+            runs = list(self._done)
+        groups: Dict[str, Dict[str, Any]] = {}
+        for run in runs:
+            group = groups.setdefault(run["node"], {"node": run["node"], "calls": 0, "ttfts": [], "tokens": 0, "decode": 0.0})
+            first = run["first_token"] or run["end"]
+            group["calls"] += 1
+            group["ttfts"].append(first - run["start"])
+            group["tokens"] += run["output_tokens"]
+            group["decode"] += run["end"] - first
+        rows = []
+        for group in groups.values():
+            ttfts = group.pop("ttfts")
+            decode = group.pop("decode")
+            group["ttft_p50"] = _percentile(ttfts, 0.5)
+            group["ttft_p95"] = _percentile(ttfts, 0.95)
+            group["tokens_per_second"] = group["tokens"] / decode if decode > 0 else None
+            rows.append(group)
+        return sorted(rows, key=lambda row: row["ttft_p50"], reverse=True)
+
+    def print_summary(self, out: TextIO = sys.stdout) -> None:
+        header = f"{'node':<32}{'calls':>7}{'ttft_p50':>10}{'ttft_p95':>10}{'tokens':>8}{'tok/s':>9}"
+        print(header, file=out)
+        print("-" * len(header), file=out)
+        for row in self.summary():
+            rate = f"{row['tokens_per_second']:.1f}" if row["tokens_per_second"] else "-"
+            print(
+                f"{row['node'][:31]:<32}{row['calls']:>7}{row['ttft_p50']:>10.3f}"
+                f"{row['ttft_p95']:>10.3f}{row['tokens']:>8}{rate:>9}",
+                file=out,
+            )
+
+
+def emit_token(text: str) -> None:
+    """Streams ``text`` from inside a graph node as if its model had just
+    produced it, for output that did not come from a streamed model call
+    (e.g. a speculative branch replayed once it won). A no-op when the
+    graph is not being streamed."""
+    from langgraph.config import get_config, get_stream_writer
+
+    node = get_config().get("metadata", {}).get("langgraph_node")
+    get_stream_writer()({"token": text, "node": node})
+
+
+class _TokenPrinter:
+    """Writes streamed tokens, with a header whenever the node changes."""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.node = None
+
+    def write(self, chunk: Any, metadata: Dict[str, Any]) -> None:
+        if not isinstance(chunk, AIMessageChunk) or not chunk.text:
+            return
+        self.write_text(chunk.text, metadata.get("langgraph_node"))
+
+    def write_custom(self, payload: Any) -> None:
+        if isinstance(payload, dict) and payload.get("token"):
+            self.write_text(payload["token"], payload.get("node"))
+
+    def write_text(self, text: str, node: Optional[str]) -> None:
+        if node != self.node:
+            self.out.write(f"\n[{node}] ")
+            self.node = node
+        self.out.write(text)
+        self.out.flush()
+
+    def close(self) -> None:
+        """Ends the current line, e.g. when a graph step completes."""
+        if self.node is not None:
+            self.out.write("\n")
+            self.out.flush()
+            self.node = None
+
+
+def _with_recorder(config: Optional[Dict[str, Any]], recorder: StreamRecorder) -> Dict[str, Any]:
+    config = dict(config or {})
+    config["callbacks"] = list(config.get("callbacks") or []) + [recorder]
+    return config
+
+
+def stream_graph(
+    graph: Any,
+    inputs: Any,
+    config: Optional[Dict[str, Any]] = None,
+    recorder: Optional[StreamRecorder] = None,
+    out: TextIO = sys.stdout,
+) -> Dict[str, Any]:
+    """Runs ``graph`` printing tokens as they arrive; returns the final state."""
+    recorder = recorder or StreamRecorder()
+    printer = _TokenPrinter(out)
+    state = None
+    try:
+        for mode, payload in graph.stream(
+            inputs, _with_recorder(config, recorder), stream_mode=["messages", "custom", "values"]
+        ):
+            if mode == "messages":
+                printer.write(*payload)
+            elif mode == "custom":
+                printer.write_custom(payload)
+            else:
+                printer.close()
+                state = payload
+    finally:
+        printer.close()
+    return state
+
+
+async def astream_graph(
+    graph: Any,
+    inputs: Any,
+    config: Optional[Dict[str, Any]] = None,
+    recorder: Optional[StreamRecorder] = None,
+    out: TextIO = sys.stdout,
+) -> Dict[str, Any]:
+    """Async variant of stream_graph() built on graph.astream()."""
+    recorder = recorder or StreamRecorder()
+    printer = _TokenPrinter(out)
+    state = None
+    try:
+        async for mode, payload in graph.astream(
+            inputs, _with_recorder(config, recorder), stream_mode=["messages", "custom", "values"]
+        ):
+            if mode == "messages":
+                printer.write(*payload)
+            elif mode == "custom":
+                printer.write_custom(payload)
+            else:
+                printer.close()
+                state = payload
+    finally:
+        printer.close()
+    return state
+
+
+def stream_requested(argv: Optional[List[str]] = None) -> bool:
+    """True if the script was started with ``--stream``."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--stream", action="store_true")
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    return args.stream
+
+
+def run_graph(graph: Any, inputs: Any, config: Optional[Dict[str, Any]] = None, stream: bool = False) -> Dict[str, Any]:
+    """graph.invoke(), or with ``stream`` a streamed run followed by the
+    per-node time to first token and tokens/sec table.
+    """
+    if not stream:
+        return graph.invoke(inputs, config)
+    recorder = StreamRecorder()
+    state = stream_graph(graph, inputs, config, recorder=recorder)
+    print()
+    recorder.print_summary()
+    return state
+
+
+async def arun_graph(graph: Any, inputs: Any, config: Optional[Dict[str, Any]] = None, stream: bool = False) -> Dict[str, Any]:
+    """Async variant of run_graph(), for graphs with async nodes."""
+    if not stream:
+        return await graph.ainvoke(inputs, config)
+    recorder = StreamRecorder()
+    state = await astream_graph(graph, inputs, config, recorder=recorder)
+    print()
+    recorder.print_summary()
+    return state
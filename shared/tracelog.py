@@ -0,0 +1,269 @@
+"""
+Compact trace log of LLM calls.
+
+When LLM_RECORD points at a directory, get_llm() attaches a TraceRecorder
+to every model it returns and each call (messages, invocation kwargs,
+response, usage_metadata, wall time and time to first token) is appended
+to the log:
+
+    LLM_RECORD=traces/
+    LLM_RECORD_SEGMENT_MB=64     # rotate to a new segment beyond this size
+
+Layout of the log directory:
+
+    segment-000001.jsonl.gz      # one gzip member per record, append-only
+    segment-000002.jsonl.gz
+    index.tsv                    # prompt_hash, segment, offset, length
+
+Every record is its own gzip member, so segments stay valid after a crash
+(``zcat`` reads them) and a single record can be decompressed straight
+from the offset stored in the index. A directory should have a single
+writing process.
+
+Calls answered by the response cache are logged with ``cache_hit: true``
+and counted separately by the summary, so their near-zero wall time does
+not skew the per-node latency. The log feeds the replay provider
+(REPLAY_LOG=traces/) and can be summarised per graph node:
+
+    python -m shared.tracelog summary traces/
+"""
+
+import gzip
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+
+from shared.offline import prompt_hash, serialize_messages
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+INDEX_FILE = "index.tsv"
+
+
+class TraceLog:
+    """Append-only, segmented, gzip-compressed log with a prompt-hash index."""
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, List[Tuple[str, int, int]]]] = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        self._segment = segments[-1].name if segments else self._segment_name(1)
+
+    @staticmethod
+    def _segment_name(number: int) -> str:
+        return f"segment-{number:06d}.jsonl.gz"
+
+    def segments(self) -> List[Path]:
+        return sorted(self.directory.glob("segment-*.jsonl.gz"))
+
+    def append(self, record: Dict[str, Any]) -> None:
+        key = record["prompt_hash"]
+        payload = gzip.compress(
+            (json.dumps(record, default=str, separators=(",", ":")) + "\n").encode("utf-8")
+        )
+        with self._lock:
+            path = self.directory / self._segment
+            offset = path.stat().st_size if path.exists() else 0
+            if offset and offset + len(payload) > self.segment_bytes:
+                number = int(self._segment.split("-")[1].split(".")[0]) + 1
+                self._segment = self._segment_name(number)
+                path = self.directory / self._segment
+                offset = 0
+            with open(path, "ab") as f:
+                f.write(payload)
+            with open(self.directory / INDEX_FILE, "a", encoding="utf-8") as f:
+                f.write(f"{key}\t{self._segment}\t{offset}\t{len(payload)}\n")
+            if self._index is not None:
+                self._index.setdefault(key, []).append((self._segment, offset, len(payload)))
+
+    def _load_index(self) -> Dict[str, List[Tuple[str, int, int]]]:
+        if self._index is None:
+            index: Dict[str, List[Tuple[str, int, int]]] = {}
+            index_path = self.directory / INDEX_FILE
+            if index_path.exists():
+                with open(index_path, encoding="utf-8") as f:
+                    for line in f:
+                        parts = line.rstrip("\n").split("\t")
+                        if len(parts) != 4:
+                            continue  # torn write at the end of the index
+                        key, segment, offset, length = parts
+                        index.setdefault(key, []).append((segment, int(offset), int(length)))
+            self._index = index
+        return self._index
+
+    def lookup(self, key: str) -> List[Dict[str, Any]]:
+        """Returns every record logged for a prompt hash, oldest first."""
+        with self._lock:
+            locations = list(self._load_index().get(key, ()))
+        records = []
+        for segment, offset, length in locations:
+            with open(self.directory / segment, "rb") as f:
+                f.seek(offset)
+                data = f.read(length)
+            records.append(json.loads(gzip.decompress(data)))
+        return records
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._load_index())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for segment in self.segments():
+            try:
+                with gzip.open(segment, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+            except (EOFError, gzip.BadGzipFile):
+                # A record torn by a crash only affects the tail of its segment.
+                continue
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """Callback handler that appends every chat model call to a TraceLog.
+
+    LangGraph tags each call with the node that issued it, which is stored
+    as ``node`` so token and time usage can be attributed per node.
+    """
+
+    run_inline = True
+
+    def __init__(self, log: TraceLog):
+        self.log = log
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        with self._lock:
+            self._runs[run_id] = {
+                "start": time.perf_counter(),
+                "ts": time.time(),
+                "ttft": None,
+                "messages": serialize_messages(messages[0]) if messages else [],
+                "kwargs": params,
+                "model": params.get("model") or params.get("model_name") or metadata.get("ls_model_name"),
+                "node": metadata.get("langgraph_node"),
+            }
+
+    def on_llm_new_token(self, token: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run["ttft"] is None:
+                run["ttft"] = time.perf_counter() - run["start"]
+
+    def _finish(self, run_id: UUID, **fields: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        wall_time = time.perf_counter() - run.pop("start")
+        record = {
+            "prompt_hash": prompt_hash(run["messages"]),
+            **run,
+            "wall_time": wall_time,
+            **fields,
+        }
+        try:
+            self.log.append(record)
+        except Exception as e:
+            print(f"TraceRecorder: failed to write record: {e}", file=sys.stderr)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        text = ""
+        usage = None
+        fields: Dict[str, Any] = {}
+        if response.generations and response.generations[0]:
+            generation = response.generations[0][0]
+            text = generation.text
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if (generation.generation_info or {}).get("cache_hit"):
+                fields["cache_hit"] = True
+        self._finish(run_id, response=text, usage_metadata=usage, **fields)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, response=None, error=repr(error))
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(log: TraceLog) -> List[Dict[str, Any]]:
+    """Aggregates calls, tokens and latency per graph node. Cache hits are
+    only counted (``cache_hits``); calls, tokens and times are provider calls."""
+    groups: Dict[str, Dict[str, Any]] = {}
+    for record in log:
+        node = record.get("node") or "(no node)"
+        group = groups.setdefault(
+            node, {"node": node, "calls": 0, "cache_hits": 0, "errors": 0, "input_tokens": 0,
+                   "output_tokens": 0, "wall_times": [], "ttfts": []}
+        )
+        if record.get("cache_hit"):
+            group["cache_hits"] += 1
+            continue
+        group["calls"] += 1
+        if record.get("error"):
+            group["errors"] += 1
+        usage = record.get("usage_metadata") or {}
+        group["input_tokens"] += usage.get("input_tokens", 0)
+        group["output_tokens"] += usage.get("output_tokens", 0)
+        group["wall_times"].append(record.get("wall_time") or 0.0)
+        if record.get("ttft") is not None:
+            group["ttfts"].append(record["ttft"])
+
+    rows = []
+    for group in groups.values():
+        wall_times = group.pop("wall_times")
+        ttfts = group.pop("ttfts")
+        group["total_time"] = sum(wall_times)
+        group["p50"] = _percentile(wall_times, 0.5)
+        group["p95"] = _percentile(wall_times, 0.95)
+        group["ttft_p50"] = _percentile(ttfts, 0.5) if ttfts else None
+        rows.append(group)
+    return sorted(rows, key=lambda row: row["total_time"], reverse=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] != "summary":
+        print("Usage: python -m shared.tracelog summary <log directory>")
+        raise SystemExit(2)
+
+    rows = summarize(TraceLog(argv[1]))
+    header = f"{'node':<32}{'calls':>7}{'cached':>7}{'errors':>7}{'in_tok':>10}{'out_tok':>10}{'total_s':>10}{'p50_s':>8}{'p95_s':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['node'][:31]:<32}{row['calls']:>7}{row['cache_hits']:>7}{row['errors']:>7}"
+            f"{row['input_tokens']:>10}{row['output_tokens']:>10}"
+            f"{row['total_time']:>10.2f}{row['p50']:>8.2f}{row['p95']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Base class for chat models that wrap another chat model.
+
+get_llm() composes optional behaviours (rate limiting, request coalescing,
+hedging, ...) as thin layers around the provider model. Each layer
+subclasses DelegatingChatModel and overrides only the calls it needs to
+intercept; everything else -- identity, cache keys, tool binding -- is
+forwarded to the wrapped model so the layers are invisible to the graphs.
+
+Layers call the wrapped model's ``_generate``/``_stream`` methods directly
+with their own run manager, so callbacks, the response cache and the
+trace recorder fire once, on the outermost model.
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+DEFAULT_EXPECTED_OUTPUT_TOKENS = 256
+
+
+def has_batch_endpoint(model: BaseChatModel) -> bool:
+    """True if the model can answer several prompts in one round trip.
+
+    Such models implement ``_generate_batch``/``_agenerate_batch`` taking a
+    list of message lists and returning one ChatResult per prompt.
+    """
+    check = getattr(model, "_has_batch_endpoint", None)
+    return bool(check()) if callable(check) else False
+
+
+class DelegatingChatModel(BaseChatModel):
+    """Chat model that forwards every call to ``inner``."""
+
+    inner: BaseChatModel
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _get_invocation_params(self, stop: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        return self.inner._get_invocation_params(stop=stop, **kwargs)
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any):
+        return self.inner._get_ls_params(stop=stop, **kwargs)
+
+    def _get_llm_string(self, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        # Same cache key as the unwrapped model.
+        return self.inner._get_llm_string(stop=stop, **kwargs)
+
+    def _combine_llm_outputs(self, llm_outputs: List[Optional[dict]]) -> dict:
+        return self.inner._combine_llm_outputs(llm_outputs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # Let the provider format the tools, then re-bind the resulting
+        # kwargs on this layer so tool calls still go through it.
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**bound.kwargs)
+
+    def unwrap(self) -> BaseChatModel:
+        """Returns the provider model at the bottom of the wrapper stack."""
+        model = self.inner
+        while isinstance(model, DelegatingChatModel):
+            model = model.inner
+        return model
+
+    def expected_output_tokens(self, **kwargs: Any) -> int:
+        """Best guess of the completion size, for token budgets."""
+        model = self.unwrap()
+        for name in ("max_output_tokens", "max_tokens", "num_predict"):
+            value = kwargs.get(name) or getattr(model, name, None)
+            if isinstance(value, int) and value > 0:
+                return value
+        return DEFAULT_EXPECTED_OUTPUT_TOKENS
+
+    def _has_batch_endpoint(self) -> bool:
+        return has_batch_endpoint(self.inner)
+
+    def _generate_batch(self, prompts: List[List[BaseMessage]], stop: Optional[List[str]] = None, **kwargs: Any) -> List[ChatResult]:
+        return self.inner._generate_batch(prompts, stop=stop, **kwargs)
+
+    async def _agenerate_batch(
+        self, prompts: List[List[BaseMessage]], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> List[ChatResult]:
+        return await self.inner._agenerate_batch(prompts, stop=stop, **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        yield from self.inner._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            yield chunk
@@ -0,0 +1,85 @@
+"""Adaptive concurrency (shared/adaptive.py)."""
+
+import time
+
+from shared.adaptive import AdaptiveConcurrencyController, is_overload_error
+from shared.offline import SyntheticProviderError
+from shared.ratelimit import ProviderLimiter
+
+
+class _Limiter:
+    def __init__(self):
+        self.limits = []
+
+    def set_max_concurrency(self, limit):
+        self.limits.append(limit)
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+def test_overload_errors():
+    assert is_overload_error(SyntheticProviderError("busy", status_code=429))
+    assert is_overload_error(_HTTPError(503))
+    assert is_overload_error(RuntimeError("RESOURCE_EXHAUSTED: quota"))
+    assert not is_overload_error(_HTTPError(400))
+    assert not is_overload_error(ValueError("bad prompt"))
+
+
+def test_additive_increase_after_a_window_of_successes():
+    limiter = _Limiter()
+    controller = AdaptiveConcurrencyController(limiter, initial=2, latency_target=1.0)
+    for _ in range(2):
+        controller.on_result(0.1)
+    assert controller.stats()["limit"] == 3
+    for _ in range(3):
+        controller.on_result(0.1)
+    assert limiter.limits == [2, 3, 4]
+
+
+def test_overload_halves_once_per_round_trip():
+    limiter = _Limiter()
+    controller = AdaptiveConcurrencyController(limiter, initial=16, latency_target=1.0)
+    for _ in range(5):  # one burst of 429s
+        controller.on_result(0.1, SyntheticProviderError("busy"))
+    assert controller.stats()["limit"] == 8
+    time.sleep(0.11)
+    controller.on_result(0.1, SyntheticProviderError("busy"))
+    assert controller.stats()["limit"] == 4
+    assert controller.stats()["overload_errors"] == 6
+
+
+def test_client_errors_are_ignored():
+    controller = AdaptiveConcurrencyController(_Limiter(), initial=4)
+    controller.on_result(0.1, ValueError("bad prompt"))
+    assert controller.stats()["limit"] == 4 and controller.stats()["decreases"] == 0
+
+
+def test_latency_spike_decreases():
+    controller = AdaptiveConcurrencyController(_Limiter(), initial=8, max_limit=8, latency_target=1.0)
+    for _ in range(10):
+        controller.on_result(5.0)
+    stats = controller.stats()
+    assert stats["limit"] == 4 and stats["latency_spikes"] == 1
+
+
+def test_limits_are_respected():
+    controller = AdaptiveConcurrencyController(_Limiter(), initial=2, min_limit=2, max_limit=3, latency_target=1.0)
+    for _ in range(20):
+        controller.on_result(0.1)
+    assert controller.stats()["limit"] == 3
+    for _ in range(3):
+        controller.on_result(0.1, SyntheticProviderError("busy"))
+        time.sleep(0.11)
+    assert controller.stats()["limit"] == 2
+
+
+def test_drives_the_provider_limiter():
+    limiter = ProviderLimiter("test")
+    limiter.controller = AdaptiveConcurrencyController(limiter, initial=1, latency_target=1.0)
+    assert limiter.max_concurrency == 1
+    limiter.release(limiter.acquire())
+    assert limiter.max_concurrency == 2
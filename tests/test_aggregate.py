@@ -0,0 +1,63 @@
+"""Fan-in reducers (shared/aggregate.py)."""
+
+import pickle
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.channels.binop import BinaryOperatorAggregate
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+
+from shared.aggregate import Rope, concat
+
+
+def test_concat_behaves_like_list_addition():
+    rope = concat(concat(None, ["a"]), ("b", "c"))
+    rope = concat(rope, Rope(["d"])) + ["e"]
+    assert rope == ["a", "b", "c", "d", "e"]
+    assert len(rope) == 5 and rope[1] == "b" and rope[-1] == "e"
+    assert rope[1:3] == ["b", "c"] and isinstance(rope[1:3], Rope)
+    assert ["z"] + rope == ["z", "a", "b", "c", "d", "e"]
+    assert "\n".join(rope) == "a\nb\nc\nd\ne"
+
+
+def test_empty_sides_are_not_copied():
+    rope = Rope(["a"])
+    assert concat(rope, []) is rope
+    assert concat(None, rope) is rope
+
+
+def test_deep_fold_flattens_without_recursion():
+    rope = Rope()
+    for i in range(50_000):
+        rope = concat(rope, [i])
+    assert list(rope) == list(range(50_000))
+
+
+def test_rejects_non_list_updates():
+    with pytest.raises(TypeError, match="str"):
+        concat(Rope(["a"]), "bc")
+    with pytest.raises(TypeError):
+        concat({"a": 1}, [])
+
+
+def test_pickles_flat():
+    rope = concat(["a"], ["b"])
+    assert pickle.loads(pickle.dumps(rope)) == ["a", "b"]
+
+
+def test_langgraph_channel_and_fan_out():
+    channel = BinaryOperatorAggregate(Rope, concat)
+    channel.update([[i] for i in range(100)])
+    assert list(channel.get()) == list(range(100))
+
+    class State(TypedDict):
+        count: int
+        results: Annotated[Rope, concat]
+
+    builder = StateGraph(State)
+    builder.add_node("branch", lambda task: {"results": [task["i"]]})
+    builder.add_conditional_edges(START, lambda s: [Send("branch", {"i": i}) for i in range(s["count"])], ["branch"])
+    builder.add_edge("branch", END)
+    result = builder.compile().invoke({"count": 20, "results": []})
+    assert sorted(result["results"]) == list(range(20))
@@ -0,0 +1,86 @@
+"""Async variants of the parallel example graphs (03, 07, shared/graphbench.py)."""
+
+import asyncio
+import re
+import time
+
+import pytest
+
+from shared import graphbench
+from shared import llm as llm_module
+from shared.graphbench import _load_script
+
+LATENCY = 0.05
+
+
+@pytest.fixture(autouse=True)
+def synthetic(monkeypatch):
+    monkeypatch.setattr(llm_module, "_registry", llm_module._ModelRegistry(max_size=8))
+    monkeypatch.setenv("LLM_PROVIDER", "synthetic")
+    monkeypatch.setenv("SYNTHETIC_LATENCY", "fixed")
+    monkeypatch.setenv("SYNTHETIC_LATENCY_MEAN", str(LATENCY))
+    monkeypatch.setenv("SYNTHETIC_TOKENS_PER_SECOND", "0")
+    monkeypatch.setenv("SYNTHETIC_OUTPUT_TOKENS", "8")
+    for name in ("LLM_CACHE", "LLM_RECORD", "LLM_COALESCE", "LLM_HEDGE_PROVIDER", "LLM_MAX_CONCURRENCY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+class _ConfigSpy:
+    """Records the config of every ainvoke() before delegating to the graph."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.configs = []
+
+    async def ainvoke(self, inputs, config=None):
+        self.configs.append(config)
+        return await self.graph.ainvoke(inputs, config)
+
+
+def _normalized(texts):
+    # The synthetic provider numbers its responses in call order.
+    return sorted(re.sub(r"Synthetic response \d+", "Synthetic response", text) for text in texts)
+
+
+def test_research_async_graph_matches_sync():
+    research = _load_script("03_Parallelization/langgraph_parallel_research.py")
+    inputs = research.research_inputs("subsidies")
+    sync = research.build_parallel_research_graph().invoke(inputs)
+    spy = _ConfigSpy(research.build_parallel_research_graph(use_async=True))
+    started = time.monotonic()
+    result = asyncio.run(research.arun_research("subsidies", graph=spy, max_concurrency=1))
+    assert _normalized(result["findings"]) == _normalized(sync["findings"])
+    assert len(result["findings"]) == len(research.PERSPECTIVES)
+    assert spy.configs == [{"max_concurrency": 1}]
+    # One branch at a time: the three findings cannot overlap.
+    assert time.monotonic() - started >= (len(research.PERSPECTIVES) + 1) * LATENCY
+
+
+def test_agents_async_graph_matches_sync():
+    agents = _load_script("07_Multi_Agent/langgraph_parallel_agents.py")
+    sync = agents.build_parallel_graph().invoke({"city": "Tokyo", "results": []})
+    spy = _ConfigSpy(agents.build_parallel_graph(use_async=True))
+    result = asyncio.run(agents.arun_agents("Tokyo", graph=spy, max_concurrency=2))
+    assert _normalized(result["results"]) == _normalized(sync["results"])
+    assert [r.split("]")[0] for r in sorted(result["results"])] == ["[NEWS", "[WEATHER"]
+    assert spy.configs == [{"max_concurrency": 2}]
+
+
+def test_graphbench_passes_max_concurrency_to_every_mode(monkeypatch):
+    configs = []
+    run_threads, run_async = graphbench.run_threads, graphbench.run_async
+
+    def spy_threads(graph, inputs, config, workers):
+        configs.append(("sync-threads", config))
+        return run_threads(graph, inputs, config, workers)
+
+    def spy_async(graph, inputs, config):
+        configs.append(("async", config))
+        return run_async(graph, inputs, config)
+
+    monkeypatch.setattr(graphbench, "run_threads", spy_threads)
+    monkeypatch.setattr(graphbench, "run_async", spy_async)
+    rows = graphbench.benchmark("agents", runs=2, workers=2, max_concurrency=1)
+    assert [row["mode"] for row in rows] == ["sync-threads", "sync-nodes", "async"]
+    assert all(row["runs"] == 2 and row["seconds"] > 0 for row in rows)
+    assert configs == [("sync-threads", {"max_concurrency": 1})] + [("async", {"max_concurrency": 1})] * 2
@@ -0,0 +1,119 @@
+"""Micro-batching (shared/batching.py)."""
+
+import asyncio
+import gc
+import threading
+
+from langchain_core.messages import HumanMessage
+
+from shared.batching import MicroBatchingChatModel
+from shared.offline import SyntheticChatModel, SyntheticProviderError
+
+
+class _NoBatchModel(SyntheticChatModel):
+    def _has_batch_endpoint(self) -> bool:
+        return False
+
+
+class _ShortBatchModel(SyntheticChatModel):
+    """A batch endpoint that drops the last result."""
+
+    def _generate_batch(self, prompts, stop=None, **kwargs):
+        return super()._generate_batch(prompts, stop=stop, **kwargs)[:-1]
+
+    async def _agenerate_batch(self, prompts, stop=None, **kwargs):
+        return (await super()._agenerate_batch(prompts, stop=stop, **kwargs))[:-1]
+
+
+class _Interrupted(BaseException):
+    pass
+
+
+class _InterruptedBatchModel(SyntheticChatModel):
+    def _generate_batch(self, prompts, stop=None, **kwargs):
+        raise _Interrupted()
+
+
+def _model(inner=None, window=0.05, size=16):
+    inner = inner or SyntheticChatModel(latency_mean=0.01, tokens_per_second=0)
+    return MicroBatchingChatModel(inner=inner, window=window, max_batch_size=size)
+
+
+def test_concurrent_async_calls_share_a_batch():
+    model = _model()
+
+    async def main():
+        return await asyncio.gather(*(model.ainvoke(f"q{i}") for i in range(5)))
+
+    replies = asyncio.run(main())
+    assert [r.content.split(" to: ")[1].split()[0] for r in replies] == [f"q{i}" for i in range(5)]
+    assert model.batching_stats()["batches"] == 1
+
+
+def test_full_batch_dispatches_before_the_window():
+    model = _model(window=5, size=3)
+    threads = [threading.Thread(target=model.invoke, args=(f"q{i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert not any(thread.is_alive() for thread in threads)
+    assert model.batching_stats() == {"calls": 3, "batches": 1, "avg_batch_size": 3.0}
+
+
+def test_models_without_batch_endpoint_pass_through():
+    model = _model(_NoBatchModel(latency_mean=0, tokens_per_second=0), window=5)
+    assert model.invoke("hello").content
+    assert model.batching_stats()["calls"] == 0
+
+
+def test_cancelled_leader_leaves_no_unretrieved_exception():
+    inner = SyntheticChatModel(latency_mean=0, tokens_per_second=0, error_rate=1.0)
+    model = _model(inner, window=0.05)
+    reported = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: reported.append(context))
+        leader = asyncio.ensure_future(model._agenerate([HumanMessage("a")]))
+        member = asyncio.ensure_future(model._agenerate([HumanMessage("b")]))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(leader, member, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return [type(result) for result in results]
+
+    leader, member = asyncio.run(main())
+    gc.collect()  # an unretrieved exception is reported when its future is freed
+    assert leader is asyncio.CancelledError
+    assert member is SyntheticProviderError
+    assert not reported
+
+
+def test_missing_results_fail_their_waiters():
+    model = _model(_ShortBatchModel(latency_mean=0, tokens_per_second=0))
+
+    async def main():
+        return await asyncio.gather(*(model.ainvoke(f"q{i}") for i in range(3)), return_exceptions=True)
+
+    *answered, unmatched = asyncio.run(main())
+    assert all(reply.content for reply in answered)
+    assert isinstance(unmatched, RuntimeError) and "2 results for 3 prompts" in str(unmatched)
+
+
+def test_base_exception_settles_every_waiter():
+    model = _model(_InterruptedBatchModel(latency_mean=0, tokens_per_second=0), window=5, size=3)
+    errors = []
+
+    def call(prompt):
+        try:
+            model.invoke(prompt)
+        except BaseException as e:
+            errors.append(type(e))
+
+    threads = [threading.Thread(target=call, args=(f"q{i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert not any(thread.is_alive() for thread in threads)
+    assert errors == [_Interrupted] * 3
@@ -0,0 +1,52 @@
+"""Batched routing (shared/batchroute.py)."""
+
+import asyncio
+import re
+
+from langchain_core.runnables import RunnableLambda
+
+from shared.batchroute import parse_routes, aroute_batch, route_batch
+
+
+def _cached_model(good_after: int):
+    """Fake model behind a response cache: the same prompt always gets the
+    same reply, and only the first ``good_after`` distinct prompts are garbled."""
+    seen = {}
+
+    def reply(prompt) -> str:
+        text = prompt.to_string()
+        if text not in seen:
+            requests = re.findall(r"(\d+)\. \w", text)
+            if len(seen) < good_after:
+                seen[text] = "sorry, I cannot help"
+            else:
+                seen[text] = "\n".join(f"{n}: info" for n in requests)
+        return seen[text]
+
+    return RunnableLambda(reply), seen
+
+
+def test_parse_routes_accepts_common_formats():
+    reply = "1: info\n2. BOOKER\n[3] unknown\n4) info\n1: booker"
+    assert parse_routes(reply, 4, ["booker", "info"]) == {0: "info", 1: "booker", 3: "info"}
+
+
+def test_retry_changes_the_prompt():
+    llm, seen = _cached_model(good_after=1)
+    routes = route_batch(llm, ["a", "b", "c", "d"], ["info", "booker"], batch_size=4, retries=1)
+    assert routes == ["info"] * 4
+    # A first garbled prompt, then two halved retry batches that say so.
+    assert len(seen) == 3
+    assert sum("Retry 1" in prompt for prompt in seen) == 2
+
+
+def test_async_retry_changes_the_prompt():
+    llm, seen = _cached_model(good_after=1)
+    routes = asyncio.run(aroute_batch(llm, ["a", "b"], ["info"], batch_size=2, retries=1))
+    assert routes == ["info", "info"]
+    assert len(seen) == 3
+
+
+def test_unresolved_items_get_the_default():
+    llm, _ = _cached_model(good_after=100)
+    assert route_batch(llm, ["a", "b"], ["info"], retries=1, default="unclear") == ["unclear", "unclear"]
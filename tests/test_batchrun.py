@@ -0,0 +1,74 @@
+"""Resumable batch runner (shared/batchrun.py)."""
+
+import asyncio
+import json
+
+from langchain_core.runnables import RunnableLambda
+
+from shared.batchrun import completed_ids, open_for_append, run_batch
+
+
+def _write_inputs(path, count):
+    path.write_text("".join(json.dumps({"id": f"r{i}", "text": f"item {i}"}) + "\n" for i in range(count)))
+
+
+def _run(tmp_path, chain, **kwargs):
+    return asyncio.run(run_batch(
+        chain, str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"),
+        make_inputs=lambda record: {"text": record["text"]},
+        report_every=3600, **kwargs,
+    ))
+
+
+def test_open_for_append_truncates_torn_last_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"id": "a"}\n{"id": "b", "outp')
+    with open_for_append(path) as f:
+        f.write('{"id": "c"}\n')
+    assert path.read_text() == '{"id": "a"}\n{"id": "c"}\n'
+
+
+def test_open_for_append_keeps_complete_file(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"id": "a"}\n')
+    with open_for_append(path) as f:
+        f.write('{"id": "b"}\n')
+    assert completed_ids(path) == {"a", "b"}
+
+
+def test_resume_after_torn_line_reruns_only_missing_items(tmp_path):
+    _write_inputs(tmp_path / "in.jsonl", 4)
+    (tmp_path / "out.jsonl").write_text(
+        json.dumps({"id": "r0", "input": {}, "output": "done before"}) + "\n" + '{"id": "r1", "inp'
+    )
+    seen = []
+
+    def upper(inputs):
+        seen.append(inputs["text"])
+        return inputs["text"].upper()
+
+    stats = _run(tmp_path, RunnableLambda(upper), concurrency=2)
+
+    assert sorted(seen) == ["item 1", "item 2", "item 3"]
+    assert stats["done"] == 3 and stats["skipped"] == 1
+    lines = (tmp_path / "out.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]  # every line parses
+    assert sorted(r["id"] for r in records) == ["r0", "r1", "r2", "r3"]
+
+
+def test_failed_items_go_to_errors_file_and_are_retried_on_resume(tmp_path):
+    _write_inputs(tmp_path / "in.jsonl", 3)
+
+    def flaky(inputs):
+        if inputs["text"] == "item 1":
+            raise ValueError("bad item")
+        return inputs["text"]
+
+    stats = _run(tmp_path, RunnableLambda(flaky), concurrency=3, retries=0)
+    assert stats["errors"] == 1
+    errors = (tmp_path / "out.jsonl.errors.jsonl").read_text().splitlines()
+    assert json.loads(errors[0])["id"] == "r1"
+
+    stats = _run(tmp_path, RunnableLambda(lambda inputs: inputs["text"]), concurrency=3)
+    assert stats["done"] == 1 and stats["skipped"] == 2
+    assert completed_ids(tmp_path / "out.jsonl") == {"r0", "r1", "r2"}
@@ -0,0 +1,86 @@
+"""SQLite response cache (shared/cache.py)."""
+
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from shared.cache import SQLiteLLMCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def _generations(text):
+    return [ChatGeneration(message=AIMessage(content=text, usage_metadata={
+        "input_tokens": 1, "output_tokens": 2, "total_tokens": 3}))]
+
+
+def test_round_trip_keeps_message_and_marks_hit(cache):
+    cache.update("prompt", "model", _generations("hi"))
+    (generation,) = cache.lookup("prompt", "model")
+    assert isinstance(generation, ChatGeneration)
+    assert generation.message.content == "hi"
+    assert generation.message.usage_metadata["output_tokens"] == 2
+    assert generation.generation_info["cache_hit"] is True
+
+
+def test_plain_generations_round_trip(cache):
+    cache.update("prompt", "model", [Generation(text="plain")])
+    (generation,) = cache.lookup("prompt", "model")
+    assert generation.text == "plain" and not isinstance(generation, ChatGeneration)
+
+
+def test_key_includes_llm_string(cache):
+    cache.update("prompt", "model-a", _generations("a"))
+    assert cache.lookup("prompt", "model-b") is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 1
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = SQLiteLLMCache(path)
+    first.update("prompt", "model", _generations("kept"))
+    first.close()
+    second = SQLiteLLMCache(path)
+    assert second.lookup("prompt", "model")[0].message.content == "kept"
+    second.close()
+
+
+def test_ttl_expires_entries(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), ttl=0.05)
+    cache.update("prompt", "model", _generations("old"))
+    time.sleep(0.1)
+    assert cache.lookup("prompt", "model") is None
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.update("a", "model", _generations("a"))
+    time.sleep(0.01)
+    cache.update("b", "model", _generations("b"))
+    time.sleep(0.01)
+    assert cache.lookup("a", "model") is not None  # "b" is now least recently used
+    time.sleep(0.01)
+    cache.update("c", "model", _generations("c"))
+    assert cache.lookup("b", "model") is None
+    assert cache.lookup("a", "model") is not None and cache.lookup("c", "model") is not None
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_unreadable_entries_are_misses(cache):
+    cache._conn.execute(
+        "INSERT INTO llm_cache VALUES (?, 'not json', 8, ?, ?)",
+        (cache._key("prompt", "model"), time.time(), time.time()),
+    )
+    assert cache.lookup("prompt", "model") is None
+    cache.update("prompt", "model", _generations("fresh"))
+    assert cache.lookup("prompt", "model")[0].message.content == "fresh"
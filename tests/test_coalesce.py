@@ -0,0 +1,86 @@
+"""Request coalescing (shared/coalesce.py)."""
+
+import asyncio
+import threading
+
+import pytest
+
+from shared.coalesce import CoalescingChatModel
+from shared.offline import SyntheticChatModel, SyntheticProviderError
+
+CALLS = []
+
+
+class _CountingModel(SyntheticChatModel):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        CALLS.append(messages[-1].content)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        CALLS.append(messages[-1].content)
+        return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+class _FailingModel(SyntheticChatModel):
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        CALLS.append(messages[-1].content)
+        await asyncio.sleep(0.05)
+        raise SyntheticProviderError("overloaded")
+
+
+@pytest.fixture
+def model():
+    CALLS.clear()
+    return CoalescingChatModel(inner=_CountingModel(latency_mean=0.05, tokens_per_second=0))
+
+
+def test_identical_async_calls_share_one_upstream_call(model):
+    async def main():
+        return await asyncio.gather(*(model.ainvoke("same question") for _ in range(5)))
+
+    replies = asyncio.run(main())
+    assert CALLS == ["same question"]
+    assert len({reply.content for reply in replies}) == 1
+    assert len({id(reply) for reply in replies}) == 5  # followers get their own copy
+
+
+def test_different_prompts_are_not_coalesced(model):
+    async def main():
+        await asyncio.gather(model.ainvoke("a"), model.ainvoke("b"), model.ainvoke("a"))
+
+    asyncio.run(main())
+    assert sorted(CALLS) == ["a", "b"]
+
+
+def test_sync_callers_share_the_flight(model):
+    threads = [threading.Thread(target=model.invoke, args=("same",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert CALLS == ["same"]
+
+
+def test_leader_error_reaches_followers():
+    CALLS.clear()
+    model = CoalescingChatModel(inner=_FailingModel())
+
+    async def main():
+        return await asyncio.gather(*(model.ainvoke("q") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, SyntheticProviderError) for result in results)
+    assert len(CALLS) == 1
+
+
+def test_cancelled_leader_hands_over_to_a_follower(model):
+    async def main():
+        leader = asyncio.ensure_future(model.ainvoke("q"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(model.ainvoke("q"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()).content
+    assert CALLS == ["q", "q"]
@@ -0,0 +1,88 @@
+"""Streaming fan-in (shared/fanin.py)."""
+
+import asyncio
+
+from shared.fanin import fold_as_completed
+
+
+async def _after(seconds, value):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def _fail(seconds, error):
+    await asyncio.sleep(seconds)
+    raise error
+
+
+async def _collect(value, arrived):
+    return value + [result for _, result in arrived]
+
+
+def test_folds_every_branch_without_quorum():
+    branches = {name: _after(delay, name) for name, delay in [("a", 0.03), ("b", 0.01), ("c", 0.02)]}
+    result = asyncio.run(fold_as_completed(branches, _collect, initial=[]))
+    assert sorted(result.value) == ["a", "b", "c"]
+    assert result.arrived == ["b", "c", "a"]
+    assert not result.dropped and not result.failed
+
+
+def test_deadline_drops_stragglers_once_quorum_is_met():
+    branches = {"fast": _after(0.01, "fast"), "slow": _after(5, "slow")}
+    result = asyncio.run(fold_as_completed(branches, _collect, initial=[], quorum=1, deadline=0.05))
+    assert result.value == ["fast"]
+    assert result.dropped == ["slow"]
+    assert result.seconds < 1
+
+
+def test_quorum_wins_over_deadline():
+    branches = {"a": _after(0.01, "a"), "b": _after(0.1, "b"), "c": _after(5, "c")}
+    result = asyncio.run(fold_as_completed(branches, _collect, initial=[], quorum=2, deadline=0))
+    assert sorted(result.value) == ["a", "b"]
+    assert result.dropped == ["c"]
+
+
+def test_failures_are_recorded_with_their_errors():
+    error = ValueError("bad")
+    branches = {
+        "ok": _after(0.01, "ok"),
+        "late": _fail(0.01, asyncio.TimeoutError()),
+        "broken": _fail(0.01, error),
+    }
+    result = asyncio.run(fold_as_completed(branches, _collect, initial=[]))
+    assert result.value == ["ok"]
+    assert sorted(result.failed) == ["broken", "late"]
+    assert result.errors["broken"] is error
+    assert isinstance(result.errors["late"], asyncio.TimeoutError)
+
+
+def test_all_failed_never_folds():
+    calls = []
+
+    async def fold(value, arrived):
+        calls.append(arrived)
+        return value
+
+    branches = {i: _fail(0, RuntimeError(i)) for i in range(3)}
+    result = asyncio.run(fold_as_completed(branches, fold, initial=""))
+    assert result.value == "" and result.folds == 0 and not calls
+    assert sorted(result.failed) == [0, 1, 2]
+
+
+def test_quorum_value_is_handed_out_before_stragglers():
+    branches = {"fast": _after(0.01, "fast"), "slow": _after(0.2, "slow")}
+    early = []
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await fold_as_completed(
+            branches, _collect, initial=[], quorum=1,
+            on_quorum=lambda value: early.append((value, loop.time() - started)),
+        )
+        return result
+
+    result = asyncio.run(main())
+    ((value, seconds),) = early
+    assert value == ["fast"] and seconds < 0.15
+    assert result.value == ["fast", "slow"] and not result.dropped
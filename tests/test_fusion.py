@@ -0,0 +1,57 @@
+"""Stage fusion (shared/fusion.py)."""
+
+import asyncio
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from shared.batchrun import UsageCounter
+from shared.fusion import SectionParser, Stage, ab_benchmark, final_section, fuse_stages
+from shared.offline import SyntheticChatModel
+
+PLAN = "1. Intro 2. Benefits"
+ARTICLE = "Solar panels pay for themselves."
+
+
+def _model(*responses):
+    return SyntheticChatModel(responses=list(responses), latency_mean=0, tokens_per_second=0)
+
+
+def _staged():
+    plan = ChatPromptTemplate.from_messages([("user", "Create an article plan for: {topic}")])
+    write = ChatPromptTemplate.from_messages([("user", "Write the article following this plan:\n{plan}")])
+    llm = _model(PLAN, ARTICLE)
+    return {"plan": plan | llm | StrOutputParser()} | write | llm | StrOutputParser()
+
+
+def _fused():
+    llm = _model(f"### PLAN\n{PLAN}\n\n### ARTICLE\n{ARTICLE}\n")
+    return fuse_stages(llm, [
+        Stage("PLAN", "Create an article plan for: {topic}"),
+        Stage("ARTICLE", "Write the article following the PLAN."),
+    ])
+
+
+def test_fused_chain_matches_staged_in_fewer_calls():
+    inputs = {"topic": "solar power"}
+    staged_calls, fused_calls = UsageCounter(), UsageCounter()
+    staged = _staged().invoke(inputs, config={"callbacks": [staged_calls]})
+    sections = _fused().invoke(inputs, config={"callbacks": [fused_calls]})
+    assert sections == {"PLAN": PLAN, "ARTICLE": ARTICLE}
+    assert final_section.invoke(sections) == staged == ARTICLE
+    assert (staged_calls.calls, fused_calls.calls) == (2, 1)
+
+
+def test_ab_benchmark_reports_calls_per_run():
+    inputs = [{"topic": "solar power"}, {"topic": "wind power"}]
+    rows = asyncio.run(ab_benchmark({"staged": _staged(), "fused": _fused() | final_section}, inputs))
+    calls = {row["variant"]: row["calls"] for row in rows}
+    assert calls == {"staged": 2.0, "fused": 1.0}
+    assert all(row["runs"] == 2 and row["errors"] == 0 and row["incomplete"] == 0 for row in rows)
+
+
+def test_section_parser_tolerates_loose_headers():
+    parser = SectionParser(sections=["PLAN", "ARTICLE"])
+    assert parser.parse("## plan:\nA\n#ARTICLE\nB") == {"PLAN": "A", "ARTICLE": "B"}
+    assert parser.parse("### ARTICLE\nB") == {"PLAN": "", "ARTICLE": "B"}
+    assert parser.parse("no headers at all") == {"PLAN": "", "ARTICLE": "no headers at all"}
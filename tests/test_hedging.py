@@ -0,0 +1,132 @@
+"""Hedged requests (shared/hedging.py)."""
+
+import asyncio
+import threading
+import time
+
+from langchain_core.messages import HumanMessage
+
+from shared.hedging import HedgedChatModel, HedgePolicy
+from shared.offline import SyntheticChatModel
+
+
+def _model(primary_latency, secondary_latency=0.0, delay=0.05, budget=1.0):
+    policy = HedgePolicy(budget=budget, min_delay=delay, initial_delay=delay)
+    return HedgedChatModel(
+        inner=SyntheticChatModel(responses=["primary"], latency_mean=primary_latency, tokens_per_second=0),
+        secondary=SyntheticChatModel(responses=["secondary"], latency_mean=secondary_latency, tokens_per_second=0),
+        policy=policy,
+    )
+
+
+def test_sync_fast_primary_needs_no_backup():
+    model = _model(primary_latency=0.0)
+    unused = threading.Event()
+    assert model._race(lambda: "p", lambda: "s", discard_secondary=unused.set) == ("primary", "p")
+    assert unused.is_set()
+    stats = model.policy.stats()
+    assert stats["hedged"] == 0 and stats["requests"] == 1
+    assert stats["primary_wins"] == 0 and stats["hedge_wins"] == 0
+
+
+def test_sync_backup_wins_over_slow_primary():
+    model = _model(primary_latency=0.0)
+    discarded = threading.Event()
+
+    def primary():
+        time.sleep(0.5)
+        return "p"
+
+    started = time.monotonic()
+    assert model._race(primary, lambda: "s", discard_primary=discarded.set) == ("secondary", "s")
+    assert time.monotonic() - started < 0.3
+    assert not discarded.is_set()  # the primary is still running...
+    assert discarded.wait(1)  # ...and is discarded once it returns
+    stats = model.policy.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_sync_primary_wins_when_it_finishes_first():
+    model = _model(primary_latency=0.0)
+    discarded = threading.Event()
+
+    def primary():
+        time.sleep(0.1)
+        return "p"
+
+    def secondary():
+        time.sleep(0.5)
+        return "s"
+
+    assert model._race(primary, secondary, discard_secondary=discarded.set) == ("primary", "p")
+    assert discarded.wait(1)
+    stats = model.policy.stats()
+    assert stats["hedged"] == 1 and stats["primary_wins"] == 1
+
+
+def test_sync_backup_serves_failed_primary():
+    model = _model(primary_latency=0.0)
+
+    def primary():
+        time.sleep(0.3)
+        raise RuntimeError("primary down")
+
+    def secondary():
+        time.sleep(0.2)
+        return "s"
+
+    started = time.monotonic()
+    assert model._race(primary, secondary) == ("secondary", "s")
+    # The backup ran alongside the failing primary instead of after it.
+    assert time.monotonic() - started < 0.35
+
+
+def test_sync_deadline_starts_with_the_primary():
+    model = _model(primary_latency=0.0, delay=0.2)
+    clock = {}
+
+    def primary():
+        clock["primary"] = time.monotonic()
+        time.sleep(0.5)
+        return "p"
+
+    def secondary():
+        clock["secondary"] = time.monotonic()
+        return "s"
+
+    assert model._race(primary, secondary)[0] == "secondary"
+    assert 0.18 < clock["secondary"] - clock["primary"] < 0.35
+
+
+def test_sync_failover_without_hedge_budget():
+    model = _model(primary_latency=0.0, budget=0.0)
+
+    def primary():
+        raise RuntimeError("primary down")
+
+    assert model._race(primary, lambda: "s") == ("secondary", "s")
+
+
+def test_async_hedge_wins_over_slow_primary():
+    model = _model(primary_latency=0.5, secondary_latency=0.0)
+    started = time.monotonic()
+    result = asyncio.run(model.ainvoke([HumanMessage(content="hi")]))
+    assert result.content == "secondary"
+    assert time.monotonic() - started < 0.4
+    assert model.policy.stats()["hedge_wins"] == 1
+
+
+def test_sync_call_takes_the_faster_provider():
+    model = _model(primary_latency=0.5, secondary_latency=0.0)
+    started = time.monotonic()
+    assert model.invoke([HumanMessage(content="hi")]).content == "secondary"
+    assert time.monotonic() - started < 0.4
+
+
+def test_sync_stream_takes_the_faster_provider():
+    model = _model(primary_latency=0.5, secondary_latency=0.0)
+    text = "".join(chunk.content for chunk in model.stream([HumanMessage(content="hi")]))
+    assert text == "secondary"
+    model = _model(primary_latency=0.0, secondary_latency=0.0)
+    text = "".join(chunk.content for chunk in model.stream([HumanMessage(content="hi")]))
+    assert text == "primary"
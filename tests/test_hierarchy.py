@@ -0,0 +1,63 @@
+"""Hierarchical routing (shared/hierarchy.py)."""
+
+import asyncio
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from shared.hierarchy import FlatRouter, HierarchicalRouter, RouteRegistry, _Router
+
+
+def _registry():
+    registry = RouteRegistry()
+    registry.add_domain("travel", "Trips, bookings and travel logistics")
+    registry.add_route("travel/flights", "Book, change or cancel flights", node="flight_agent")
+    registry.add_route("travel/hotels", "Hotel reservations", node="hotel_agent")
+    registry.add_domain("billing", "Invoices and payments")
+    registry.add_route("billing/refunds", "Refunds", node="refund_agent")
+    registry.add_route("general", "Anything else", node="general_agent")
+    return registry
+
+
+def _llm(*answers):
+    """Fake model answering each call with the next of ``answers``."""
+    prompts = []
+
+    def answer(prompt):
+        prompts.append(prompt.to_string())
+        return answers[len(prompts) - 1]
+
+    return RunnableLambda(answer), prompts
+
+
+def test_router_base_is_abstract():
+    with pytest.raises(TypeError, match="classify"):
+        _Router(_registry(), default="general")
+
+
+def test_hierarchical_descends_one_level_per_call():
+    llm, prompts = _llm("travel", "hotels")
+    router = HierarchicalRouter(_registry(), default="general", llm=llm)
+    assert router.classify("I need a room in Rome") == "travel/hotels"
+    assert len(prompts) == 2
+    assert "flights" not in prompts[0] and "flights" in prompts[1]
+
+
+def test_single_child_domain_needs_no_call():
+    llm, prompts = _llm("billing")
+    router = HierarchicalRouter(_registry(), default="general", llm=llm)
+    assert asyncio.run(router.aclassify("refund my order")) == "billing/refunds"
+    assert len(prompts) == 1
+
+
+def test_unknown_answer_falls_back_to_default():
+    llm, _ = _llm("weather")
+    assert HierarchicalRouter(_registry(), default="general", llm=llm).classify("rain?") == "general"
+
+
+def test_flat_router_matches_quoted_route_names():
+    llm, prompts = _llm("travel/flights", "'Billing/Refunds'.")
+    router = FlatRouter(_registry(), default="general", llm=llm)
+    assert router.classify("fly me to Lisbon") == "travel/flights"
+    assert asyncio.run(router.aclassify("money back")) == "billing/refunds"
+    assert "hotels" in prompts[0]
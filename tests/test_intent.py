@@ -0,0 +1,91 @@
+"""Local intent classification (shared/intent.py)."""
+
+import json
+
+import pytest
+
+from shared.intent import FastPathRouter, HashedNgramClassifier, evaluate, load_decisions
+
+LOG = [
+    ("Book me a flight to London", "booker"),
+    ("Reserve a hotel room in Paris for two nights", "booker"),
+    ("I need a train ticket to Berlin tomorrow", "booker"),
+    ("Please book a table for four at eight", "booker"),
+    ("Can you reserve a rental car in Rome", "booker"),
+    ("What is the capital of Italy", "info"),
+    ("Tell me about the history of the Eiffel Tower", "info"),
+    ("How tall is Mount Everest", "info"),
+    ("Explain how photosynthesis works", "info"),
+    ("Who wrote Pride and Prejudice", "info"),
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    texts, labels = zip(*LOG)
+    return HashedNgramClassifier(["booker", "info"], dim=2 ** 16).fit(texts, labels, epochs=30)
+
+
+def _router(classifier, **kwargs):
+    calls = []
+
+    def fallback(text):
+        calls.append(text)
+        return " Info\n"
+
+    return FastPathRouter(["booker", "info"], fallback, classifier=classifier, **kwargs), calls
+
+
+def test_fit_and_predict(classifier):
+    assert classifier.predict("Book a flight to Paris")[0] == "booker"
+    assert classifier.predict("What is the history of Rome")[0] == "info"
+    proba = classifier.predict_proba("anything")
+    assert set(proba) == {"booker", "info"} and abs(sum(proba.values()) - 1) < 1e-9
+
+
+def test_save_and_load_round_trip(classifier, tmp_path):
+    path = str(tmp_path / "intent_model.json")
+    classifier.save(path)
+    loaded = HashedNgramClassifier.load(path)
+    assert loaded.labels == classifier.labels and loaded.dim == classifier.dim
+    for text, _ in LOG:
+        label, confidence = loaded.predict(text)
+        expected_label, expected_confidence = classifier.predict(text)
+        assert label == expected_label and confidence == pytest.approx(expected_confidence, abs=1e-4)
+
+
+def test_confident_prediction_answers_locally(classifier):
+    router, calls = _router(classifier, threshold=0.6)
+    assert router.route("Book me a flight to London") == ("booker", "local")
+    assert calls == []
+
+
+def test_unsure_prediction_goes_to_the_fallback_and_is_logged(classifier, tmp_path):
+    log_path = tmp_path / "routing_log.jsonl"
+    router, calls = _router(classifier, threshold=0.999, log_path=str(log_path))
+    assert router.route("Book me a flight to London") == ("info", "llm")
+    assert calls == ["Book me a flight to London"]
+    (record,) = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert record["text"] == "Book me a flight to London" and record["label"] == "info"
+    assert load_decisions(str(log_path)) == (["Book me a flight to London"], ["info"])
+
+
+def test_stats_report_local_rate_and_shadow_agreement(classifier):
+    router, calls = _router(classifier, threshold=0.6, shadow_rate=1.0)
+    router.route("Book me a flight to London")  # local "booker", the LLM says "info"
+    router.route("How tall is Mount Everest")  # local "info", the LLM agrees
+    router.threshold = 1.0
+    router.route("Something else entirely")  # goes to the LLM
+    stats = router.stats()
+    assert stats["requests"] == 3 and stats["local_rate"] == pytest.approx(2 / 3)
+    assert stats["shadowed"] == 2 and stats["shadow_agreement"] == 0.5
+    assert len(calls) == 3
+
+
+def test_evaluate_reports_agreement_and_coverage(classifier):
+    texts, labels = zip(*LOG)
+    report = evaluate(classifier, texts, ["info"] * len(texts), thresholds=[0.0, 1.0])
+    assert report["examples"] == 10 and report["agreement"] == 0.5
+    assert report["thresholds"][0] == {"threshold": 0.0, "coverage": 1.0, "agreement": 0.5}
+    assert report["thresholds"][1]["coverage"] == 0.0
+    assert report["confusion"]["info"] == {"booker": 5, "info": 5}
@@ -0,0 +1,73 @@
+"""Incremental JSON parsing (shared/jsonstream.py)."""
+
+import pytest
+
+from shared.jsonstream import IncrementalJSONObject, SchemaViolation, StreamingJSONParser
+
+
+def _feed(schema, *chunks, **kwargs):
+    obj = IncrementalJSONObject(schema, **kwargs)
+    for chunk in chunks:
+        if obj.feed(chunk):
+            break
+    return obj
+
+
+def test_parses_across_chunk_boundaries():
+    obj = _feed({"cpu": str, "cores": int}, '```json\n{"cp', 'u": "3.5 G', 'Hz", "cores"', ": 8}\n```")
+    assert obj.done
+    assert obj.result == {"cpu": "3.5 GHz", "cores": 8}
+
+
+def test_stops_at_the_closing_brace():
+    obj = IncrementalJSONObject({"a": int})
+    assert obj.feed('{"a": 1} trailing prose')
+    assert obj.result == {"a": 1}
+
+
+def test_float_accepts_an_integer():
+    assert _feed({"n": float}, '{"n": 3}').result == {"n": 3}
+    assert _feed({"n": float}, '{"n": -2.5}').result == {"n": -2.5}
+
+
+def test_int_rejects_a_float():
+    with pytest.raises(SchemaViolation):
+        _feed({"n": int}, '{"n": 3.5}')
+
+
+def test_bool_is_not_a_number():
+    with pytest.raises(SchemaViolation):
+        _feed({"n": int}, '{"n": true}')
+    assert _feed({"n": bool}, '{"n": false}').result == {"n": False}
+
+
+def test_wrong_type_fails_on_first_character():
+    obj = IncrementalJSONObject({"cpu": str})
+    with pytest.raises(SchemaViolation):
+        obj.feed('{"cpu": [')
+    assert not obj.done
+
+
+def test_unexpected_key_fails_before_its_value():
+    obj = IncrementalJSONObject({"cpu": str})
+    with pytest.raises(SchemaViolation, match="Unexpected key"):
+        obj.feed('{"gpu"')
+
+
+def test_missing_required_key():
+    with pytest.raises(SchemaViolation, match="missing"):
+        _feed({"a": int, "b": int}, '{"a": 1}')
+    assert _feed({"a": int, "b": int}, '{"a": 1}', required=["a"]).result == {"a": 1}
+
+
+def test_nested_values_and_escapes():
+    obj = _feed({"tags": list, "meta": dict, "s": str}, r'{"tags": ["x", "}"], "meta": {"k": [1]}, "s": "a\"}"}')
+    assert obj.result == {"tags": ["x", "}"], "meta": {"k": [1]}, "s": 'a"}'}
+
+
+def test_parser_streams_and_parses():
+    parser = StreamingJSONParser(spec={"a": int})
+    assert parser.parse('{"a": 1}') == {"a": 1}
+    assert list(parser.transform(iter(['{"a"', ": 2}", "ignored"]))) == [{"a": 2}]
+    with pytest.raises(SchemaViolation):
+        parser.parse('{"a": 1')
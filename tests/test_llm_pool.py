@@ -0,0 +1,63 @@
+"""Model pool (shared/llm.py): eviction must not break models still in use."""
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from shared import llm as llm_module
+from shared.offline import SyntheticChatModel
+
+
+class _Client:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Model:
+    def __init__(self):
+        self.client = _Client()
+
+
+def test_registry_reuses_instances_per_key():
+    registry = llm_module._ModelRegistry(max_size=4)
+    first = registry.get_or_create("a", _Model)
+    assert registry.get_or_create("a", _Model) is first
+    assert len(registry) == 1
+
+
+def test_eviction_does_not_close_model():
+    registry = llm_module._ModelRegistry(max_size=1)
+    held = registry.get_or_create("a", _Model)
+    registry.get_or_create("b", _Model)
+
+    assert len(registry) == 1
+    assert not held.client.closed
+    assert registry.get_or_create("a", _Model) is not held
+
+
+def test_close_all_closes_pooled_models():
+    registry = llm_module._ModelRegistry(max_size=4)
+    model = registry.get_or_create("a", _Model)
+    registry.close_all()
+    assert model.client.closed
+    assert len(registry) == 0
+
+
+def test_chain_keeps_working_after_its_model_is_evicted(monkeypatch):
+    monkeypatch.setattr(llm_module, "_registry", llm_module._ModelRegistry(max_size=1))
+    monkeypatch.setenv("LLM_PROVIDER", "synthetic")
+    monkeypatch.setenv("SYNTHETIC_LATENCY_MEAN", "0")
+    monkeypatch.setenv("SYNTHETIC_TOKENS_PER_SECOND", "0")
+    for name in ("LLM_CACHE", "LLM_RECORD", "LLM_COALESCE", "LLM_HEDGE_PROVIDER"):
+        monkeypatch.delenv(name, raising=False)
+
+    model = llm_module.get_llm(temperature=0)
+    assert isinstance(model, SyntheticChatModel)
+    chain = ChatPromptTemplate.from_messages([("user", "{q}")]) | model | StrOutputParser()
+
+    llm_module.get_llm(temperature=0.7)  # evicts the temperature=0 model
+    assert llm_module.get_llm(temperature=0) is not model
+
+    assert chain.invoke({"q": "still there?"}).startswith("Synthetic response")
@@ -0,0 +1,36 @@
+"""Offline chat models (shared/offline.py)."""
+
+import pytest
+from langchain_core.tools import tool
+
+from shared.offline import SyntheticChatModel, _OfflineChatModel
+
+
+@tool
+def lookup(symbol: str) -> str:
+    """Looks up a stock price."""
+    return "1"
+
+
+def test_offline_base_is_abstract():
+    class Incomplete(_OfflineChatModel):
+        @property
+        def _llm_type(self) -> str:
+            return "incomplete"
+
+    with pytest.raises(TypeError, match="_plan"):
+        Incomplete()
+
+
+def test_bind_tools_records_the_tools():
+    model = SyntheticChatModel(latency_mean=0, tokens_per_second=0)
+    bound = model.bind_tools([lookup])
+    assert [t["function"]["name"] for t in bound.kwargs["tools"]] == ["lookup"]
+    assert bound.invoke("price?").content
+
+
+def test_bind_tools_rejects_a_forced_tool_call():
+    model = SyntheticChatModel(latency_mean=0, tokens_per_second=0)
+    assert model.bind_tools([lookup], tool_choice="auto").kwargs["tools"]
+    with pytest.raises(ValueError, match="never call tools"):
+        model.bind_tools([lookup], tool_choice="any")
@@ -0,0 +1,135 @@
+"""Parallel research fan-out (03_Parallelization/langgraph_parallel_research.py)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.output_parsers import StrOutputParser
+from pydantic import PrivateAttr
+
+from shared.graphbench import _load_script
+from shared.offline import SyntheticChatModel
+from shared.ratelimit import ProviderLimiter
+
+SLOW = 0.5
+
+
+class _TrackingModel(SyntheticChatModel):
+    """Tracks calls in flight; prompts with a "slow" focus take SLOW seconds."""
+
+    _gauge: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    _peak: int = PrivateAttr(default=0)
+
+    @property
+    def peak(self):
+        return self._peak
+
+    def _enter(self, messages):
+        with self._gauge:
+            self._calls += 1
+            self._peak = max(self._peak, self._calls)
+        return SLOW if "slow" in messages[0].content else 0.0
+
+    def _exit(self):
+        with self._gauge:
+            self._calls -= 1
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        delay = self._enter(messages)
+        try:
+            time.sleep(delay)
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        finally:
+            self._exit()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        delay = self._enter(messages)
+        try:
+            await asyncio.sleep(delay)
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        finally:
+            self._exit()
+
+
+class _CountingLimiter(ProviderLimiter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.releases = 0
+
+    def release(self, ticket, *args, **kwargs):
+        self.releases += 1
+        super().release(ticket, *args, **kwargs)
+
+
+@pytest.fixture
+def research(monkeypatch):
+    module = _load_script("03_Parallelization/langgraph_parallel_research.py")
+    model = _TrackingModel(latency_mean=0.05, tokens_per_second=0)
+    for name in ("RESEARCH_PERSPECTIVE_CHAIN", "SYNTHESIZE_CHAIN", "FOLD_CHAIN"):
+        monkeypatch.setattr(module, name, getattr(module, name).prompt | model | StrOutputParser())
+    monkeypatch.setattr(module, "BRANCH_TIMEOUT", 0.2)
+    module._branch_limiter = _CountingLimiter("research_branches", max_concurrency=2)
+    module.model = model
+    yield module
+    module.branch_pool().shutdown(wait=True)
+
+
+def _perspectives(count, slow=()):
+    return [
+        {"name": f"P{i}", "role": "analyst", "focus": "slow" if i in slow else f"angle {i}"}
+        for i in range(count)
+    ]
+
+
+def _run(module, use_async, perspectives):
+    graph = module.build_parallel_research_graph(use_async=use_async)
+    inputs = module.research_inputs("subsidies", perspectives)
+    if use_async:
+        return asyncio.run(graph.ainvoke(inputs))
+    return graph.invoke(inputs)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_one_finding_per_perspective(research, use_async):
+    result = _run(research, use_async, _perspectives(6))
+    assert sorted(finding.split("]")[0] for finding in result["findings"]) == [f"[P{i}" for i in range(6)]
+    assert result["timed_out"] == [] and result["synthesis"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_branches_in_flight_stay_under_the_cap(research, use_async):
+    _run(research, use_async, _perspectives(8))
+    assert research.model.peak == 2
+    assert research.branch_limiter().stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_slow_branch_times_out_and_releases_its_slot_once(research, use_async):
+    result = _run(research, use_async, _perspectives(3, slow={1}))
+    assert list(result["timed_out"]) == ["P1"]
+    assert len(result["findings"]) == 2
+    research.branch_pool().shutdown(wait=True)  # let the abandoned sync call return
+    limiter = research.branch_limiter()
+    assert limiter.releases == 3
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_quorum_synthesis_is_emitted_before_stragglers(research, monkeypatch):
+    monkeypatch.setattr(research, "BRANCH_TIMEOUT", 2 * SLOW)
+    graph = research.build_incremental_research_graph()
+    inputs = research.research_inputs("subsidies", _perspectives(3, slow={2}), quorum=2)
+
+    async def main():
+        events = []
+        async for mode, payload in graph.astream(inputs, stream_mode=["custom", "values"]):
+            events.append((mode, payload))
+        return events
+
+    events = asyncio.run(main())
+    (quorum_event,) = [payload for mode, payload in events if mode == "custom"]
+    state = events[-1][1]
+    assert state["quorum_synthesis"] == quorum_event["quorum_synthesis"]
+    assert len(state["findings"]) == 3  # the straggler is folded on top
+    assert state["synthesis"] != state["quorum_synthesis"] and not state.get("dropped")
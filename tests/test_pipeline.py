@@ -0,0 +1,62 @@
+"""Pipelined stages (shared/pipeline.py)."""
+
+import asyncio
+import time
+
+import pytest
+
+from shared.pipeline import aiter_lines, pipelined
+
+
+async def _chunks(*chunks, delay=0.0):
+    for chunk in chunks:
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+async def _collect(iterator):
+    return [item async for item in iterator]
+
+
+def test_aiter_lines_rechunks_tokens():
+    lines = asyncio.run(_collect(aiter_lines(_chunks("a", "b\n\nc", "d\n ", "e"))))
+    assert lines == ["ab", "cd", "e"]
+
+
+def test_stage_starts_before_upstream_finishes():
+    async def stage(unit):
+        return unit.upper(), time.perf_counter()
+
+    async def main():
+        started = time.perf_counter()
+        results = await _collect(pipelined(_chunks("a", "b", "c", delay=0.05), stage))
+        return started, results
+
+    started, results = asyncio.run(main())
+    assert sorted(unit for unit, _ in results) == ["A", "B", "C"]
+    assert min(at for _, at in results) - started < 0.1
+
+
+def test_stage_error_surfaces_before_upstream_is_exhausted():
+    async def stage(unit):
+        raise ValueError(unit)
+
+    async def main():
+        started = time.perf_counter()
+        with pytest.raises(ValueError, match="a"):
+            await _collect(pipelined(_chunks("a", "b", delay=0.5), stage))
+        return time.perf_counter() - started
+
+    assert asyncio.run(main()) < 0.9
+
+
+def test_upstream_error_is_raised():
+    async def broken():
+        yield "a"
+        raise RuntimeError("upstream")
+
+    async def stage(unit):
+        return unit
+
+    with pytest.raises(RuntimeError, match="upstream"):
+        asyncio.run(_collect(pipelined(broken(), stage)))
@@ -0,0 +1,101 @@
+"""Provider rate limiting (shared/ratelimit.py)."""
+
+import asyncio
+import threading
+import time
+
+from shared.offline import SyntheticChatModel
+from shared.ratelimit import ProviderLimiter, RateLimitedChatModel
+
+
+def test_concurrency_cap_queues_in_arrival_order():
+    limiter = ProviderLimiter("test", max_concurrency=1)
+    first = limiter.acquire()
+    order = []
+
+    def worker(name):
+        ticket = limiter.acquire()
+        order.append(name)
+        limiter.release(ticket)
+
+    threads = []
+    for name in "abc":
+        threads.append(threading.Thread(target=worker, args=(name,)))
+        threads[-1].start()
+        time.sleep(0.02)  # enqueue in a known order
+    assert limiter.stats()["queue_depth"] == 3
+    limiter.release(first)
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == ["a", "b", "c"]
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0 and stats["admitted"] == 4 and stats["max_queue_depth"] == 3
+
+
+def test_requests_per_minute_spaces_requests():
+    limiter = ProviderLimiter("test", rpm=600, burst_seconds=0.1)  # 10/s, burst of 1
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.release(limiter.acquire())
+    assert 0.15 < time.monotonic() - started < 1.0
+
+
+def test_large_request_is_not_overtaken():
+    limiter = ProviderLimiter("test", tpm=6000, burst_seconds=1)  # 100 tokens/s, burst of 100
+    limiter.release(limiter.acquire(cost=100))  # empties the bucket
+    order = []
+
+    async def request(name, cost):
+        ticket = await limiter.aacquire(cost)
+        order.append(name)
+        limiter.release(ticket)
+
+    async def main():
+        big = asyncio.ensure_future(request("big", 50))
+        await asyncio.sleep(0)
+        await asyncio.gather(big, request("small", 1))
+
+    asyncio.run(main())
+    assert order == ["big", "small"]
+
+
+def test_actual_usage_corrects_the_token_estimate():
+    limiter = ProviderLimiter("test", tpm=6000, burst_seconds=1)
+    ticket = limiter.acquire(cost=100)
+    limiter.release(ticket, actual_tokens=10)  # refunds the 90 over-estimated tokens
+    started = time.monotonic()
+    limiter.release(limiter.acquire(cost=80))
+    assert time.monotonic() - started < 0.1
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    limiter = ProviderLimiter("test", max_concurrency=1)
+    held = limiter.acquire()
+
+    async def main():
+        waiting = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["queue_depth"] == 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(main())
+    assert limiter.stats()["queue_depth"] == 0
+    limiter.release(held)
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_rate_limited_model_holds_calls_at_the_cap():
+    limiter = ProviderLimiter("test", max_concurrency=2)
+    model = RateLimitedChatModel(
+        inner=SyntheticChatModel(latency_mean=0.05, tokens_per_second=0), limiter=limiter
+    )
+
+    async def main():
+        return await asyncio.gather(*(model.ainvoke(f"q{i}") for i in range(6)))
+
+    started = time.monotonic()
+    replies = asyncio.run(main())
+    assert len(replies) == 6
+    assert time.monotonic() - started >= 0.15  # three rounds of two
+    assert limiter.stats()["in_flight"] == 0
@@ -0,0 +1,54 @@
+"""Near-duplicate route cache (shared/routecache.py)."""
+
+from shared.routecache import RouteCache, normalize
+
+
+def test_near_duplicate_reuses_the_route():
+    cache = RouteCache(threshold=0.6)
+    cache.add("Book me a flight to London next Friday.", "booker")
+    assert cache.lookup("book a flight to london friday") == "booker"
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_unrelated_request_misses():
+    cache = RouteCache(threshold=0.6)
+    cache.add("Book me a flight to London next Friday.", "booker")
+    assert cache.lookup("What is the population of Canada?") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_exact_hit_after_normalization():
+    assert normalize("Could you book ME a flight, please?") == ["book", "flight"]
+    cache = RouteCache()
+    cache.add("Could you book me a flight, please?", "booker")
+    assert cache.lookup("book flight") == "booker"
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["near_hits"] == 0
+
+
+def test_lru_eviction_removes_the_index_buckets():
+    cache = RouteCache(max_entries=2)
+    cache.add("book a flight to london", "booker")
+    assert cache.stats()["buckets"] == cache.bands  # one per band
+    cache.add("tell me about the eiffel tower", "info")
+    assert cache.lookup("book a flight to london") == "booker"  # now the most recently used
+    cache.add("how tall is mount everest", "info")
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert cache.lookup("tell me about the eiffel tower") is None
+    assert stats["buckets"] == 2 * cache.bands  # the evicted key's buckets are gone
+    cache.max_entries = 0
+    cache.add("one more request", "info")
+    assert cache.stats()["entries"] == 0 and cache.stats()["buckets"] == 0
+
+
+def test_hit_rate_accounting():
+    cache = RouteCache()
+    assert cache.stats()["hit_rate"] == 0.0
+    cache.add("book a flight to london", "booker")
+    cache.lookup("book a flight to london")  # exact
+    cache.lookup("book me a flight to london on friday")  # near
+    cache.lookup("what is the capital of peru")  # miss
+    cache.lookup("who painted the mona lisa")  # miss
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["near_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["hit_rate"] == 0.5
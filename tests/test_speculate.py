@@ -0,0 +1,113 @@
+"""Speculative branches (shared/speculate.py)."""
+
+import asyncio
+
+from shared.speculate import BufferedStream, Speculator
+
+
+def _speculator(**kwargs):
+    settings = dict(max_branches=1, min_probability=0.0, waste_budget=0.0, burst=1.0)
+    settings.update(kwargs)
+    return Speculator(["a", "b"], predictor=lambda text: {"a": 0.9, "b": 0.1}, **settings)
+
+
+def test_credit_is_reserved_before_branches_resolve():
+    speculator = _speculator()
+
+    async def main():
+        started = []
+
+        def branch(name):
+            async def run():
+                started.append(name)
+                await asyncio.sleep(0.05)
+                return name
+            return run
+
+        # Ten concurrent requests share one unit of credit: only the first
+        # may speculate, even though none has been resolved yet.
+        speculations = [speculator.start("x", {"a": branch("a"), "b": branch("b")}) for _ in range(10)]
+        await asyncio.sleep(0)
+        assert sum(len(s.tasks) for s in speculations) == 1
+        for speculation in speculations:
+            await speculation.resolve("b")
+        return started
+
+    assert asyncio.run(main()) == ["a"]
+    stats = speculator.stats()
+    assert stats["wasted_per_request"] == 0.1
+
+
+def test_hit_refunds_credit():
+    speculator = _speculator()
+
+    async def main():
+        results = []
+        for _ in range(3):
+            results.append(await speculator.run("x", classify=_const("a"), branches={"a": _const("A"), "b": _const("B")}))
+        return results
+
+    assert asyncio.run(main()) == [("a", "A")] * 3
+    stats = speculator.stats()
+    assert stats["speculation_rate"] == 1.0 and stats["hit_rate"] == 1.0
+
+
+def test_miss_cancels_branch_and_runs_route():
+    speculator = _speculator()
+    cancelled = []
+
+    async def slow_a():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append("a")
+            raise
+
+    async def classify():
+        await asyncio.sleep(0.01)  # the speculated branch is running by now
+        return "b"
+
+    async def main():
+        return await speculator.run("x", classify=classify, branches={"a": slow_a, "b": _const("B")})
+
+    assert asyncio.run(main()) == ("b", "B")
+    assert cancelled == ["a"]
+    assert speculator.stats()["wasted_per_request"] == 1.0
+
+
+def test_failed_classification_cancels_branches():
+    speculator = _speculator()
+
+    async def fail():
+        raise ValueError("classifier down")
+
+    async def main():
+        try:
+            await speculator.run("x", classify=fail, branches={"a": _const("A"), "b": _const("B")})
+        except ValueError:
+            return True
+
+    assert asyncio.run(main())
+
+
+def test_buffered_stream_replays_earlier_and_later_chunks():
+    async def tokens():
+        for token in ["a", "b", "c"]:
+            await asyncio.sleep(0.01)
+            yield token
+
+    async def main():
+        buffer = BufferedStream(tokens())
+        task = asyncio.ensure_future(buffer.consume())
+        await asyncio.sleep(0.015)  # some chunks already produced
+        replayed = [token async for token in buffer.replay()]
+        return replayed, await task
+
+    replayed, consumed = asyncio.run(main())
+    assert replayed == ["a", "b", "c"] == consumed
+
+
+def _const(value):
+    async def run():
+        return value
+    return run
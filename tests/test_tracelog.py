@@ -0,0 +1,32 @@
+"""Trace log and recorder (shared/tracelog.py)."""
+
+from shared.cache import SQLiteLLMCache
+from shared.offline import SyntheticChatModel
+from shared.tracelog import TraceLog, TraceRecorder, summarize
+
+
+def test_append_lookup_and_iterate(tmp_path):
+    log = TraceLog(str(tmp_path), segment_bytes=200)
+    for i in range(5):
+        log.append({"prompt_hash": f"h{i % 2}", "response": "x" * 100, "i": i})
+    assert len(log.segments()) > 1
+    assert [record["i"] for record in log] == list(range(5))
+    assert [record["i"] for record in TraceLog(str(tmp_path)).lookup("h0")] == [0, 2, 4]
+
+
+def test_cache_hits_are_tagged_and_summarised_apart(tmp_path):
+    log = TraceLog(str(tmp_path / "traces"))
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"))
+    model = SyntheticChatModel(latency_mean=0.05, tokens_per_second=0, cache=cache)
+    config = {"callbacks": [TraceRecorder(log)], "metadata": {"langgraph_node": "node"}}
+
+    first = model.invoke("hello", config)
+    second = model.invoke("hello", config)
+    assert first.content == second.content
+
+    records = list(log)
+    assert [bool(record.get("cache_hit")) for record in records] == [False, True]
+    (row,) = summarize(log)
+    assert row["calls"] == 1 and row["cache_hits"] == 1
+    assert row["p50"] >= 0.05
+    cache.close()